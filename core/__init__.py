@@ -17,6 +17,21 @@ Usage:
 from .bazi_calculator import (
     # Main analysis function
     analyze_bazi,
+    BAZI_SECTIONS,
+    
+    # Result cache (pillar key -> sections)
+    BaziCache,
+    BAZI_CACHE,
+    PILLAR_SECTIONS,
+    get_pillar_key,
+    pillars_from_key,
+    
+    # Batch analysis
+    analyze_bazi_batch,
+    calculate_four_pillars_batch,
+    calculate_dm_strength_batch,
+    calculate_profiles_batch,
+    BATCH_SECTIONS,
     
     # Four Pillars calculation
     calculate_four_pillars,
@@ -31,6 +46,8 @@ from .bazi_calculator import (
     
     # Ten Gods / Profiles
     get_ten_god,
+    get_ten_god_code,
+    get_ten_god_codes,
     calculate_ten_profiles,
     calculate_profile_percentages_joey_yap,
     get_dominant_profile,
@@ -39,6 +56,8 @@ from .bazi_calculator import (
     # Luck Pillars
     calculate_luck_pillars,
     calculate_luck_pillar_start_age,
+    calculate_luck_start,
+    get_solar_term_instants,
     get_luck_direction,
     
     # Symbolic Stars
@@ -64,6 +83,8 @@ from .bazi_calculator import (
     # Annual Analysis (NEW!)
     calculate_annual_pillar,
     calculate_annual_analysis,
+    annual_ten_god_table,
+    clear_annual_caches,
     
     # Monthly Influence (NEW!)
     calculate_monthly_influence,
@@ -71,6 +92,9 @@ from .bazi_calculator import (
     # Current Luck Pillar (NEW!)
     get_current_luck_pillar,
     
+    # Life timeline (luck / annual / monthly pillars)
+    iter_life_timeline,
+    
     # Life Star / Gua (NEW!)
     calculate_gua_number,
     get_gua_info,
@@ -81,15 +105,25 @@ from .bazi_calculator import (
     # Five Structures (NEW!)
     calculate_five_structures,
     
+    # Group compatibility
+    compatibility_matrix,
+    
     # Interactions
     detect_clashes,
     detect_combines,
     detect_three_harmony,
+    detect_external_interactions,
+    branch_mask,
+    get_interaction_flags,
+    interaction_flag_table,
     
     # Solar terms
     get_bazi_year,
     get_bazi_month,
     
+    # Reverse pillar search
+    find_datetimes_for_pillars,
+    
     # Utilities
     pillars_to_dict,
     validate_calculation,
@@ -110,14 +144,39 @@ from .bazi_calculator import (
     BRANCH_ELEMENTS,
     HIDDEN_STEMS,
     SOLAR_TERMS,
+    TERM_UTC_OFFSET_HOURS,
     ELEMENT_COLORS,
     TEN_GODS_CN,
+    TEN_GODS,
+    TEN_GOD_INDEX,
+    TEN_GOD_MATRIX,
+    TEN_GOD_CODES,
+    TEN_GOD_CODE_ARRAY,
+    STEM_INDEX,
+    BRANCH_INDEX,
+    FIVE_ELEMENTS,
+    ELEMENT_INDEX,
+    DM_STRENGTH_LEVELS,
+    BAZI_MONTH_TABLE,
+    PILLAR_MEANINGS,
+    FrozenDict,
+    JOEY_YAP_PROFILE_ORDER,
+    JOEY_YAP_VISIBLE_WEIGHTS,
+    JOEY_YAP_HIDDEN_WEIGHTS,
     PROFILE_NAMES,
     PRODUCTIVE_CYCLE,
     PRODUCED_BY,
     CONTROLLING_CYCLE,
     CONTROLLED_BY,
     SIX_CLASHES,
+    BRANCH_BITS,
+    CLASH_MASKS,
+    COMBINE_MASKS,
+    HARMONY_MASKS,
+    HARMONY_FRAME_MASKS,
+    INTERACTION_CLASH,
+    INTERACTION_COMBINE,
+    INTERACTION_HARMONY,
     SIX_COMBINES,
     THREE_HARMONY,
     SEASONAL_STRENGTH,
@@ -142,6 +201,98 @@ from .bazi_calculator import (
     SIX_ASPECTS_INFO,
 )
 
+from .bazi_atlas import (
+    # Century atlas of chart distributions
+    build_atlas,
+    load_atlas,
+    save_atlas,
+    chart_rarity,
+    ATLAS_PATH,
+    FIVE_STRUCTURE_ORDER,
+)
+
+from .history_store import (
+    # Persistent reading history (SQLite)
+    HistoryStore,
+    get_history_store,
+    HISTORY_DB_PATH,
+)
+
+from .history_export import (
+    # Streaming JSONL / CSV export
+    iter_history_export,
+    iter_export_records,
+    write_export,
+    EXPORT_FORMATS,
+    CSV_COLUMNS,
+)
+
+from .ml_dataset import (
+    # Flat, typed ML dataset (Parquet / Arrow / npz)
+    write_ml_dataset,
+    load_ml_dataset,
+    iter_ml_batches,
+    reading_features,
+    ML_COLUMNS,
+    PYARROW_AVAILABLE,
+)
+
+from .schema_export import (
+    # Universal Schema v3.0 serializer
+    encode_export,
+    iter_export_documents,
+    iter_export_jsonl,
+    compact_chart,
+    bazi_section,
+    analysis_prompt,
+    CompactChart,
+    SCHEMA_VERSION,
+)
+
+from .outcome_analytics import (
+    # Outcome success rates by chart signal
+    outcome_rates,
+    outcome_report,
+    baseline_rate,
+    history_snapshot,
+    wilson_interval,
+    ANALYTICS_DIMENSIONS,
+)
+
+from .chart_cache import (
+    # Shared period-aligned caches for pages
+    cached_qmdj_chart,
+    cached_analyze_bazi,
+    cached_annual_overview,
+    chart_period,
+    cache_stats,
+    clear_chart_caches,
+    PeriodCache,
+)
+
+from .strategic_scan import (
+    # Strategic hour scoring and background range scans
+    score_hour,
+    score_hours_matrix,
+    hour_score_kernel,
+    direction_score_kernel,
+    hour_result,
+    hour_insights,
+    scan_day,
+    scan_day_matrix,
+    scan_range,
+    StrategicScan,
+    ACTIVITY_TYPES,
+    SCAN_MAX_DAYS,
+)
+
+from .date_selection import (
+    # Date selection (择日)
+    rank_days,
+    rank_hours,
+    score_qmdj_palace,
+)
+
 __version__ = "1.3.0"
 __all__ = [
     'analyze_bazi',
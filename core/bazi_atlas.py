@@ -0,0 +1,270 @@
+"""
+===============================================================================
+BAZI ATLAS - Century-scale chart statistics
+===============================================================================
+Ming QiMenDunJia 明奇门 - How common is a chart?
+
+Enumerates every (date, Chinese hour) from 1900 to 2100 with the batch
+pillar, strength and profile kernels and keeps only the aggregates:
+- Day Master x strength category x dominant profile x dominant structure
+- Distribution of DM strength percentages (0.1% steps)
+- Life Star (Gua) by gender
+
+The aggregates are stored in a small compressed .npz next to this module,
+so the BaZi page can answer "how rare is this chart" with a few lookups
+instead of ~1.7M analyze_bazi calls.
+
+Version: 1.0
+===============================================================================
+"""
+
+import os
+from datetime import date
+from typing import Dict, Optional
+
+from .bazi_calculator import (
+    DM_STRENGTH_LEVELS,
+    HEAVENLY_STEMS,
+    NUMPY_AVAILABLE,
+    PROFILE_NAMES,
+    STEM_INDEX,
+    TEN_GODS,
+    TEN_GOD_INDEX,
+    calculate_dm_strength_batch,
+    calculate_five_structures,
+    calculate_four_pillars_batch,
+    calculate_gua_number,
+    calculate_profiles_batch,
+    find_datetimes_for_pillars,
+    np,
+)
+
+# =============================================================================
+# ATLAS LAYOUT
+# =============================================================================
+
+ATLAS_START_YEAR = 1900
+ATLAS_END_YEAR = 2100
+ATLAS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bazi_atlas.npz')
+
+# One clock hour per Chinese hour (Zi, Chou, ... Hai)
+CHINESE_HOUR_STARTS = (0, 1, 3, 5, 7, 9, 11, 13, 15, 17, 19, 21)
+
+# Order in which calculate_five_structures breaks ties for the dominant structure
+FIVE_STRUCTURE_ORDER = ('Wealth', 'Influence', 'Resources', 'Companion', 'Output')
+
+# TEN_GODS come in pairs (Friend/Rob Wealth, Eating God/Hurting Officer, ...);
+# this maps each FIVE_STRUCTURE_ORDER entry to its pair index
+_STRUCTURE_PAIRS = (2, 3, 4, 0, 1)
+
+# Strength percentages are rounded to 0.1, so 1001 bins cover 0.0 - 100.0
+STRENGTH_PCT_BINS = 1001
+
+GUA_GENDERS = ('male', 'female')
+
+_ATLAS = None
+
+
+# =============================================================================
+# BUILD / SAVE / LOAD
+# =============================================================================
+
+def _dominant_structures(counts):
+    """Dominant structure (index into FIVE_STRUCTURE_ORDER) from Ten God counts"""
+    pairs = counts.astype(np.int64).reshape(len(counts), 5, 2).sum(axis=2)
+    return np.argmax(pairs[:, list(_STRUCTURE_PAIRS)], axis=1)
+
+
+def build_atlas(start_year: int = ATLAS_START_YEAR, end_year: int = ATLAS_END_YEAR) -> Dict:
+    """
+    Enumerate every (date, Chinese hour) in a year range and aggregate.
+
+    Returns dict of numpy arrays:
+        start_year, end_year, total
+        joint: (10, 5, 10, 5) counts over Day Master, strength category
+            (DM_STRENGTH_LEVELS), dominant profile (TEN_GODS) and dominant
+            structure (FIVE_STRUCTURE_ORDER)
+        strength_hist: (1001,) counts of strength_pct * 10
+        gua: (2, 9) charts per Gua number (1-9) for GUA_GENDERS
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("build_atlas requires numpy")
+
+    joint = np.zeros(10 * len(DM_STRENGTH_LEVELS) * 10 * 5, dtype=np.int64)
+    strength_hist = np.zeros(STRENGTH_PCT_BINS, dtype=np.int64)
+    gua = np.zeros((len(GUA_GENDERS), 9), dtype=np.int64)
+    hour_starts = np.array(CHINESE_HOUR_STARTS)
+
+    for year in range(start_year, end_year + 1):
+        days = np.arange(f'{year}-01-01', f'{year + 1}-01-01', dtype='datetime64[D]')
+        dates = np.repeat(days, len(hour_starts))
+        hours = np.tile(hour_starts, len(days))
+
+        pillars = calculate_four_pillars_batch(dates, hours)
+        strength_pct, strength_category = calculate_dm_strength_batch(pillars)
+        counts, _, dominant = calculate_profiles_batch(pillars)
+        structure = _dominant_structures(counts)
+
+        cell = ((pillars['day_stem'].astype(np.int64) * len(DM_STRENGTH_LEVELS) + strength_category) * 10 + dominant) * 5 + structure
+        joint += np.bincount(cell, minlength=joint.size)
+        strength_hist += np.bincount(np.rint(strength_pct * 10).astype(np.int64), minlength=STRENGTH_PCT_BINS)
+        for g, gender in enumerate(GUA_GENDERS):
+            gua[g, calculate_gua_number(year, gender) - 1] += len(dates)
+
+    return {
+        'start_year': np.int64(start_year),
+        'end_year': np.int64(end_year),
+        'total': np.int64(joint.sum()),
+        'joint': joint.reshape(10, len(DM_STRENGTH_LEVELS), 10, 5),
+        'strength_hist': strength_hist,
+        'gua': gua,
+    }
+
+
+def save_atlas(atlas: Dict, path: str = ATLAS_PATH):
+    """Write an atlas to a compressed .npz file (atomically)"""
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(tmp_path, **atlas)
+    os.replace(tmp_path, path)
+
+
+def load_atlas(path: str = ATLAS_PATH, build: bool = True) -> Optional[Dict]:
+    """
+    Load the atlas, building and saving it first if the file is missing.
+
+    The loaded atlas is kept in memory for the life of the process.
+    Returns None if the file is missing and build is False.
+    """
+    global _ATLAS
+    if _ATLAS is not None and _ATLAS.get('_path') == path:
+        return _ATLAS
+    if not NUMPY_AVAILABLE:
+        raise ImportError("load_atlas requires numpy")
+
+    if os.path.exists(path):
+        with np.load(path) as data:
+            atlas = {key: data[key] for key in data.files}
+    elif build:
+        atlas = build_atlas()
+        try:
+            save_atlas(atlas, path)
+        except OSError:
+            pass  # Read-only deployment - keep the in-memory copy
+    else:
+        return None
+
+    atlas['_path'] = path
+    _ATLAS = atlas
+    return atlas
+
+
+# =============================================================================
+# RARITY LOOKUP
+# =============================================================================
+
+def _share(count, total) -> float:
+    return round(float(count) / float(total) * 100, 3) if total else 0.0
+
+
+def chart_rarity(result: Dict, atlas: Optional[Dict] = None, exact: bool = True) -> Dict:
+    """
+    How common a chart is among every chart from the atlas years.
+
+    Args:
+        result: analyze_bazi result (needs birth_info, four_pillars,
+            day_master and profiles; five_structures / life_star are used
+            when present)
+        atlas: Atlas dict (defaults to load_atlas())
+        exact: Also count how often these exact Four Pillars recur
+
+    Returns dict with the share (percent of all charts) of the chart's
+    Day Master, strength category, dominant profile, dominant structure,
+    their combination, the strength percentile, the Gua share among the
+    same gender and, if exact, the number of (date, Chinese hour) slots
+    with the same Four Pillars.
+    """
+    if atlas is None:
+        atlas = load_atlas()
+
+    joint = atlas['joint']
+    total = int(atlas['total'])
+
+    dm = STEM_INDEX[result['day_master']['stem']]
+    category = [level.value for level in DM_STRENGTH_LEVELS].index(result['day_master']['strength_category'])
+    dominant_profile = result['profiles']['dominant']
+    profile = TEN_GOD_INDEX[dominant_profile]
+    structures = result.get('five_structures') or calculate_five_structures(result['profiles']['counts'])
+    structure = FIVE_STRUCTURE_ORDER.index(structures['dominant'])
+
+    strength_pct = result['day_master']['strength_pct']
+    strength_bin = int(round(strength_pct * 10))
+    strength_hist = atlas['strength_hist']
+
+    gender = result.get('birth_info', {}).get('gender', 'male').lower()
+    gua_number = result.get('life_star', {}).get('gua_number')
+    if gua_number is None:
+        gua_number = calculate_gua_number(date.fromisoformat(result['birth_info']['date']).year, gender)
+    gua_counts = atlas['gua'][GUA_GENDERS.index(gender) if gender in GUA_GENDERS else 0]
+
+    rarity = {
+        'years': (int(atlas['start_year']), int(atlas['end_year'])),
+        'total_charts': total,
+        'day_master': {
+            'value': HEAVENLY_STEMS[dm],
+            'share': _share(joint[dm].sum(), total)
+        },
+        'strength_category': {
+            'value': DM_STRENGTH_LEVELS[category].value,
+            'share': _share(joint[:, category].sum(), total)
+        },
+        'dominant_profile': {
+            'value': dominant_profile,
+            'name': PROFILE_NAMES.get(dominant_profile, dominant_profile),
+            'share': _share(joint[:, :, profile].sum(), total)
+        },
+        'dominant_structure': {
+            'value': FIVE_STRUCTURE_ORDER[structure],
+            'share': _share(joint[:, :, :, structure].sum(), total)
+        },
+        'combination': {
+            'count': int(joint[dm, category, profile, structure]),
+            'share': _share(joint[dm, category, profile, structure], total)
+        },
+        'strength_percentile': _share(strength_hist[:strength_bin + 1].sum(), total),
+        'gua': {
+            'value': gua_number,
+            'share': _share(gua_counts[gua_number - 1], gua_counts.sum())
+        },
+    }
+
+    if exact:
+        pillars = result['four_pillars']
+        matches = find_datetimes_for_pillars(
+            *[(pillars[name]['stem'], pillars[name]['branch']) for name in ('year', 'month', 'day', 'hour')],
+            start=int(atlas['start_year']),
+            end=int(atlas['end_year'])
+        )
+        # Hours 0 and 23 are the same Zi hour, so count (date, Chinese hour) slots
+        rarity['exact_matches'] = len({(dt.date(), (dt.hour + 1) // 2 % 12) for dt in matches})
+
+    return rarity
+
+
+# =============================================================================
+# BUILD FROM THE COMMAND LINE
+# =============================================================================
+
+if __name__ == "__main__":
+    import time
+
+    started = time.time()
+    atlas = build_atlas()
+    save_atlas(atlas)
+    print(f"Atlas {ATLAS_START_YEAR}-{ATLAS_END_YEAR}: {int(atlas['total']):,} charts "
+          f"in {time.time() - started:.1f}s -> {ATLAS_PATH}")
+    print("Strength categories:", {
+        level.value: int(atlas['joint'][:, i].sum()) for i, level in enumerate(DM_STRENGTH_LEVELS)
+    })
+    print("Dominant profiles:", {
+        god: int(atlas['joint'][:, :, i].sum()) for i, god in enumerate(TEN_GODS)
+    })
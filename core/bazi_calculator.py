@@ -17,11 +17,56 @@ Updated: 2026-01-03
 ===============================================================================
 """
 
-from datetime import date, datetime, timedelta
+import atexit
+import bisect
+import math
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, MINYEAR, MAXYEAR
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# =============================================================================
+# SHARED READ-ONLY TABLES
+# =============================================================================
+
+class FrozenDict(dict):
+    """
+    Read-only dict for explanation tables shared between results.
+    
+    Still a plain dict for JSON export, st.json and pickling; use .copy()
+    (which returns an ordinary dict) to get an editable version.
+    """
+    
+    __slots__ = ()
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only (use .copy() to edit)")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+
+
 # =============================================================================
 # CONSTANTS - HEAVENLY STEMS & EARTHLY BRANCHES
 # =============================================================================
@@ -231,6 +276,26 @@ THREE_HARMONY = {
     'Water': ['Shen', 'Zi', 'Chen'], # Monkey, Rat, Dragon
 }
 
+# Branch bitmasks: a set of branches is a 12-bit int (bit i = EARTHLY_BRANCHES[i])
+BRANCH_BITS = {branch: 1 << i for i, branch in enumerate(EARTHLY_BRANCHES)}
+
+# Partner masks per branch index: branch b clashes / combines / harmonizes with
+# any branch in mask M when BRANCH_BITS[b]'s *_MASKS[b] & M != 0
+CLASH_MASKS = [BRANCH_BITS[SIX_CLASHES[b]] for b in EARTHLY_BRANCHES]
+COMBINE_MASKS = [BRANCH_BITS[SIX_COMBINES[b][0]] for b in EARTHLY_BRANCHES]
+HARMONY_FRAME_MASKS = {
+    element: sum(BRANCH_BITS[b] for b in trio) for element, trio in THREE_HARMONY.items()
+}
+HARMONY_MASKS = [
+    next(mask for mask in HARMONY_FRAME_MASKS.values() if mask & bit) & ~bit
+    for bit in BRANCH_BITS.values()
+]
+
+# Interaction flags returned by get_interaction_flags
+INTERACTION_CLASH = 1
+INTERACTION_COMBINE = 2
+INTERACTION_HARMONY = 4
+
 # =============================================================================
 # SYMBOLIC STARS (神煞)
 # =============================================================================
@@ -449,17 +514,12 @@ SEASONAL_STRENGTH = {
 # ANNUAL PILLAR & ANALYSIS
 # =============================================================================
 
-def calculate_annual_pillar(year: int = 2026) -> Dict:
-    """
-    Calculate the Annual Pillar for a given year.
-    
-    2026 = 丙午 Bing Wu (Fire Horse)
-    """
-    # DEFENSIVE: Ensure year is an integer
-    if year is None:
-        year = 2026
-    year = int(year)
-    
+# Annual and monthly pillars depend only on the year, and their Ten Gods only
+# on (Day Master, year), so both are cached here and shared by every profile.
+# Public functions hand out fresh copies of the cached entries.
+
+@lru_cache(maxsize=1024)
+def _annual_pillar_entry(year: int) -> Dict:
     # Year stem cycle: starts from Jia (index 0) at year 4 (e.g., 1984, 1994, 2004)
     stem_idx = (year - 4) % 10
     stem = HEAVENLY_STEMS[stem_idx]
@@ -489,22 +549,72 @@ def calculate_annual_pillar(year: int = 2026) -> Dict:
     }
 
 
+@lru_cache(maxsize=1024)
+def _annual_gods(day_master: str, stem: str, branch: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    # Keyed by the year's pillar, so one 60-year cycle covers every year
+    return (
+        get_ten_god(day_master, stem),
+        tuple((hs, get_ten_god(day_master, hs)) for hs in HIDDEN_STEMS.get(branch, []))
+    )
+
+
+def annual_ten_god_table(start_year: int, end_year: int) -> Dict[str, List[Dict]]:
+    """
+    Annual Ten Gods for all 10 Day Masters over a range of years.
+    
+    Builds the 10 x N table once through the year caches, so batch reports
+    only need lookups: table[day_master][year - start_year].
+    
+    Returns:
+        Dict of day master -> list of {'year', 'chinese', 'stem_god', 'hidden_gods'}
+    """
+    table = {}
+    for dm in HEAVENLY_STEMS:
+        rows = []
+        for year in range(int(start_year), int(end_year) + 1):
+            pillar = _annual_pillar_entry(year)
+            stem_god, hidden = _annual_gods(dm, pillar['stem'], pillar['branch'])
+            rows.append({
+                'year': year,
+                'chinese': pillar['chinese'],
+                'stem_god': stem_god,
+                'hidden_gods': [god for _, god in hidden]
+            })
+        table[dm] = rows
+    return table
+
+
+def clear_annual_caches():
+    """Drop the cached annual and monthly pillar tables."""
+    _annual_pillar_entry.cache_clear()
+    _annual_gods.cache_clear()
+    _annual_theme.cache_clear()
+    _monthly_entries.cache_clear()
+
+
+def calculate_annual_pillar(year: int = 2026) -> Dict:
+    """
+    Calculate the Annual Pillar for a given year.
+    
+    2026 = 丙午 Bing Wu (Fire Horse)
+    """
+    # DEFENSIVE: Ensure year is an integer
+    if year is None:
+        year = 2026
+    year = int(year)
+    
+    return dict(_annual_pillar_entry(year))
+
+
 def calculate_annual_ten_gods(day_master: str, annual_pillar: Dict) -> Dict[str, str]:
     """
     Calculate Ten Gods for the annual pillar relative to Day Master.
     """
-    stem_god = get_ten_god(day_master, annual_pillar['stem'])
-    
-    hidden_gods = []
-    for hs in annual_pillar['hidden_stems']:
-        hidden_gods.append({
-            'stem': hs,
-            'god': get_ten_god(day_master, hs)
-        })
+    stem_god, hidden = _annual_gods(day_master, annual_pillar['stem'], annual_pillar['branch'])
     
     return {
         'stem_god': stem_god,
-        'hidden_gods': hidden_gods
+        'hidden_gods': [{'stem': hs, 'god': god} for hs, god in hidden]
     }
 
 
@@ -515,11 +625,8 @@ def calculate_annual_profile_influence(natal_profiles: Dict[str, int], annual_pi
     
     Joey Yap shows both Natal % and Annual % side by side.
     """
-    # Get the annual stem's ten god
-    annual_stem_god = get_ten_god(day_master, annual_pillar['stem'])
-    
-    # Get hidden stems' ten gods
-    annual_hidden_gods = [get_ten_god(day_master, hs) for hs in annual_pillar['hidden_stems']]
+    # Get the annual stem's and hidden stems' ten gods
+    annual_stem_god, hidden = _annual_gods(day_master, annual_pillar['stem'], annual_pillar['branch'])
     
     # Start with natal counts
     annual_counts = natal_profiles.copy()
@@ -530,23 +637,18 @@ def calculate_annual_profile_influence(natal_profiles: Dict[str, int], annual_pi
         annual_counts[annual_stem_god] = annual_counts.get(annual_stem_god, 0) + 2
     
     # Hidden stems add weight
-    for god in annual_hidden_gods:
+    for _, god in hidden:
         if god in annual_counts:
             annual_counts[god] = annual_counts.get(god, 0) + 1
     
     # Calculate percentages using Joey Yap position-weighted method
     # (simplified version - adds annual pillar influence to natal)
-    ten_gods = [
-        'Direct Officer', 'Indirect Resource', 'Seven Killings', 'Direct Resource',
-        'Friend', 'Eating God', 'Rob Wealth', 'Direct Wealth', 'Indirect Wealth', 'Hurting Officer'
-    ]
-    
     max_count = max(annual_counts.values()) if annual_counts.values() else 1
     if max_count == 0:
         max_count = 1
     
     percentages = {}
-    for god in ten_gods:
+    for god in JOEY_YAP_PROFILE_ORDER:
         count = annual_counts.get(god, 0)
         if count > 0:
             pct = (count / max_count) * 100
@@ -855,7 +957,7 @@ HIDDEN_STEM_ROLES = {
     2: {'name': 'Residual Qi', 'chinese': '余气', 'description': 'The residual or leftover energy from the previous season. Subtle but present influence.'}
 }
 
-def explain_hidden_stems(day_master: str, branch: str, hidden_stems: List[str]) -> List[Dict]:
+def explain_hidden_stems(day_master: str, branch: str, hidden_stems: List[str]) -> Tuple[Dict, ...]:
     """
     Generate detailed explanations for hidden stems in a branch.
     
@@ -864,25 +966,35 @@ def explain_hidden_stems(day_master: str, branch: str, hidden_stems: List[str])
     - Its role (Main Qi, Middle Qi, Residual Qi)
     - What Ten God it represents relative to Day Master
     - What this means practically
+    
+    The explanations only depend on the Day Master and the stems, so they
+    are built once and shared (read-only FrozenDicts).
     """
+    return _hidden_stem_explanations(day_master, tuple(hidden_stems))
+
+
+@lru_cache(maxsize=256)
+def _hidden_stem_explanations(day_master: str, hidden_stems: Tuple[str, ...]) -> Tuple[Dict, ...]:
     explanations = []
+    gods = TEN_GOD_MATRIX[STEM_INDEX[day_master]]
     
     for i, stem in enumerate(hidden_stems):
+        stem_idx = STEM_INDEX[stem]
         stem_element = STEM_ELEMENTS[stem]
         stem_polarity = STEM_POLARITY[stem]
-        stem_cn = HEAVENLY_STEMS_CN[HEAVENLY_STEMS.index(stem)]
+        stem_cn = HEAVENLY_STEMS_CN[stem_idx]
         
         # Get Ten God relationship
-        ten_god = get_ten_god(day_master, stem)
+        ten_god = gods[stem_idx]
         ten_god_cn = TEN_GODS_CN.get(ten_god, '')
         
         # Get role based on position
         role = HIDDEN_STEM_ROLES.get(i, HIDDEN_STEM_ROLES[2])
         
         # Generate practical meaning based on Ten God
-        meaning = get_ten_god_meaning(ten_god)
+        meaning = FrozenDict(get_ten_god_meaning(ten_god))
         
-        explanations.append({
+        explanations.append(FrozenDict({
             'stem': stem,
             'stem_cn': stem_cn,
             'element': stem_element,
@@ -894,9 +1006,9 @@ def explain_hidden_stems(day_master: str, branch: str, hidden_stems: List[str])
             'ten_god_cn': ten_god_cn,
             'meaning': meaning,
             'position': i
-        })
+        }))
     
-    return explanations
+    return tuple(explanations)
 
 
 def get_ten_god_meaning(ten_god: str) -> Dict:
@@ -1007,51 +1119,57 @@ def get_ten_god_meaning(ten_god: str) -> Dict:
     })
 
 
-def get_pillar_hidden_stem_analysis(pillars: Dict, day_master: str) -> Dict[str, List[Dict]]:
+PILLAR_MEANINGS = {
+    'year': FrozenDict({
+        'name': 'Year Pillar',
+        'chinese': '年柱',
+        'represents': 'Ancestors, grandparents, early childhood (0-16)',
+        'influence': 'Social environment, family background, inherited traits'
+    }),
+    'month': FrozenDict({
+        'name': 'Month Pillar',
+        'chinese': '月柱',
+        'represents': 'Parents, young adulthood (17-32)',
+        'influence': 'Career foundation, parental influence, education period'
+    }),
+    'day': FrozenDict({
+        'name': 'Day Pillar',
+        'chinese': '日柱',
+        'represents': 'Self and spouse, middle age (33-48)',
+        'influence': 'Marriage, personal identity, core self'
+    }),
+    'hour': FrozenDict({
+        'name': 'Hour Pillar',
+        'chinese': '时柱',
+        'represents': 'Children, later life (49+)',
+        'influence': 'Children, legacy, later achievements, subconscious'
+    })
+}
+
+
+def get_pillar_hidden_stem_analysis(pillars: Dict, day_master: str) -> Dict[str, Dict]:
     """
     Get complete hidden stem analysis for all four pillars.
-    """
-    analysis = {}
     
-    pillar_meanings = {
-        'year': {
-            'name': 'Year Pillar',
-            'chinese': '年柱',
-            'represents': 'Ancestors, grandparents, early childhood (0-16)',
-            'influence': 'Social environment, family background, inherited traits'
-        },
-        'month': {
-            'name': 'Month Pillar',
-            'chinese': '月柱',
-            'represents': 'Parents, young adulthood (17-32)',
-            'influence': 'Career foundation, parental influence, education period'
-        },
-        'day': {
-            'name': 'Day Pillar',
-            'chinese': '日柱',
-            'represents': 'Self and spouse, middle age (33-48)',
-            'influence': 'Marriage, personal identity, core self'
-        },
-        'hour': {
-            'name': 'Hour Pillar',
-            'chinese': '时柱',
-            'represents': 'Children, later life (49+)',
-            'influence': 'Children, legacy, later achievements, subconscious'
-        }
+    Each pillar entry depends only on (Day Master, pillar, branch) and is
+    a shared read-only FrozenDict.
+    """
+    return {
+        name: _hidden_stem_pillar_analysis(day_master, name, pillar.branch)
+        for name, pillar in pillars.items()
     }
-    
-    for name, pillar in pillars.items():
-        hidden_explanations = explain_hidden_stems(day_master, pillar.branch, pillar.hidden_stems)
-        
-        analysis[name] = {
-            'pillar_info': pillar_meanings[name],
-            'branch': pillar.branch,
-            'branch_cn': EARTHLY_BRANCHES_CN[EARTHLY_BRANCHES.index(pillar.branch)],
-            'animal': BRANCH_ANIMALS[EARTHLY_BRANCHES.index(pillar.branch)],
-            'hidden_stems': hidden_explanations
-        }
-    
-    return analysis
+
+
+@lru_cache(maxsize=512)
+def _hidden_stem_pillar_analysis(day_master: str, name: str, branch: str) -> Dict:
+    branch_idx = EARTHLY_BRANCHES.index(branch)
+    return FrozenDict({
+        'pillar_info': PILLAR_MEANINGS[name],
+        'branch': branch,
+        'branch_cn': EARTHLY_BRANCHES_CN[branch_idx],
+        'animal': BRANCH_ANIMALS[branch_idx],
+        'hidden_stems': explain_hidden_stems(day_master, branch, HIDDEN_STEMS.get(branch, []))
+    })
 
 
 # =============================================================================
@@ -1073,10 +1191,13 @@ TWELVE_STAGES_INFO = {
     '養': {'pinyin': 'Yang', 'english': 'Nourishing', 'meaning': 'Nurturing, preparation for birth, incubation', 'quality': 'Favorable'}
 }
 
-def get_twelve_stages_wheel(day_master: str) -> List[Dict]:
+@lru_cache(maxsize=None)
+def get_twelve_stages_wheel(day_master: str) -> Tuple[Dict, ...]:
     """
     Get the 12 Life Stages wheel starting from Day Master's Growth position.
     Returns stages mapped to all 12 branches in order.
+    
+    Built once per Day Master; the stages are shared read-only FrozenDicts.
     """
     # Starting branch for Growth (長生) for each Day Master
     dm_element = STEM_ELEMENTS[day_master]
@@ -1100,7 +1221,7 @@ def get_twelve_stages_wheel(day_master: str) -> List[Dict]:
         
         stage_info = TWELVE_STAGES_INFO.get(stage_cn, {})
         
-        wheel.append({
+        wheel.append(FrozenDict({
             'stage_cn': stage_cn,
             'stage_pinyin': stage_pinyin,
             'stage_english': stage_english,
@@ -1110,9 +1231,9 @@ def get_twelve_stages_wheel(day_master: str) -> List[Dict]:
             'branch_cn': branch_cn,
             'animal': animal,
             'position': i + 1
-        })
+        }))
     
-    return wheel
+    return tuple(wheel)
 
 
 # =============================================================================
@@ -1196,6 +1317,22 @@ def calculate_six_aspects(profile_counts: Dict[str, int], gender: str = 'male')
 # =============================================================================
 
 
+@lru_cache(maxsize=4096)
+def _annual_theme(day_master: str, year: int) -> Tuple[Tuple[Tuple[str, int], ...], str]:
+    """Annual profile weights (stem 2, hidden stems 1 each) and the strongest god."""
+    pillar = _annual_pillar_entry(year)
+    annual_stem_god, hidden = _annual_gods(day_master, pillar['stem'], pillar['branch'])
+    
+    annual_profiles = {god: 0 for god in TEN_GODS_CN}
+    annual_profiles[annual_stem_god] += 2
+    for _, god in hidden:
+        annual_profiles[god] += 1
+    
+    # Determine annual theme based on strongest annual gods
+    annual_theme = max(annual_profiles.items(), key=lambda x: x[1])[0]
+    return tuple(annual_profiles.items()), annual_theme
+
+
 def calculate_annual_analysis(day_master: str = 'Jia', natal_profiles: Dict[str, int] = None, year: int = 2026) -> Dict:
     """
     Calculate annual influence comparing natal chart to annual pillar.
@@ -1212,42 +1349,24 @@ def calculate_annual_analysis(day_master: str = 'Jia', natal_profiles: Dict[str,
         natal_profiles = {}
     
     annual_pillar = calculate_annual_pillar(year)
-    
-    # Calculate Ten Gods for annual stem and hidden stems
-    annual_stem_god = get_ten_god(day_master, annual_pillar['stem'])
-    annual_hidden_gods = [get_ten_god(day_master, hs) for hs in annual_pillar['hidden_stems']]
-    
-    # Calculate annual profile influence
-    annual_profiles = {}
-    for god in TEN_GODS_CN.keys():
-        annual_profiles[god] = 0
-    
-    # Add annual stem (weight 2)
-    annual_profiles[annual_stem_god] = annual_profiles.get(annual_stem_god, 0) + 2
-    
-    # Add hidden stems (weight 1 each)
-    for god in annual_hidden_gods:
-        annual_profiles[god] = annual_profiles.get(god, 0) + 1
+    annual_stem_god, hidden = _annual_gods(day_master, annual_pillar['stem'], annual_pillar['branch'])
+    annual_profiles, annual_theme = _annual_theme(day_master, year)
     
     # Combine natal and annual for comparison
     combined_profiles = {}
-    for god in TEN_GODS_CN.keys():
+    for god, annual_score in annual_profiles:
         natal_score = natal_profiles.get(god, 0)
-        annual_score = annual_profiles.get(god, 0)
         combined_profiles[god] = {
             'natal': natal_score,
             'annual': annual_score,
             'combined': natal_score + annual_score
         }
     
-    # Determine annual theme based on strongest annual gods
-    annual_theme = max(annual_profiles.items(), key=lambda x: x[1])[0] if annual_profiles else 'Friend'
-    
     return {
         'year': year,
         'pillar': annual_pillar,
         'stem_god': annual_stem_god,
-        'hidden_gods': annual_hidden_gods,
+        'hidden_gods': [god for _, god in hidden],
         'profiles': combined_profiles,
         'theme': annual_theme,
         'theme_name': PROFILE_NAMES.get(annual_theme, annual_theme)
@@ -1269,62 +1388,17 @@ MONTH_STEM_START = {
 
 MONTH_BRANCHES = ['Yin', 'Mao', 'Chen', 'Si', 'Wu', 'Wei', 'Shen', 'You', 'Xu', 'Hai', 'Zi', 'Chou']
 
-def calculate_monthly_influence(arg1 = None, arg2 = None, day_master: str = None, year: int = None) -> List[Dict]:
-    """
-    Calculate monthly pillars and their influence for a given year.
-    
-    Accepts arguments in ANY order:
-    - calculate_monthly_influence(day_master, year)
-    - calculate_monthly_influence(year, day_master)
-    - calculate_monthly_influence(day_master=..., year=...)
-    """
-    # SMART ARGUMENT DETECTION
-    # Determine which argument is which based on type/content
-    
-    detected_year = None
-    detected_dm = None
-    
-    # Check arg1
-    if arg1 is not None:
-        if isinstance(arg1, int) or (isinstance(arg1, str) and arg1.isdigit()):
-            detected_year = int(arg1)
-        elif isinstance(arg1, str) and arg1 in HEAVENLY_STEMS:
-            detected_dm = arg1
-    
-    # Check arg2
-    if arg2 is not None:
-        if isinstance(arg2, int) or (isinstance(arg2, str) and arg2.isdigit()):
-            detected_year = int(arg2)
-        elif isinstance(arg2, str) and arg2 in HEAVENLY_STEMS:
-            detected_dm = arg2
-    
-    # Check named parameters
-    if year is not None:
-        detected_year = int(year)
-    if day_master is not None:
-        detected_dm = day_master
-    
-    # Apply defaults if still None
-    if detected_year is None:
-        detected_year = 2026
-    if detected_dm is None:
-        detected_dm = 'Jia'
-    
-    # Validate
-    if detected_dm not in HEAVENLY_STEMS:
-        detected_dm = 'Jia'
-    
-    year = detected_year
-    day_master = detected_dm
-    
+@lru_cache(maxsize=4096)
+def _monthly_entries(day_master: str, year: int) -> Tuple[Dict, ...]:
     # Get year stem to determine month stem cycle
-    annual_pillar = calculate_annual_pillar(year)
+    annual_pillar = _annual_pillar_entry(year)
     year_stem = annual_pillar['stem']
     
     # Get starting month stem
     start_stem = MONTH_STEM_START.get(year_stem, 'Jia')
     start_stem_idx = HEAVENLY_STEMS.index(start_stem)
     
+    gods = TEN_GOD_MATRIX[STEM_INDEX[day_master]]
     months = []
     month_names = ['Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'Jan']
     
@@ -1341,8 +1415,8 @@ def calculate_monthly_influence(arg1 = None, arg2 = None, day_master: str = None
         hidden = HIDDEN_STEMS.get(branch, [])
         
         # Calculate Ten Gods
-        stem_god = get_ten_god(day_master, stem)
-        hidden_gods = [(hs, get_ten_god(day_master, hs)) for hs in hidden]
+        stem_god = gods[stem_idx]
+        hidden_gods = [(hs, gods[STEM_INDEX[hs]]) for hs in hidden]
         
         # Get life stage for this month
         stage = get_life_stage(day_master, branch)
@@ -1369,7 +1443,61 @@ def calculate_monthly_influence(arg1 = None, arg2 = None, day_master: str = None
             }
         })
     
-    return months
+    return tuple(months)
+
+
+def calculate_monthly_influence(arg1 = None, arg2 = None, day_master: str = None, year: int = None) -> List[Dict]:
+    """
+    Calculate monthly pillars and their influence for a given year.
+    
+    Accepts arguments in ANY order:
+    - calculate_monthly_influence(day_master, year)
+    - calculate_monthly_influence(year, day_master)
+    - calculate_monthly_influence(day_master=..., year=...)
+    """
+    # SMART ARGUMENT DETECTION
+    # Determine which argument is which based on type/content
+    
+    detected_year = None
+    detected_dm = None
+    
+    # Check arg1
+    if arg1 is not None:
+        if isinstance(arg1, int) or (isinstance(arg1, str) and arg1.isdigit()):
+            detected_year = int(arg1)
+        elif isinstance(arg1, str) and arg1 in HEAVENLY_STEMS:
+            detected_dm = arg1
+    
+    # Check arg2
+    if arg2 is not None:
+        if isinstance(arg2, int) or (isinstance(arg2, str) and arg2.isdigit()):
+            detected_year = int(arg2)
+        elif isinstance(arg2, str) and arg2 in HEAVENLY_STEMS:
+            detected_dm = arg2
+    
+    # Check named parameters
+    if year is not None:
+        detected_year = int(year)
+    if day_master is not None:
+        detected_dm = day_master
+    
+    # Apply defaults if still None
+    if detected_year is None:
+        detected_year = 2026
+    if detected_dm is None:
+        detected_dm = 'Jia'
+    
+    # Validate
+    if detected_dm not in HEAVENLY_STEMS:
+        detected_dm = 'Jia'
+    
+    year = detected_year
+    day_master = detected_dm
+    
+    return [
+        dict(month, hidden_stems=list(month['hidden_stems']), life_stage=dict(month['life_stage']))
+        for month in _monthly_entries(day_master, year)
+    ]
 
 
 # =============================================================================
@@ -1402,6 +1530,113 @@ def get_current_luck_pillar(luck_pillars: List[Dict], birth_year: int, current_y
     }
 
 
+# =============================================================================
+# LIFE TIMELINE (大运 / 流年 / 流月)
+# =============================================================================
+
+def _life_stage_dict(stem: str, branch: str) -> Dict[str, str]:
+    stage = get_life_stage(stem, branch)
+    return {'chinese': stage[0], 'pinyin': stage[1], 'english': stage[2]}
+
+
+def iter_life_timeline(
+    profile: Dict,
+    start_year: int = None,
+    end_year: int = None,
+    granularity: str = 'month'
+):
+    """
+    Stream luck, annual and monthly pillars over a lifetime.
+    
+    Args:
+        profile: analyze_bazi() result. Needs 'birth_info'; 'day_master'
+            and 'luck_pillars' are calculated if missing.
+        start_year: First year (default: birth year)
+        end_year: Last year, inclusive (default: birth year + 100)
+        granularity: 'month' (12 BaZi months per year, Feb-Jan) or 'year'
+    
+    Yields one dict per year or month with 'year', 'age', 'luck_pillar'
+    (None before the first luck pillar starts), 'annual_pillar' and, for
+    monthly granularity, 'month_num', 'month_name', 'calendar_year' and
+    'month_pillar'. Each pillar carries its Ten God ('stem_god'), the
+    Day Master's life stage in its branch and the natal pillars its
+    branch clashes / combines / harmonizes with ('interactions').
+    
+    Only one year is held in memory at a time; the luck and annual
+    pillar dicts are shared by that year's months, so treat them as
+    read-only.
+    """
+    if granularity not in ('month', 'year'):
+        raise ValueError(f"granularity must be 'month' or 'year', not {granularity!r}")
+    
+    birth_info = profile['birth_info']
+    birth_date = date.fromisoformat(birth_info['date'])
+    missing = [name for name in ('four_pillars', 'day_master', 'luck_pillars') if name not in profile]
+    if missing:
+        profile = {
+            **profile,
+            **analyze_bazi(birth_date, birth_info['hour'], birth_info['gender'], sections=missing)
+        }
+    
+    day_master = profile['day_master']['stem']
+    gods = TEN_GOD_MATRIX[STEM_INDEX[day_master]]
+    luck_pillars = profile['luck_pillars']['pillars']
+    natal_pillars = {
+        name: Pillar(p['stem'], p['branch'], p['name'])
+        for name, p in profile['four_pillars'].items()
+    }
+    interactions = {
+        branch: detect_external_interactions(natal_pillars, branch) for branch in EARTHLY_BRANCHES
+    }
+    
+    if start_year is None:
+        start_year = birth_date.year
+    if end_year is None:
+        end_year = birth_date.year + 100
+    
+    luck_entries = {}
+    for year in range(start_year, end_year + 1):
+        current = get_current_luck_pillar(luck_pillars, birth_date.year, year)
+        index = current['pillar_index']
+        if index not in luck_entries:
+            lp = current['pillar']
+            luck_entries[index] = None if lp is None else {
+                **lp,
+                'index': index,
+                'stem_god': gods[STEM_INDEX[lp['stem']]],
+                'life_stage': _life_stage_dict(day_master, lp['branch']),
+                'interactions': interactions[lp['branch']]
+            }
+        
+        annual_pillar = calculate_annual_pillar(year)
+        annual_entry = {
+            **annual_pillar,
+            **calculate_annual_ten_gods(day_master, annual_pillar),
+            'life_stage': _life_stage_dict(day_master, annual_pillar['branch']),
+            'interactions': interactions[annual_pillar['branch']]
+        }
+        
+        entry = {
+            'year': year,
+            'age': current['current_age'],
+            'luck_pillar': luck_entries[index],
+            'annual_pillar': annual_entry,
+        }
+        
+        if granularity == 'year':
+            yield entry
+            continue
+        
+        for month in calculate_monthly_influence(day_master=day_master, year=year):
+            yield {
+                **entry,
+                'month_num': month['month_num'],
+                'month_name': month['month_name'],
+                'calendar_year': month['year'],
+                'month_pillar': {**month, 'interactions': interactions[month['branch']]},
+            }
+
+
 # =============================================================================
 # FIVE STRUCTURES (五型格)
 # =============================================================================
@@ -1485,63 +1720,95 @@ class DMStrength(Enum):
 # DATA CLASSES
 # =============================================================================
 
-@dataclass
 class Pillar:
-    """Represents a single BaZi pillar"""
-    stem: str
-    branch: str
-    name: str = ""
+    """
+    Represents a single BaZi pillar.
     
-    def __post_init__(self):
-        self._stem_idx = HEAVENLY_STEMS.index(self.stem) if self.stem in HEAVENLY_STEMS else -1
-        self._branch_idx = EARTHLY_BRANCHES.index(self.branch) if self.branch in EARTHLY_BRANCHES else -1
+    Pillars are interned: Pillar('Geng', 'Shen', 'Day') always returns the
+    same immutable instance, with every derived attribute and the
+    serialized dict worked out once when that instance is first created.
+    There are only 60 stem-branch combinations, so luck, annual and monthly
+    timelines share a small pool instead of building new objects.
+    """
     
-    @property
-    def stem_cn(self) -> str:
-        return HEAVENLY_STEMS_CN[self._stem_idx] if self._stem_idx >= 0 else ""
+    __slots__ = (
+        'stem', 'branch', 'name', '_stem_idx', '_branch_idx',
+        'stem_cn', 'branch_cn', 'chinese', 'element', 'polarity', 'animal',
+        'hidden_stems', 'branch_element', '_dict',
+    )
     
-    @property
-    def branch_cn(self) -> str:
-        return EARTHLY_BRANCHES_CN[self._branch_idx] if self._branch_idx >= 0 else ""
+    _pool: Dict[Tuple[str, str, str], 'Pillar'] = {}
     
-    @property
-    def chinese(self) -> str:
-        return f"{self.stem_cn}{self.branch_cn}"
+    def __new__(cls, stem: str, branch: str, name: str = ""):
+        key = (stem, branch, name)
+        pillar = cls._pool.get(key)
+        if pillar is not None:
+            return pillar
+        
+        pillar = object.__new__(cls)
+        stem_idx = HEAVENLY_STEMS.index(stem) if stem in HEAVENLY_STEMS else -1
+        branch_idx = EARTHLY_BRANCHES.index(branch) if branch in EARTHLY_BRANCHES else -1
+        stem_cn = HEAVENLY_STEMS_CN[stem_idx] if stem_idx >= 0 else ""
+        branch_cn = EARTHLY_BRANCHES_CN[branch_idx] if branch_idx >= 0 else ""
+        
+        values = {
+            'stem': stem,
+            'branch': branch,
+            'name': name,
+            '_stem_idx': stem_idx,
+            '_branch_idx': branch_idx,
+            'stem_cn': stem_cn,
+            'branch_cn': branch_cn,
+            'chinese': f"{stem_cn}{branch_cn}",
+            'element': STEM_ELEMENTS.get(stem, ""),
+            'polarity': STEM_POLARITY.get(stem, ""),
+            'animal': BRANCH_ANIMALS[branch_idx] if branch_idx >= 0 else "",
+            'hidden_stems': HIDDEN_STEMS.get(branch, []),
+            'branch_element': BRANCH_ELEMENTS.get(branch, ""),
+        }
+        for attr, value in values.items():
+            object.__setattr__(pillar, attr, value)
+        
+        object.__setattr__(pillar, '_dict', {
+            'name': name,
+            'stem': stem,
+            'branch': branch,
+            'stem_cn': stem_cn,
+            'branch_cn': branch_cn,
+            'chinese': values['chinese'],
+            'element': values['element'],
+            'polarity': values['polarity'],
+            'animal': values['animal'],
+            'hidden_stems': values['hidden_stems'],
+            'branch_element': values['branch_element'],
+        })
+        
+        return cls._pool.setdefault(key, pillar)
     
-    @property
-    def element(self) -> str:
-        return STEM_ELEMENTS.get(self.stem, "")
+    def __setattr__(self, attr, value):
+        raise AttributeError(f"Pillar is immutable (cannot set '{attr}')")
     
-    @property
-    def polarity(self) -> str:
-        return STEM_POLARITY.get(self.stem, "")
+    def __delattr__(self, attr):
+        raise AttributeError(f"Pillar is immutable (cannot delete '{attr}')")
     
-    @property
-    def animal(self) -> str:
-        return BRANCH_ANIMALS[self._branch_idx] if self._branch_idx >= 0 else ""
+    def __reduce__(self):
+        # Unpickling and copying go back through the pool
+        return (Pillar, (self.stem, self.branch, self.name))
     
-    @property
-    def hidden_stems(self) -> List[str]:
-        return HIDDEN_STEMS.get(self.branch, [])
+    def __eq__(self, other):
+        if not isinstance(other, Pillar):
+            return NotImplemented
+        return (self.stem, self.branch, self.name) == (other.stem, other.branch, other.name)
     
-    @property
-    def branch_element(self) -> str:
-        return BRANCH_ELEMENTS.get(self.branch, "")
+    def __hash__(self):
+        return hash((self.stem, self.branch, self.name))
+    
+    def __repr__(self):
+        return f"Pillar(stem={self.stem!r}, branch={self.branch!r}, name={self.name!r})"
     
     def to_dict(self) -> Dict:
-        return {
-            'name': self.name,
-            'stem': self.stem,
-            'branch': self.branch,
-            'stem_cn': self.stem_cn,
-            'branch_cn': self.branch_cn,
-            'chinese': self.chinese,
-            'element': self.element,
-            'polarity': self.polarity,
-            'animal': self.animal,
-            'hidden_stems': self.hidden_stems,
-            'branch_element': self.branch_element,
-        }
+        # Shallow copy so callers can't edit the shared template
+        return self._dict.copy()
 
 @dataclass
 class LuckPillar:
@@ -1615,7 +1882,7 @@ def calc_month_pillar(year: int, month: int, day: int) -> Pillar:
     
     # Get year stem (considering Li Chun boundary)
     year_pillar = calc_year_pillar(year, month, day)
-    year_stem_idx = HEAVENLY_STEMS.index(year_pillar.stem)
+    year_stem_idx = year_pillar._stem_idx
     
     # 5-Tiger Formula
     first_month_stem_idx = (year_stem_idx * 2 + 2) % 10
@@ -1692,9 +1959,10 @@ def pillars_to_dict(pillars: Dict[str, Pillar]) -> Dict[str, Dict]:
 # TEN GODS CALCULATION
 # =============================================================================
 
-def get_ten_god(day_master: str, other_stem: str) -> str:
+def _derive_ten_god(day_master: str, other_stem: str) -> str:
     """
-    Calculate the Ten God relationship between Day Master and another stem.
+    Work out the Ten God relationship from the element cycles.
+    Used once at import to fill TEN_GOD_MATRIX.
     """
     dm_element = STEM_ELEMENTS[day_master]
     dm_polarity = STEM_POLARITY[day_master]
@@ -1726,6 +1994,57 @@ def get_ten_god(day_master: str, other_stem: str) -> str:
     return 'Unknown'
 
 
+# Ten Gods in code order: code = relationship * 2 + (0 same polarity / 1 opposite)
+# where relationship is Companion, Output, Wealth, Power, Resource
+TEN_GODS = list(TEN_GODS_CN.keys())
+TEN_GOD_INDEX = {god: i for i, god in enumerate(TEN_GODS)}
+STEM_INDEX = {stem: i for i, stem in enumerate(HEAVENLY_STEMS)}
+BRANCH_INDEX = {branch: i for i, branch in enumerate(EARTHLY_BRANCHES)}
+
+# TEN_GOD_MATRIX[day_master_idx][other_stem_idx] -> Ten God name
+TEN_GOD_MATRIX = tuple(
+    tuple(_derive_ten_god(dm, other) for other in HEAVENLY_STEMS)
+    for dm in HEAVENLY_STEMS
+)
+
+# Same table as small integer codes (index into TEN_GODS)
+TEN_GOD_CODES = tuple(
+    tuple(TEN_GOD_INDEX[god] for god in row)
+    for row in TEN_GOD_MATRIX
+)
+
+# NumPy form for batch lookups: TEN_GOD_CODE_ARRAY[dm_idx_array, stem_idx_array]
+TEN_GOD_CODE_ARRAY = np.array(TEN_GOD_CODES, dtype=np.int8) if NUMPY_AVAILABLE else None
+
+
+def get_ten_god(day_master: str, other_stem: str) -> str:
+    """
+    Calculate the Ten God relationship between Day Master and another stem.
+    """
+    return TEN_GOD_MATRIX[STEM_INDEX[day_master]][STEM_INDEX[other_stem]]
+
+
+def get_ten_god_code(day_master: str, other_stem: str) -> int:
+    """Ten God relationship as an index into TEN_GODS."""
+    return TEN_GOD_CODES[STEM_INDEX[day_master]][STEM_INDEX[other_stem]]
+
+
+def get_ten_god_codes(day_master_idx, stem_idx):
+    """
+    Vectorized Ten God lookup.
+    
+    Args:
+        day_master_idx: Array-like of Day Master stem indexes (0-9)
+        stem_idx: Array-like of other stem indexes, broadcastable against day_master_idx
+    
+    Returns:
+        int8 NumPy array of Ten God codes (index into TEN_GODS)
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("get_ten_god_codes requires numpy")
+    return TEN_GOD_CODE_ARRAY[np.asarray(day_master_idx), np.asarray(stem_idx)]
+
+
 def calculate_ten_profiles(pillars: Dict[str, Pillar]) -> Dict[str, int]:
     """
     Calculate the distribution of Ten Gods in the chart.
@@ -1740,18 +2059,18 @@ def calculate_ten_profiles(pillars: Dict[str, Pillar]) -> Dict[str, int]:
         'Indirect Resource': 0, 'Direct Resource': 0,
     }
     
+    gods = TEN_GOD_MATRIX[STEM_INDEX[day_master]]
+    
     # Count visible stems (excluding Day Master)
     for name, pillar in pillars.items():
         if name == 'day':
             continue
-        god = get_ten_god(day_master, pillar.stem)
-        profile_counts[god] += 1
+        profile_counts[gods[pillar._stem_idx]] += 1
     
     # Count hidden stems in all branches
     for pillar in pillars.values():
         for hidden in pillar.hidden_stems:
-            god = get_ten_god(day_master, hidden)
-            profile_counts[god] += 1
+            profile_counts[gods[STEM_INDEX[hidden]]] += 1
     
     return profile_counts
 
@@ -1826,6 +2145,25 @@ LIFE_STAGE_PERCENTAGES = {
 }
 
 
+# Display order of the Ten Profiles in Joey Yap's charts
+JOEY_YAP_PROFILE_ORDER = [
+    'Direct Officer', 'Indirect Resource', 'Seven Killings', 'Direct Resource',
+    'Friend', 'Eating God', 'Rob Wealth', 'Direct Wealth', 'Indirect Wealth', 'Hurting Officer'
+]
+
+
+# Position weights - Joey Yap heavily weights Year/Month hidden stems
+JOEY_YAP_VISIBLE_WEIGHTS = {'year': 0.15, 'month': 0.15, 'hour': 0.15}
+
+# Hidden stem weights per pillar: (main, secondary, residual)
+JOEY_YAP_HIDDEN_WEIGHTS = {
+    'year': (0.25, 0.12, 0.06),
+    'month': (0.25, 0.12, 0.06),
+    'day': (0.10, 0.05, 0.03),
+    'hour': (0.12, 0.06, 0.03),
+}
+
+
 def calculate_profile_percentages_joey_yap(pillars: Dict[str, Pillar]) -> Dict[str, float]:
     """
     Calculate profile percentages using Joey Yap's methodology.
@@ -1841,49 +2179,19 @@ def calculate_profile_percentages_joey_yap(pillars: Dict[str, Pillar]) -> Dict[s
     day_master = pillars['day'].stem
     
     # Initialize scores for each Ten God
-    ten_gods = [
-        'Direct Officer', 'Indirect Resource', 'Seven Killings', 'Direct Resource',
-        'Friend', 'Eating God', 'Rob Wealth', 'Direct Wealth', 'Indirect Wealth', 'Hurting Officer'
-    ]
-    scores = {god: 0.0 for god in ten_gods}
-    
-    # Position weights - Joey Yap heavily weights Year/Month hidden stems
-    position_weights = {
-        'year_visible': 0.15,
-        'month_visible': 0.15,
-        'hour_visible': 0.15,
-        'year_hidden_main': 0.25,
-        'year_hidden_secondary': 0.12,
-        'year_hidden_residual': 0.06,
-        'month_hidden_main': 0.25,
-        'month_hidden_secondary': 0.12,
-        'month_hidden_residual': 0.06,
-        'day_hidden_main': 0.10,
-        'day_hidden_secondary': 0.05,
-        'day_hidden_residual': 0.03,
-        'hour_hidden_main': 0.12,
-        'hour_hidden_secondary': 0.06,
-        'hour_hidden_residual': 0.03,
-    }
+    scores = {god: 0.0 for god in JOEY_YAP_PROFILE_ORDER}
+    
+    gods = TEN_GOD_MATRIX[STEM_INDEX[day_master]]
     
     # Score visible stems (excluding Day Master)
-    for name in ['year', 'month', 'hour']:
-        stem = pillars[name].stem
-        god = get_ten_god(day_master, stem)
-        scores[god] += position_weights[f'{name}_visible']
+    for name, weight in JOEY_YAP_VISIBLE_WEIGHTS.items():
+        god = gods[pillars[name]._stem_idx]
+        scores[god] += weight
     
-    # Score hidden stems with position weighting
-    for name in ['year', 'month', 'day', 'hour']:
-        hidden_stems = pillars[name].hidden_stems
-        for i, stem in enumerate(hidden_stems):
-            god = get_ten_god(day_master, stem)
-            if i == 0:
-                weight_key = f'{name}_hidden_main'
-            elif i == 1:
-                weight_key = f'{name}_hidden_secondary'
-            else:
-                weight_key = f'{name}_hidden_residual'
-            scores[god] += position_weights.get(weight_key, 0.05)
+    # Score hidden stems with position weighting (main, secondary, residual)
+    for name, weights in JOEY_YAP_HIDDEN_WEIGHTS.items():
+        for stem, weight in zip(pillars[name].hidden_stems, weights):
+            scores[gods[STEM_INDEX[stem]]] += weight
     
     # Convert scores to percentages (normalize)
     max_score = max(scores.values()) if scores.values() else 1
@@ -2039,17 +2347,20 @@ def calculate_life_stages_for_chart(pillars: Dict[str, Pillar]) -> Dict[str, Dic
     """
     Calculate 12 Life Stages for each pillar position.
     """
-    stages = {}
-    
-    for name, pillar in pillars.items():
-        stage = get_life_stage(pillar.stem, pillar.branch)
-        stages[name] = {
-            'chinese': stage[0],
-            'pinyin': stage[1],
-            'english': stage[2]
-        }
-    
-    return stages
+    return {
+        name: _life_stage_entry(pillar.stem, pillar.branch)
+        for name, pillar in pillars.items()
+    }
+
+
+@lru_cache(maxsize=256)
+def _life_stage_entry(stem: str, branch: str) -> Dict:
+    stage = get_life_stage(stem, branch)
+    return FrozenDict({
+        'chinese': stage[0],
+        'pinyin': stage[1],
+        'english': stage[2]
+    })
 
 
 # =============================================================================
@@ -2531,67 +2842,264 @@ def determine_useful_gods(dm_element: str, strength: DMStrength) -> Dict:
             'explanation': f'As a {strength.value} {dm_element} Day Master, you need draining through {output} (output) and {controls} (wealth).'
         }
 
+# =============================================================================
+# SOLAR TERM INSTANTS (节气交节时刻)
+# =============================================================================
+
+# Solar term instants are given in China Standard Time (same as the QMDJ engine)
+TERM_UTC_OFFSET_HOURS = 8
+
+# Earth heliocentric longitude, VSOP87 truncated series (Meeus, Astronomical
+# Algorithms, App. III): (A, B, C) terms of A * cos(B + C * tau), in 1e-8 rad
+_VSOP87_EARTH_L = (
+    (
+        (175347046, 0, 0), (3341656, 4.6692568, 6283.07585), (34894, 4.6261, 12566.1517),
+        (3497, 2.7441, 5753.3849), (3418, 2.8289, 3.5231), (3136, 3.6277, 77713.7715),
+        (2676, 4.4181, 7860.4194), (2343, 6.1352, 3930.2097), (1324, 0.7425, 11506.7698),
+        (1273, 2.0371, 529.691), (1199, 1.1096, 1577.3435), (990, 5.233, 5884.927),
+        (902, 2.045, 26.298), (857, 3.508, 398.149), (780, 1.179, 5223.694),
+        (753, 2.533, 5507.553), (505, 4.583, 18849.228), (492, 4.205, 775.523),
+        (357, 2.92, 0.067), (317, 5.849, 11790.629), (284, 1.899, 796.298),
+        (271, 0.315, 10977.079), (243, 0.345, 5486.778), (206, 4.806, 2544.314),
+        (205, 1.869, 5573.143), (202, 2.458, 6069.777), (156, 0.833, 213.299),
+        (132, 3.411, 2942.463), (126, 1.083, 20.775), (115, 0.645, 0.98),
+        (103, 0.636, 4694.003), (102, 0.976, 15720.839), (102, 4.267, 7.114),
+        (99, 6.21, 2146.17), (98, 0.68, 155.42), (86, 5.98, 161000.69),
+        (85, 1.3, 6275.96), (85, 3.67, 71430.7), (80, 1.81, 17260.15),
+        (79, 3.04, 12036.46), (75, 1.76, 5088.63), (74, 3.5, 3154.69),
+        (74, 4.68, 801.82), (70, 0.83, 9437.76), (62, 3.98, 8827.39),
+        (61, 1.82, 7084.9), (57, 2.78, 6286.6), (56, 4.39, 14143.5),
+        (56, 3.47, 6279.55), (52, 0.19, 12139.55), (52, 1.33, 1748.02),
+        (51, 0.28, 5856.48), (49, 0.49, 1194.45), (41, 5.37, 8429.24),
+        (41, 2.4, 19651.05), (39, 6.17, 10447.39), (37, 6.04, 10213.29),
+        (37, 2.57, 1059.38), (36, 1.71, 2352.87), (36, 1.78, 6812.77),
+        (33, 0.59, 17789.85), (30, 0.44, 83996.85), (30, 2.74, 1349.87),
+        (25, 3.16, 4690.48),
+    ),
+    (
+        (628331966747, 0, 0), (206059, 2.678235, 6283.07585), (4303, 2.6351, 12566.1517),
+        (425, 1.59, 3.523), (119, 5.796, 26.298), (109, 2.966, 1577.344),
+        (93, 2.59, 18849.23), (72, 1.14, 529.69), (68, 1.87, 398.15),
+        (67, 4.41, 5507.55), (59, 2.89, 5223.69), (56, 2.17, 155.42),
+        (45, 0.4, 796.3), (36, 0.47, 775.52), (29, 2.65, 7.11),
+        (21, 5.34, 0.98), (19, 1.85, 5486.78), (19, 4.97, 213.3),
+        (17, 2.99, 6275.96), (16, 0.03, 2544.31), (16, 1.43, 2146.17),
+        (15, 1.21, 10977.08), (12, 2.83, 1748.02), (12, 3.26, 5088.63),
+        (12, 5.27, 1194.45), (12, 2.08, 4694.0), (11, 0.77, 553.57),
+        (10, 1.3, 6286.6), (10, 4.24, 1349.87), (9, 2.7, 242.73),
+        (9, 5.64, 951.72), (8, 5.3, 2352.87), (6, 2.65, 9437.76),
+        (6, 4.67, 4690.48),
+    ),
+    (
+        (52919, 0, 0), (8720, 1.0721, 6283.0758), (309, 0.867, 12566.152),
+        (27, 0.05, 3.52), (16, 5.19, 26.3), (16, 3.68, 155.42),
+        (10, 0.76, 18849.23), (9, 2.06, 77713.77), (7, 0.83, 775.52),
+        (5, 4.66, 1577.34), (4, 1.03, 7.11), (4, 3.44, 5573.14),
+        (3, 5.14, 796.3), (3, 6.05, 5507.55), (3, 1.19, 242.73),
+        (3, 6.12, 529.69), (3, 0.31, 398.15), (3, 2.28, 553.57),
+        (2, 4.38, 5223.69), (2, 3.75, 0.98),
+    ),
+    (
+        (289, 5.844, 6283.076), (35, 0, 0), (17, 5.49, 12566.15),
+        (3, 5.2, 155.42), (1, 4.72, 3.52), (1, 5.3, 18849.23),
+        (1, 5.97, 242.73),
+    ),
+    ((114, 3.142, 0), (8, 4.13, 6283.08), (1, 3.84, 12566.15)),
+    ((1, 3.14, 0),),
+)
+
+_J2000 = datetime(2000, 1, 1, 12)
+
+
+def _delta_t_seconds(year: float) -> float:
+    """TT - UT in seconds (Espenak & Meeus polynomial fits)"""
+    if 1900 <= year < 1920:
+        t = year - 1900
+        return -2.79 + 1.494119 * t - 0.0598939 * t**2 + 0.0061966 * t**3 - 0.000197 * t**4
+    if 1920 <= year < 1941:
+        t = year - 1920
+        return 21.20 + 0.84493 * t - 0.076100 * t**2 + 0.0020936 * t**3
+    if 1941 <= year < 1961:
+        t = year - 1950
+        return 29.07 + 0.407 * t - t**2 / 233 + t**3 / 2547
+    if 1961 <= year < 1986:
+        t = year - 1975
+        return 45.45 + 1.067 * t - t**2 / 260 - t**3 / 718
+    if 1986 <= year < 2005:
+        t = year - 2000
+        return (63.86 + 0.3345 * t - 0.060374 * t**2 + 0.0017275 * t**3
+                + 0.000651814 * t**4 + 0.00002373599 * t**5)
+    if 2005 <= year < 2050:
+        t = year - 2000
+        return 62.92 + 0.32217 * t + 0.005589 * t**2
+    u = (year - 1820) / 100
+    if 2050 <= year < 2150:
+        return -20 + 32 * u**2 - 0.5628 * (2150 - year)
+    return -20 + 32 * u**2
+
+
+def _sun_apparent_longitude(jde: float) -> float:
+    """Apparent geocentric longitude of the Sun in degrees (JDE in TT)"""
+    tau = (jde - 2451545.0) / 365250
+    earth_l = sum(
+        sum(a * math.cos(b + c * tau) for a, b, c in series) * tau**power
+        for power, series in enumerate(_VSOP87_EARTH_L)
+    ) / 1e8
+    t = tau * 10
+    omega = math.radians(125.04452 - 1934.136261 * t)
+    sun_mean = math.radians(280.4665 + 36000.7698 * t)
+    moon_mean = math.radians(218.3165 + 481267.8813 * t)
+    nutation = (-17.20 * math.sin(omega) - 1.32 * math.sin(2 * sun_mean)
+                - 0.23 * math.sin(2 * moon_mean) + 0.21 * math.sin(2 * omega))
+    # Geocentric = heliocentric + 180; then FK5, nutation and aberration (arcsec)
+    return (math.degrees(earth_l) + 180 + (nutation - 0.09033 - 20.4898) / 3600) % 360
+
+
+def _solve_term_instant(longitude: float, guess: datetime) -> datetime:
+    """UT instant near guess when the Sun reaches the given longitude"""
+    jde = 2451545.0 + (guess - _J2000).total_seconds() / 86400
+    for _ in range(10):
+        step = 58.13 * math.sin(math.radians(longitude - _sun_apparent_longitude(jde)))
+        jde += step
+        if abs(step) < 1e-7:
+            break
+    delta_t = _delta_t_seconds(guess.year + (guess.month - 0.5) / 12)
+    return _J2000 + timedelta(days=jde - 2451545.0, seconds=-delta_t)
+
+
+@lru_cache(maxsize=512)
+def get_solar_term_instants(year: int) -> Tuple[Tuple[datetime, int], ...]:
+    """
+    Exact instants of the 12 month-starting solar terms (Jie) in a calendar year.
+    
+    Returns ((instant, bazi_month), ...) in time order, starting with
+    Xiao Han (month 12) in January. Instants are naive datetimes in
+    TERM_UTC_OFFSET_HOURS local time, rounded to the second.
+    """
+    terms = []
+    for bazi_month in (12, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11):
+        solar_month, solar_day = SOLAR_TERMS[bazi_month]
+        longitude = (315 + 30 * (bazi_month - 1)) % 360
+        instant = _solve_term_instant(longitude, datetime(year, solar_month, solar_day, 4))
+        instant += timedelta(hours=TERM_UTC_OFFSET_HOURS, microseconds=500000)
+        terms.append((instant.replace(microsecond=0), bazi_month))
+    return tuple(terms)
+
+
+def _terms_around(year: int) -> List[Tuple[datetime, int]]:
+    """Jie instants of the previous, given and next calendar year"""
+    return [term for y in (year - 1, year, year + 1) for term in get_solar_term_instants(y)]
+
+
+def _luck_term_month(natal_month: int, is_forward: bool) -> int:
+    """
+    Jie that bounds the natal BaZi month in the luck direction: the start
+    of the next month (forward) or of the natal month itself (reverse).
+    """
+    return natal_month % 12 + 1 if is_forward else natal_month
+
+
+def _term_offset(target_month, term_month):
+    """
+    Slots from a term to the nearest occurrence of target_month's Jie
+    (-6..5). Term lists cycle 12, 1, 2, ..., 11 each year. Works on ints
+    and numpy arrays.
+    """
+    return (target_month % 12 - term_month % 12 + 6) % 12 - 6
+
+
 # =============================================================================
 # LUCK PILLARS
 # =============================================================================
 
-def calculate_luck_pillar_start_age(
-    birth_date: date,
-    gender: str,
-    year_polarity: str
-) -> int:
+def _luck_start_detail(birth: datetime, term_instant: datetime, bazi_month: int, is_forward: bool) -> Dict:
     """
-    Calculate starting age for Luck Pillars.
+    Start age breakdown from the distance between birth and a solar term.
+    
+    A term on the wrong side of birth (the fixed SOLAR_TERMS month and
+    the exact instant disagree by a few hours) counts as 0.
+    """
+    seconds = (term_instant - birth).total_seconds()
+    minutes = max(seconds if is_forward else -seconds, 0) / 60
+    # 3 days = 1 year, 1 day = 4 months, 2 hours = 10 days
+    years, rest = divmod(minutes, 3 * 1440)
+    months, rest = divmod(rest, 360)
+    term_cn, term_pinyin, _ = SOLAR_TERM_NAMES[bazi_month]
+    return {
+        'start_age': round(minutes / (3 * 1440)),
+        'years': int(years),
+        'months': int(months),
+        'days': int(rest // 12),
+        'direction': "Forward" if is_forward else "Reverse",
+        'term': term_pinyin,
+        'term_cn': term_cn,
+        'term_instant': term_instant.isoformat(),
+        'days_to_term': round(minutes / 1440, 2),
+    }
+
+
+def calculate_luck_start(birth, gender: str, year_polarity: str) -> Dict:
+    """
+    Exact Luck Pillar start from the solar term instants.
     
     Algorithm:
     1. Direction: Yang Male / Yin Female = Forward; Yin Male / Yang Female = Reverse
-    2. Count days to nearest solar term transition (in that direction)
-    3. Divide by 3, round to nearest integer
+    2. Time from birth to the exact instant of the Jie that ends (forward)
+       or starts (reverse) the natal month pillar's month. The month is
+       get_bazi_month(), as in calc_month_pillar, so the start always
+       agrees with the luck pillars stepped from the month pillar.
+    3. 3 days = 1 year, 1 day = 4 months, 2 hours = 10 days
+    
+    Args:
+        birth: Birth datetime (a date is taken as 00:00), in
+            TERM_UTC_OFFSET_HOURS local time
+        gender: 'male' or 'female'
+        year_polarity: Polarity of the Year Pillar stem
+    
+    Returns dict with start_age (whole years, rounded), years, months,
+    days, direction, term, term_cn, term_instant and days_to_term.
     """
+    if not isinstance(birth, datetime):
+        birth = datetime.combine(birth, time())
     is_forward = (
         (gender.lower() == 'male' and year_polarity == 'Yang') or
         (gender.lower() == 'female' and year_polarity == 'Yin')
     )
     
-    year = birth_date.year
-    month = birth_date.month
-    day = birth_date.day
-    current_bazi_month = get_bazi_month(year, month, day)
-    
-    if is_forward:
-        # Find NEXT solar term
-        next_bazi_month = (current_bazi_month % 12) + 1
-        next_solar_month, next_solar_day = SOLAR_TERMS[next_bazi_month]
-        
-        if next_solar_month < month or (next_solar_month == 1 and month >= 11):
-            target_year = year + 1
-        else:
-            target_year = year
-        
-        target_date = date(target_year, next_solar_month, next_solar_day)
-    else:
-        # Find PREVIOUS solar term
-        curr_solar_month, curr_solar_day = SOLAR_TERMS[current_bazi_month]
-        target_date = date(year, curr_solar_month, curr_solar_day)
-        
-        if target_date > birth_date:
-            prev_bazi_month = ((current_bazi_month - 2) % 12) + 1
-            prev_solar_month, prev_solar_day = SOLAR_TERMS[prev_bazi_month]
-            target_year = year - 1 if prev_solar_month > month else year
-            target_date = date(target_year, prev_solar_month, prev_solar_day)
+    target = _luck_term_month(get_bazi_month(birth.year, birth.month, birth.day), is_forward)
+    terms = _terms_around(birth.year)
+    # Nearest occurrence of the target Jie around the next / previous instant
+    i = bisect.bisect_right(terms, (birth, 13)) - (not is_forward)
+    term_instant, bazi_month = terms[i + _term_offset(target, terms[i][1])]
+    return _luck_start_detail(birth, term_instant, bazi_month, is_forward)
+
+
+def calculate_luck_pillar_start_age(
+    birth_date,
+    gender: str,
+    year_polarity: str
+) -> int:
+    """
+    Calculate starting age for Luck Pillars.
     
-    days_diff = abs((target_date - birth_date).days)
-    return round(days_diff / 3)
+    Whole years (rounded) from calculate_luck_start; birth_date may be a
+    datetime for minute-level accuracy.
+    """
+    return calculate_luck_start(birth_date, gender, year_polarity)['start_age']
 
 
 def calculate_luck_pillars(
     pillars: Dict[str, Pillar],
     birth_date: date,
     gender: str,
-    num_pillars: int = 8
+    num_pillars: int = 8,
+    start_age: Optional[int] = None
 ) -> List[LuckPillar]:
     """
     Calculate Luck Pillars (10-year periods).
+    
+    birth_date may be a datetime for an exact start age. Pass start_age
+    when calculate_luck_start() has already been called.
     """
     month_pillar = pillars['month']
     year_pillar = pillars['year']
@@ -2602,10 +3110,11 @@ def calculate_luck_pillars(
         (gender.lower() == 'female' and year_polarity == 'Yin')
     )
     
-    start_age = calculate_luck_pillar_start_age(birth_date, gender, year_polarity)
+    if start_age is None:
+        start_age = calculate_luck_pillar_start_age(birth_date, gender, year_polarity)
     
-    stem_idx = HEAVENLY_STEMS.index(month_pillar.stem)
-    branch_idx = EARTHLY_BRANCHES.index(month_pillar.branch)
+    stem_idx = month_pillar._stem_idx
+    branch_idx = month_pillar._branch_idx
     
     luck_pillars = []
     current_age = start_age
@@ -2647,22 +3156,35 @@ def get_luck_direction(gender: str, year_polarity: str) -> str:
 # CLASH & COMBINE DETECTION
 # =============================================================================
 
+def branch_mask(branches) -> int:
+    """12-bit mask of a collection of branch names"""
+    mask = 0
+    for branch in branches:
+        mask |= BRANCH_BITS[branch]
+    return mask
+
+
+def _has_partner(pillars: Dict[str, Pillar], partner_masks: List[int]) -> bool:
+    """True if any pillar's branch has a partner branch among the pillars"""
+    mask = branch_mask(p.branch for p in pillars.values())
+    return any(partner_masks[p._branch_idx] & mask for p in pillars.values())
+
+
 def detect_clashes(pillars: Dict[str, Pillar]) -> List[Dict]:
     """Detect Six Clashes between pillars"""
     clashes = []
+    if not _has_partner(pillars, CLASH_MASKS):
+        return clashes
     pillar_names = list(pillars.keys())
     
     for i, name1 in enumerate(pillar_names):
         for name2 in pillar_names[i+1:]:
-            branch1 = pillars[name1].branch
-            branch2 = pillars[name2].branch
-            
-            if SIX_CLASHES.get(branch1) == branch2:
+            if CLASH_MASKS[pillars[name1]._branch_idx] & BRANCH_BITS[pillars[name2].branch]:
                 clashes.append({
                     'pillar1': name1,
                     'pillar2': name2,
-                    'branch1': branch1,
-                    'branch2': branch2,
+                    'branch1': pillars[name1].branch,
+                    'branch2': pillars[name2].branch,
                     'animals': f"{pillars[name1].animal} vs {pillars[name2].animal}",
                     'description': f"{name1.title()} ↔ {name2.title()}"
                 })
@@ -2673,23 +3195,22 @@ def detect_clashes(pillars: Dict[str, Pillar]) -> List[Dict]:
 def detect_combines(pillars: Dict[str, Pillar]) -> List[Dict]:
     """Detect Six Combines between pillars"""
     combines = []
+    if not _has_partner(pillars, COMBINE_MASKS):
+        return combines
     pillar_names = list(pillars.keys())
     
     for i, name1 in enumerate(pillar_names):
         for name2 in pillar_names[i+1:]:
-            branch1 = pillars[name1].branch
-            branch2 = pillars[name2].branch
-            
-            combine_info = SIX_COMBINES.get(branch1)
-            if combine_info and combine_info[0] == branch2:
+            if COMBINE_MASKS[pillars[name1]._branch_idx] & BRANCH_BITS[pillars[name2].branch]:
+                result_element = SIX_COMBINES[pillars[name1].branch][1]
                 combines.append({
                     'pillar1': name1,
                     'pillar2': name2,
-                    'branch1': branch1,
-                    'branch2': branch2,
-                    'result_element': combine_info[1],
+                    'branch1': pillars[name1].branch,
+                    'branch2': pillars[name2].branch,
+                    'result_element': result_element,
                     'animals': f"{pillars[name1].animal} + {pillars[name2].animal}",
-                    'description': f"{name1.title()} + {name2.title()} → {combine_info[1]}"
+                    'description': f"{name1.title()} + {name2.title()} → {result_element}"
                 })
     
     return combines
@@ -2698,9 +3219,12 @@ def detect_combines(pillars: Dict[str, Pillar]) -> List[Dict]:
 def detect_three_harmony(pillars: Dict[str, Pillar]) -> List[Dict]:
     """Detect Three Harmony combinations"""
     branches = [p.branch for p in pillars.values()]
+    mask = branch_mask(branches)
     harmonies = []
     
     for element, trio in THREE_HARMONY.items():
+        if not HARMONY_FRAME_MASKS[element] & mask:
+            continue
         matches = [b for b in branches if b in trio]
         if len(matches) >= 2:
             harmonies.append({
@@ -2712,118 +3236,1045 @@ def detect_three_harmony(pillars: Dict[str, Pillar]) -> List[Dict]:
     
     return harmonies
 
+
+def get_interaction_flags(mask: int, branch: str) -> int:
+    """
+    Interactions between one branch and a set of branches (as a mask).
+    
+    Returns INTERACTION_CLASH | INTERACTION_COMBINE | INTERACTION_HARMONY bits.
+    """
+    idx = BRANCH_INDEX[branch]
+    return (
+        (INTERACTION_CLASH if CLASH_MASKS[idx] & mask else 0)
+        | (INTERACTION_COMBINE if COMBINE_MASKS[idx] & mask else 0)
+        | (INTERACTION_HARMONY if HARMONY_MASKS[idx] & mask else 0)
+    )
+
+
+def interaction_flag_table(mask: int) -> List[int]:
+    """
+    get_interaction_flags for all 12 branches against one mask.
+    
+    Index it with branch indexes (a list or numpy array) to check any
+    number of luck / annual / monthly / daily branches at once.
+    """
+    return [get_interaction_flags(mask, branch) for branch in EARTHLY_BRANCHES]
+
+
+def detect_external_interactions(pillars: Dict[str, Pillar], branch: str) -> Dict[str, List[str]]:
+    """
+    Natal pillars that a luck, annual, monthly (or any other) branch
+    clashes, combines or forms Three Harmony with.
+    
+    Returns {'clashes': [...], 'combines': [...], 'three_harmony': [...]}
+    listing natal pillar names.
+    """
+    idx = BRANCH_INDEX[branch]
+    result = {'clashes': [], 'combines': [], 'three_harmony': []}
+    for name, pillar in pillars.items():
+        bit = BRANCH_BITS[pillar.branch]
+        if CLASH_MASKS[idx] & bit:
+            result['clashes'].append(name)
+        if COMBINE_MASKS[idx] & bit:
+            result['combines'].append(name)
+        if HARMONY_MASKS[idx] & bit:
+            result['three_harmony'].append(name)
+    return result
+
+# =============================================================================
+# COMPATIBILITY MATRIX (合盘)
+# =============================================================================
+
+# Points for the other person's Day Master as a Ten God of yours (TEN_GODS order)
+COMPATIBILITY_TEN_GOD_POINTS = {
+    'Friend': 1,
+    'Rob Wealth': -1,
+    'Eating God': 1,
+    'Hurting Officer': -1,
+    'Indirect Wealth': 1,
+    'Direct Wealth': 2,
+    'Seven Killings': -2,
+    'Direct Officer': 2,
+    'Indirect Resource': 0,
+    'Direct Resource': 2,
+}
+
+# Day Master stems that combine (甲己, 乙庚, 丙辛, 丁壬, 戊癸)
+STEM_COMBINE_POINTS = 2
+
+# Branch interactions between the two people's Day / Year branches
+COMPATIBILITY_BRANCH_POINTS = {
+    'day': {'clash': -3, 'combine': 3, 'harmony': 2},
+    'year': {'clash': -1, 'combine': 1, 'harmony': 1},
+}
+
+# Other person's Day Master element is one of your useful / unfavorable elements
+USEFUL_ELEMENT_POINTS = 1
+UNFAVORABLE_ELEMENT_POINTS = -1
+
+
+def _pair_tables() -> Dict:
+    """Symmetric int16 score tables for Day Master pairs and branch pairs"""
+    god_points = [COMPATIBILITY_TEN_GOD_POINTS[god] for god in TEN_GODS]
+    stems = [
+        [
+            god_points[TEN_GOD_CODES[a][b]] + god_points[TEN_GOD_CODES[b][a]]
+            + (STEM_COMBINE_POINTS if abs(a - b) == 5 else 0)
+            for b in range(10)
+        ]
+        for a in range(10)
+    ]
+    tables = {'stems': stems}
+    for pillar, points in COMPATIBILITY_BRANCH_POINTS.items():
+        tables[pillar] = [
+            [
+                points['clash'] * ((CLASH_MASKS[a] >> b) & 1)
+                + points['combine'] * ((COMBINE_MASKS[a] >> b) & 1)
+                + points['harmony'] * ((HARMONY_MASKS[a] >> b) & 1)
+                for b in range(12)
+            ]
+            for a in range(12)
+        ]
+    return {name: np.array(table, dtype=np.int16) for name, table in tables.items()}
+
+
+_COMPATIBILITY_PAIR_TABLES = _pair_tables() if NUMPY_AVAILABLE else None
+
+
+def compatibility_matrix(profiles: List[Dict]):
+    """
+    Pairwise compatibility scores for a group of BaZi profiles.
+    
+    Each pair scores:
+    - Day Master relation: each Day Master as a Ten God of the other,
+      plus a bonus when the two stems combine
+    - Day branch and Year branch clash / combine / Three Harmony
+    - Useful gods: each person's Day Master element against the other's
+      useful / unfavorable elements
+    
+    Args:
+        profiles: analyze_bazi results (need 'four_pillars', 'day_master'
+            and 'useful_gods')
+    
+    Returns symmetric N x N int16 numpy array (diagonal is 0). Higher is
+    more compatible.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("compatibility_matrix requires numpy")
+    
+    n = len(profiles)
+    day_master = np.empty(n, dtype=np.intp)
+    day_branch = np.empty(n, dtype=np.intp)
+    year_branch = np.empty(n, dtype=np.intp)
+    element_points = np.zeros((n, len(FIVE_ELEMENTS)), dtype=np.int16)
+    
+    for i, profile in enumerate(profiles):
+        pillars = profile['four_pillars']
+        day_master[i] = STEM_INDEX[profile['day_master']['stem']]
+        day_branch[i] = BRANCH_INDEX[pillars['day']['branch']]
+        year_branch[i] = BRANCH_INDEX[pillars['year']['branch']]
+        useful_gods = profile['useful_gods']
+        for element in useful_gods.get('useful', []):
+            element_points[i, ELEMENT_INDEX[element]] = USEFUL_ELEMENT_POINTS
+        for element in useful_gods.get('unfavorable', []):
+            element_points[i, ELEMENT_INDEX[element]] = UNFAVORABLE_ELEMENT_POINTS
+    
+    tables = _COMPATIBILITY_PAIR_TABLES
+    
+    scores = tables['stems'][day_master[:, None], day_master[None, :]]
+    scores += tables['day'][day_branch[:, None], day_branch[None, :]]
+    scores += tables['year'][year_branch[:, None], year_branch[None, :]]
+    
+    # element_points[i, element of j's Day Master], seen from both sides
+    useful = element_points[:, day_master // 2]
+    scores += useful
+    scores += useful.T
+    
+    np.fill_diagonal(scores, 0)
+    return scores
+
+
 # =============================================================================
 # COMPLETE ANALYSIS
 # =============================================================================
 
+# Sections returned by analyze_bazi, in output order
+BAZI_SECTIONS = (
+    'birth_info',
+    'four_pillars',
+    'day_master',
+    'useful_gods',
+    'profiles',
+    'luck_pillars',
+    'interactions',
+    'symbolic_stars',
+    'life_stages',
+    'celestial_animal',
+    'life_star',
+    'eight_mansions',
+    'five_structures',
+    'hidden_stems_analysis',
+    'twelve_stages_wheel',
+    'six_aspects',
+    'annual_analysis',
+    'monthly_influence',
+    'current_luck',
+)
+
+
+# Sections that depend only on the Four Pillars and gender (safe to share
+# between every birth date/hour that produces the same pillars). Life stages,
+# hidden stem analysis and the twelve stages wheel are left out: they are
+# already shared per-Day-Master tables, so caching them would only copy them.
+PILLAR_SECTIONS = frozenset({
+    'four_pillars',
+    'day_master',
+    'useful_gods',
+    'profiles',
+    'interactions',
+    'symbolic_stars',
+    'celestial_animal',
+    'five_structures',
+    'six_aspects',
+})
+
+
+@lru_cache(maxsize=65536)
+def get_pillar_key(birth_date: date, birth_hour: int) -> Tuple[str, ...]:
+    """
+    Pillar identity for a birth date and hour (level 1 of the BaZi cache).
+    
+    Returns (year_stem, year_branch, month_stem, month_branch,
+    day_stem, day_branch, hour_stem, hour_branch).
+    """
+    pillars = calculate_four_pillars(birth_date, birth_hour)
+    return tuple(part for p in pillars.values() for part in (p.stem, p.branch))
+
+
+def pillars_from_key(pillar_key: Tuple[str, ...]) -> Dict[str, Pillar]:
+    """Rebuild the Four Pillars from a get_pillar_key() tuple"""
+    return {
+        name: Pillar(pillar_key[i * 2], pillar_key[i * 2 + 1], name.capitalize())
+        for i, name in enumerate(('year', 'month', 'day', 'hour'))
+    }
+
+
+class BaziCache:
+    """
+    Thread-safe bounded LRU cache of PILLAR_SECTIONS results (level 2 of
+    the BaZi cache).
+    
+    Keyed by (pillar key, gender). Sections are stored pickled, so every
+    hit returns fresh objects that callers are free to modify.
+    
+    If a path is given the cache is loaded from it on creation and saved
+    back at interpreter exit (only use files you wrote yourself - they
+    are unpickled).
+    """
+    
+    def __init__(self, maxsize: int = 4096, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            if os.path.exists(path):
+                self.load(path)
+            atexit.register(self.save)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Tuple, sections) -> Dict:
+        """
+        Return the cached sections for key (may be empty, and may include
+        sections that were not asked for)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry[0].issuperset(sections):
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        return pickle.loads(entry[1]) if entry else {}
+    
+    def put(self, key: Tuple, results: Dict):
+        """Store section results for key, evicting the least recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                results = {**pickle.loads(entry[1]), **results}
+            self._entries[key] = (frozenset(results), pickle.dumps(results, pickle.HIGHEST_PROTOCOL))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def save(self, path: Optional[str] = None):
+        """Write the cache to disk (atomically replaces the file)"""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            items = list(self._entries.items())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(items, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    
+    def load(self, path: Optional[str] = None):
+        """Merge entries from a file written by save()"""
+        path = path or self.path
+        with open(path, 'rb') as f:
+            items = pickle.load(f)
+        with self._lock:
+            for key, entry in items:
+                self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+# Default cache used by analyze_bazi
+BAZI_CACHE = BaziCache()
+
+
+class _BaziAnalysis:
+    """
+    Intermediate results shared between analyze_bazi sections.
+    
+    Everything is calculated the first time a section asks for it and then
+    reused, so requesting a few sections only pays for what those sections
+    need.
+    """
+    
+    def __init__(self, birth_date: date, birth_hour: int, gender: str, birth_minute: int = 0):
+        self.birth_date = birth_date
+        self.birth_hour = birth_hour
+        self.birth_minute = birth_minute
+        self.gender = gender
+    
+    @cached_property
+    def pillar_key(self) -> Tuple[str, ...]:
+        return get_pillar_key(self.birth_date, self.birth_hour)
+    
+    @cached_property
+    def pillars(self) -> Dict[str, Pillar]:
+        return pillars_from_key(self.pillar_key)
+    
+    @cached_property
+    def day_master(self) -> str:
+        return self.pillars['day'].stem
+    
+    @cached_property
+    def dm_element(self) -> str:
+        return self.pillars['day'].element
+    
+    @cached_property
+    def strength(self) -> Tuple[float, DMStrength]:
+        return calculate_dm_strength(self.pillars)
+    
+    @cached_property
+    def profile_counts(self) -> Dict[str, int]:
+        return calculate_ten_profiles(self.pillars)
+    
+    @cached_property
+    def birth_datetime(self) -> datetime:
+        return datetime.combine(self.birth_date, time(self.birth_hour, self.birth_minute))
+    
+    @cached_property
+    def luck_start(self) -> Dict:
+        return calculate_luck_start(self.birth_datetime, self.gender, self.pillars['year'].polarity)
+    
+    @cached_property
+    def luck_pillars(self) -> List[Dict]:
+        return [
+            lp.to_dict() for lp in calculate_luck_pillars(
+                self.pillars, self.birth_datetime, self.gender, start_age=self.luck_start['start_age']
+            )
+        ]
+    
+    @cached_property
+    def gua_number(self) -> int:
+        return calculate_gua_number(self.birth_date.year, self.gender)
+
+
+def _section_birth_info(ctx: _BaziAnalysis) -> Dict:
+    return {
+        'date': ctx.birth_date.isoformat(),
+        'hour': ctx.birth_hour,
+        'minute': ctx.birth_minute,
+        'gender': ctx.gender
+    }
+
+
+def _section_day_master(ctx: _BaziAnalysis) -> Dict:
+    strength_pct, strength_category = ctx.strength
+    return {
+        'stem': ctx.day_master,
+        'stem_cn': ctx.pillars['day'].stem_cn,
+        'element': ctx.dm_element,
+        'polarity': ctx.pillars['day'].polarity,
+        'strength_pct': strength_pct,
+        'strength_category': strength_category.value
+    }
+
+
+def _section_profiles(ctx: _BaziAnalysis) -> Dict:
+    # Ten Profiles - use Joey Yap's 12 Life Stages method
+    profile_percentages = calculate_profile_percentages_joey_yap(ctx.pillars)
+    dominant_god, profile_name = get_dominant_profile_joey_yap(profile_percentages)
+    return {
+        'counts': ctx.profile_counts,
+        'percentages': profile_percentages,
+        'dominant': dominant_god,
+        'profile_name': profile_name
+    }
+
+
+def _section_luck_pillars(ctx: _BaziAnalysis) -> Dict:
+    return {
+        'direction': get_luck_direction(ctx.gender, ctx.pillars['year'].polarity),
+        'start_age': ctx.luck_pillars[0]['start_age'] if ctx.luck_pillars else 0,
+        'start_detail': ctx.luck_start,
+        'pillars': ctx.luck_pillars
+    }
+
+
+def _section_interactions(ctx: _BaziAnalysis) -> Dict:
+    return {
+        'clashes': detect_clashes(ctx.pillars),
+        'combines': detect_combines(ctx.pillars),
+        'three_harmony': detect_three_harmony(ctx.pillars)
+    }
+
+
+def _section_celestial_animal(ctx: _BaziAnalysis) -> Dict:
+    # Celestial Animal (from Year Branch)
+    year_branch = ctx.pillars['year'].branch
+    return {
+        'branch': year_branch,
+        'animal': BRANCH_ANIMALS[EARTHLY_BRANCHES.index(year_branch)],
+        'chinese': '生肖'
+    }
+
+
+def _section_life_star(ctx: _BaziAnalysis) -> Dict:
+    return {
+        'gua_number': ctx.gua_number,
+        'gua_info': get_gua_info(ctx.gua_number)
+    }
+
+
+_SECTION_BUILDERS = {
+    'birth_info': _section_birth_info,
+    'four_pillars': lambda ctx: pillars_to_dict(ctx.pillars),
+    'day_master': _section_day_master,
+    'useful_gods': lambda ctx: determine_useful_gods(ctx.dm_element, ctx.strength[1]),
+    'profiles': _section_profiles,
+    'luck_pillars': _section_luck_pillars,
+    'interactions': _section_interactions,
+    'symbolic_stars': lambda ctx: calculate_symbolic_stars(ctx.pillars),
+    'life_stages': lambda ctx: calculate_life_stages_for_chart(ctx.pillars),
+    'celestial_animal': _section_celestial_animal,
+    'life_star': _section_life_star,
+    'eight_mansions': lambda ctx: calculate_eight_mansions(ctx.gua_number),
+    'five_structures': lambda ctx: calculate_five_structures(ctx.profile_counts),
+    'hidden_stems_analysis': lambda ctx: get_pillar_hidden_stem_analysis(ctx.pillars, ctx.day_master),
+    'twelve_stages_wheel': lambda ctx: get_twelve_stages_wheel(ctx.day_master),
+    'six_aspects': lambda ctx: calculate_six_aspects(ctx.profile_counts, ctx.gender),
+    'annual_analysis': lambda ctx: calculate_annual_analysis(ctx.day_master, ctx.profile_counts, 2026),
+    'monthly_influence': lambda ctx: calculate_monthly_influence(ctx.day_master, 2026),
+    'current_luck': lambda ctx: get_current_luck_pillar(ctx.luck_pillars, ctx.birth_date.year, 2026),
+}
+
+
 def analyze_bazi(
     birth_date: date,
     birth_hour: int,
-    gender: str = 'male'
+    gender: str = 'male',
+    sections: Optional[List[str]] = None,
+    cache: Optional[BaziCache] = BAZI_CACHE,
+    birth_minute: int = 0
 ) -> Dict:
     """
     Perform complete BaZi analysis.
     
+    Args:
+        birth_date: Date of birth
+        birth_hour: Hour of birth (0-23)
+        gender: 'male' or 'female'
+        sections: Optional list of BAZI_SECTIONS names. When given, only
+            those sections are calculated and returned (in BAZI_SECTIONS
+            order). Default is every section.
+        cache: BaziCache for the PILLAR_SECTIONS (None to disable)
+        birth_minute: Minute of birth (0-59), used for the Luck Pillar
+            start age
+    
     Returns comprehensive analysis dictionary.
     """
-    # Calculate Four Pillars
-    pillars = calculate_four_pillars(birth_date, birth_hour)
-    day_master = pillars['day'].stem
-    dm_element = pillars['day'].element
-    
-    # Calculate strength
-    strength_pct, strength_category = calculate_dm_strength(pillars)
+    if sections is None:
+        wanted = BAZI_SECTIONS
+    else:
+        unknown = set(sections) - set(BAZI_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown BaZi section(s): {', '.join(sorted(unknown))}")
+        wanted = [name for name in BAZI_SECTIONS if name in sections]
+    
+    ctx = _BaziAnalysis(birth_date, birth_hour, gender, birth_minute)
+    
+    cached = {}
+    if cache is not None:
+        pillar_sections = [name for name in wanted if name in PILLAR_SECTIONS]
+        if pillar_sections:
+            cache_key = (ctx.pillar_key, gender.lower())
+            cached = cache.get(cache_key, pillar_sections)
+            computed = {
+                name: _SECTION_BUILDERS[name](ctx)
+                for name in pillar_sections if name not in cached
+            }
+            if computed:
+                cache.put(cache_key, computed)
+                cached.update(computed)
     
-    # Useful gods
-    useful_gods = determine_useful_gods(dm_element, strength_category)
+    return {
+        name: cached[name] if name in cached else _SECTION_BUILDERS[name](ctx)
+        for name in wanted
+    }
+
+# =============================================================================
+# BATCH ANALYSIS (cohorts of birth records)
+# =============================================================================
+
+# Sections produced by analyze_bazi_batch(..., as_dicts=True)
+BATCH_SECTIONS = ('birth_info', 'four_pillars', 'day_master', 'useful_gods', 'profiles', 'luck_pillars')
+
+# Element and strength orders used for the integer codes in batch columns
+FIVE_ELEMENTS = ['Wood', 'Fire', 'Earth', 'Metal', 'Water']
+ELEMENT_INDEX = {element: i for i, element in enumerate(FIVE_ELEMENTS)}
+DM_STRENGTH_LEVELS = list(DMStrength)
+
+# BAZI_MONTH_TABLE[month][day] -> BaZi month (same result as get_bazi_month)
+BAZI_MONTH_TABLE = tuple(
+    tuple(get_bazi_month(2000, month, day) if month else 0 for day in range(32))
+    for month in range(13)
+)
+
+_PILLAR_NAMES = ('year', 'month', 'day', 'hour')
+
+
+def _cycle_index(stem_idx, branch_idx):
+    """Position (0-59) of a stem/branch pair in the 60 Jia Zi cycle"""
+    return (6 * stem_idx - 5 * branch_idx) % 60
+
+
+def calculate_four_pillars_batch(birth_dates, birth_hours) -> Dict:
+    """
+    Calculate the Four Pillars for many births at once.
     
-    # Ten Profiles - use Joey Yap's 12 Life Stages method
-    profiles = calculate_ten_profiles(pillars)
-    profile_percentages = calculate_profile_percentages_joey_yap(pillars)
-    dominant_god, profile_name = get_dominant_profile_joey_yap(profile_percentages)
+    Args:
+        birth_dates: Sequence of dates (or a numpy datetime64 array)
+        birth_hours: Sequence of birth hours (0-23)
     
-    # Luck Pillars
-    year_polarity = pillars['year'].polarity
-    luck_direction = get_luck_direction(gender, year_polarity)
-    luck_pillars = calculate_luck_pillars(pillars, birth_date, gender)
+    Returns dict of int8 arrays: year_stem, year_branch, month_stem,
+    month_branch, day_stem, day_branch, hour_stem, hour_branch
+    (indexes into HEAVENLY_STEMS / EARTHLY_BRANCHES).
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("calculate_four_pillars_batch requires numpy")
     
-    # Interactions
-    clashes = detect_clashes(pillars)
-    combines = detect_combines(pillars)
-    harmonies = detect_three_harmony(pillars)
+    dates = np.asarray(birth_dates, dtype='datetime64[D]')
+    hours = np.asarray(birth_hours, dtype=np.int64)
+    if dates.shape != hours.shape:
+        raise ValueError("birth_dates and birth_hours must have the same length")
     
-    # Symbolic Stars (NEW)
-    symbolic_stars = calculate_symbolic_stars(pillars)
+    months_since_epoch = dates.astype('datetime64[M]')
+    year = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = months_since_epoch.astype(np.int64) % 12 + 1
+    day = (dates - months_since_epoch).astype(np.int64) + 1
     
-    # Life Stages (NEW)
-    life_stages = calculate_life_stages_for_chart(pillars)
+    # Year pillar (Li Chun boundary)
+    li_chun_month, li_chun_day = SOLAR_TERMS[1]
+    before_li_chun = (month < li_chun_month) | ((month == li_chun_month) & (day < li_chun_day))
+    bazi_year = year - before_li_chun
+    year_stem = (bazi_year - 4) % 10
+    year_branch = (bazi_year - 4) % 12
+    
+    # Month pillar (solar terms + 5-Tiger Formula)
+    bazi_month = np.array(BAZI_MONTH_TABLE, dtype=np.int64)[month, day]
+    month_stem = ((year_stem * 2 + 2) + bazi_month - 1) % 10
+    month_branch = (bazi_month + 1) % 12
+    
+    # Day pillar (1900-01-01 = Jia Xu)
+    days_diff = (dates - np.datetime64('1900-01-01', 'D')).astype(np.int64)
+    day_stem = days_diff % 10
+    day_branch = (days_diff + 10) % 12
+    
+    # Hour pillar (5-Rat Formula)
+    hour_branch = ((hours + 1) // 2) % 12
+    hour_stem = ((day_stem % 5) * 2 + hour_branch) % 10
+    
+    columns = {
+        'year_stem': year_stem, 'year_branch': year_branch,
+        'month_stem': month_stem, 'month_branch': month_branch,
+        'day_stem': day_stem, 'day_branch': day_branch,
+        'hour_stem': hour_stem, 'hour_branch': hour_branch,
+    }
+    return {key: values.astype(np.int8) for key, values in columns.items()}
+
+
+def _strength_profile_tables() -> Dict:
+    """
+    Lookup tables for the vectorized strength and profile kernels.
     
-    # Celestial Animal (from Year Branch)
-    year_branch_idx = EARTHLY_BRANCHES.index(pillars['year'].branch)
-    celestial_animal = BRANCH_ANIMALS[year_branch_idx]
+    Hidden stems are laid out in (main, secondary, residual) slots per
+    branch, padded with -1. Every stem-indexed table has an extra zero
+    column so padded slots contribute nothing.
+    """
+    hidden_slots = np.full((12, 3), -1, dtype=np.int64)
+    for b, branch in enumerate(EARTHLY_BRANCHES):
+        for k, stem in enumerate(HIDDEN_STEMS[branch]):
+            hidden_slots[b, k] = STEM_INDEX[stem]
+    
+    # Support a stem / branch gives each Day Master element (same 1.0, resource 0.7)
+    stem_support = np.zeros((5, 11))
+    branch_support = np.zeros((5, 12))
+    seasonal = np.zeros((12, 5))
+    for e, element in enumerate(FIVE_ELEMENTS):
+        for i, stem in enumerate(HEAVENLY_STEMS):
+            if STEM_ELEMENTS[stem] == element:
+                stem_support[e, i] = 1.0
+            elif STEM_ELEMENTS[stem] == PRODUCED_BY[element]:
+                stem_support[e, i] = 0.7
+        for b, branch in enumerate(EARTHLY_BRANCHES):
+            if BRANCH_ELEMENTS[branch] == element:
+                branch_support[e, b] = 0.10
+            elif BRANCH_ELEMENTS[branch] == PRODUCED_BY[element]:
+                branch_support[e, b] = 0.07
+            seasonal[b, e] = SEASONAL_STRENGTH.get(branch, {}).get(element, 0.0)
+    
+    # Per (Day Master, branch) Ten God contributions of the hidden stems.
+    # A Day Master maps distinct stems to distinct gods, so each branch adds
+    # at most one weight per god and summing these vectors pillar by pillar
+    # reproduces the scalar accumulation order exactly.
+    codes = np.zeros((10, 11), dtype=np.int64)
+    codes[:, :10] = TEN_GOD_CODE_ARRAY
+    hidden_counts = np.zeros((10, 12, 10), dtype=np.int8)
+    hidden_weights = np.zeros((len(_PILLAR_NAMES), 10, 12, 10))
+    for dm in range(10):
+        for b in range(12):
+            for k, stem_idx in enumerate(hidden_slots[b]):
+                if stem_idx < 0:
+                    continue
+                god = codes[dm, stem_idx]
+                hidden_counts[dm, b, god] += 1
+                for p, name in enumerate(_PILLAR_NAMES):
+                    hidden_weights[p, dm, b, god] = JOEY_YAP_HIDDEN_WEIGHTS[name][k]
     
     return {
-        'birth_info': {
-            'date': birth_date.isoformat(),
-            'hour': birth_hour,
-            'gender': gender
-        },
-        'four_pillars': pillars_to_dict(pillars),
-        'day_master': {
-            'stem': day_master,
-            'stem_cn': pillars['day'].stem_cn,
-            'element': dm_element,
-            'polarity': pillars['day'].polarity,
-            'strength_pct': strength_pct,
-            'strength_category': strength_category.value
-        },
-        'useful_gods': useful_gods,
-        'profiles': {
-            'counts': profiles,
-            'percentages': profile_percentages,
-            'dominant': dominant_god,
-            'profile_name': profile_name
-        },
-        'luck_pillars': {
-            'direction': luck_direction,
-            'start_age': luck_pillars[0].start_age if luck_pillars else 0,
-            'pillars': [lp.to_dict() for lp in luck_pillars]
-        },
-        'interactions': {
-            'clashes': clashes,
-            'combines': combines,
-            'three_harmony': harmonies
-        },
-        'symbolic_stars': symbolic_stars,
-        'life_stages': life_stages,
-        'celestial_animal': {
-            'branch': pillars['year'].branch,
-            'animal': celestial_animal,
-            'chinese': '生肖'
-        },
-        # NEW: Life Star / Gua
-        'life_star': {
-            'gua_number': calculate_gua_number(birth_date.year, gender),
-            'gua_info': get_gua_info(calculate_gua_number(birth_date.year, gender))
-        },
-        # NEW: Eight Mansions
-        'eight_mansions': calculate_eight_mansions(calculate_gua_number(birth_date.year, gender)),
-        # NEW: Five Structures
-        'five_structures': calculate_five_structures(profiles),
-        # NEW: Hidden Stems Analysis with explanations
-        'hidden_stems_analysis': get_pillar_hidden_stem_analysis(pillars, day_master),
-        # NEW: 12 Life Stages Wheel
-        'twelve_stages_wheel': get_twelve_stages_wheel(day_master),
-        # NEW: 6 Aspects Chart
-        'six_aspects': calculate_six_aspects(profiles, gender),
-        # NEW: Annual Analysis
-        'annual_analysis': calculate_annual_analysis(day_master, profiles, 2026),
-        # NEW: Monthly Influence
-        'monthly_influence': calculate_monthly_influence(day_master, 2026),
-        # NEW: Current Luck Pillar
-        'current_luck': get_current_luck_pillar([lp.to_dict() for lp in luck_pillars], birth_date.year, 2026)
+        'hidden_slots': hidden_slots,
+        'stem_support': stem_support,
+        'branch_support': branch_support,
+        'seasonal': seasonal,
+        'hidden_counts': hidden_counts,
+        'hidden_weights': hidden_weights,
+        'joey_yap_order': np.array([TEN_GOD_INDEX[god] for god in JOEY_YAP_PROFILE_ORDER]),
     }
 
+
+_STRENGTH_PROFILE_TABLES = _strength_profile_tables() if NUMPY_AVAILABLE else None
+
+
+def calculate_dm_strength_batch(pillars: Dict) -> Tuple:
+    """
+    Vectorized calculate_dm_strength.
+    
+    Args:
+        pillars: Dict of stem/branch index arrays as returned by
+            calculate_four_pillars_batch
+    
+    Returns (strength_pct float64 array, strength_category int8 array of
+    indexes into DM_STRENGTH_LEVELS); identical to the scalar results.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("calculate_dm_strength_batch requires numpy")
+    
+    tables = _STRENGTH_PROFILE_TABLES
+    stems = {name: np.asarray(pillars[f'{name}_stem'], dtype=np.int64) for name in _PILLAR_NAMES}
+    branches = {name: np.asarray(pillars[f'{name}_branch'], dtype=np.int64) for name in _PILLAR_NAMES}
+    dm_element = stems['day'] // 2
+    stem_support = tables['stem_support'][dm_element]
+    
+    # 1. Seasonal strength (40%)
+    score = tables['seasonal'][branches['month'], dm_element] * 0.40
+    
+    # 2. Hidden stems (30%) - accumulated slot by slot, in pillar order
+    hidden_support = np.zeros(len(dm_element))
+    hidden_total = np.zeros(len(dm_element), dtype=np.int64)
+    for name in _PILLAR_NAMES:
+        slots = tables['hidden_slots'][branches[name]]
+        hidden_total += (slots >= 0).sum(axis=1)
+        for k in range(3):
+            hidden_support = hidden_support + np.take_along_axis(stem_support, slots[:, k:k + 1], axis=1)[:, 0]
+    score = score + (hidden_support / hidden_total) * 0.30
+    
+    # 3. Visible stems (20%)
+    visible_support = np.zeros(len(dm_element))
+    for name in ('year', 'month', 'hour'):
+        visible_support = visible_support + np.take_along_axis(stem_support, stems[name][:, None], axis=1)[:, 0]
+    score = score + (visible_support / 3) * 0.20
+    
+    # 4. Hour branch (10%)
+    score = score + tables['branch_support'][dm_element, branches['hour']]
+    
+    percentage = np.minimum(score * 100, 100)
+    category = np.searchsorted(np.array([20, 40, 60, 80]), percentage, side='left').astype(np.int8)
+    
+    # Python's round() on the few distinct values keeps results identical
+    values, inverse = np.unique(percentage, return_inverse=True)
+    rounded = np.array([round(v, 1) for v in values.tolist()], dtype=np.float64)
+    return rounded[inverse.reshape(-1)], category
+
+
+def calculate_profiles_batch(pillars: Dict) -> Tuple:
+    """
+    Vectorized calculate_ten_profiles and calculate_profile_percentages_joey_yap.
+    
+    Args:
+        pillars: Dict of stem/branch index arrays as returned by
+            calculate_four_pillars_batch
+    
+    Returns (counts, percentages, dominant): (rows, 10) int8 counts and
+    float64 percentages in TEN_GODS order, and the dominant profile as an
+    index into TEN_GODS; identical to the scalar results.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("calculate_profiles_batch requires numpy")
+    
+    tables = _STRENGTH_PROFILE_TABLES
+    day_master = np.asarray(pillars['day_stem'], dtype=np.int64)
+    n = len(day_master)
+    rows = np.arange(n)
+    
+    counts = np.zeros((n, 10), dtype=np.int8)
+    scores = np.zeros((n, 10))
+    
+    # Visible stems (excluding Day Master)
+    for name, weight in JOEY_YAP_VISIBLE_WEIGHTS.items():
+        god = TEN_GOD_CODE_ARRAY[day_master, np.asarray(pillars[f'{name}_stem'], dtype=np.int64)]
+        counts[rows, god] += 1
+        scores[rows, god] += weight
+    
+    # Hidden stems, one (Day Master, branch) contribution vector per pillar
+    for p, name in enumerate(_PILLAR_NAMES):
+        branch = np.asarray(pillars[f'{name}_branch'], dtype=np.int64)
+        counts += tables['hidden_counts'][day_master, branch]
+        scores = scores + tables['hidden_weights'][p, day_master, branch]
+    
+    max_score = scores.max(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentages = np.where((scores > 0) & (max_score > 0), np.round((scores / max_score) * 98, 0), 0.0)
+    
+    # First maximum in Joey Yap display order, as get_dominant_profile_joey_yap
+    order = tables['joey_yap_order']
+    dominant = order[np.argmax(percentages[:, order], axis=1)].astype(np.int8)
+    return counts, percentages, dominant
+
+
+def _analyze_bazi_columns(dates, hours, genders: List[str], num_luck_pillars: int) -> Dict:
+    """Columnar analysis of one chunk of birth records"""
+    columns = calculate_four_pillars_batch(dates, hours)
+    n = len(dates)
+    
+    strength_pct, strength_category = calculate_dm_strength_batch(columns)
+    columns['strength_pct'] = strength_pct
+    columns['strength_category'] = strength_category
+    columns['profile_counts'], columns['profile_percentages'], columns['dominant_profile'] = calculate_profiles_batch(columns)
+    
+    # Useful gods depend only on (Day Master element, strength category)
+    dm_element = (columns['day_stem'] // 2).astype(np.int8)
+    columns['dm_element'] = dm_element
+    useful_table = np.zeros((5, len(DM_STRENGTH_LEVELS), 5), dtype=bool)
+    unfavorable_table = np.zeros_like(useful_table)
+    for e, element in enumerate(FIVE_ELEMENTS):
+        for c, category in enumerate(DM_STRENGTH_LEVELS):
+            gods = determine_useful_gods(element, category)
+            useful_table[e, c, [ELEMENT_INDEX[x] for x in gods['useful']]] = True
+            unfavorable_table[e, c, [ELEMENT_INDEX[x] for x in gods['unfavorable']]] = True
+    columns['useful'] = useful_table[dm_element, strength_category]
+    columns['unfavorable'] = unfavorable_table[dm_element, strength_category]
+    
+    # Luck pillars: direction from gender + year polarity, then step from the month pillar
+    gender_lower = np.array([g.lower() for g in genders])
+    yang_year = columns['year_stem'] % 2 == 0
+    forward = ((gender_lower == 'male') & yang_year) | ((gender_lower == 'female') & ~yang_year)
+    columns['luck_forward'] = forward
+    
+    # Start age: distance to the Jie instant bounding the natal month (as
+    # calculate_luck_start; term instants are cached per year)
+    births = dates.astype('datetime64[s]') + hours.astype('timedelta64[h]')
+    birth_years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    years = range(int(birth_years.min()) - 1, int(birth_years.max()) + 2) if n else ()
+    terms = [term for year in years for term in get_solar_term_instants(year)]
+    term_instants = np.array([instant for instant, _ in terms], dtype='datetime64[s]')
+    term_months = np.array([bazi_month for _, bazi_month in terms], dtype=np.int8)
+    natal_month = (columns['month_branch'].astype(np.int64) - 2) % 12 + 1
+    target = np.where(forward, natal_month % 12 + 1, natal_month)
+    nearest = np.searchsorted(term_instants, births, side='right') - ~forward
+    term_idx = nearest + _term_offset(target, term_months[nearest].astype(np.int64))
+    seconds = (term_instants[term_idx] - births).astype(np.int64)
+    minutes = np.maximum(np.where(forward, seconds, -seconds), 0) / 60
+    columns['luck_start_age'] = np.rint(minutes / (3 * 1440)).astype(np.int16)
+    columns['luck_term_instant'] = term_instants[term_idx]
+    columns['luck_term_month'] = term_months[term_idx]
+    
+    steps = np.arange(1, num_luck_pillars + 1)
+    steps = np.where(forward[:, None], steps, -steps)
+    columns['luck_stems'] = ((columns['month_stem'][:, None] + steps) % 10).astype(np.int8)
+    columns['luck_branches'] = ((columns['month_branch'][:, None] + steps) % 12).astype(np.int8)
+    
+    return columns
+
+
+def _iter_batch_rows(dates, hours, genders: List[str], columns: Dict):
+    """Expand one chunk of batch columns into analyze_bazi-style dicts"""
+    lists = {key: values.tolist() for key, values in columns.items()}
+    
+    for i, birth_date in enumerate(dates.astype(object)):
+        pillars = {
+            name: Pillar(
+                HEAVENLY_STEMS[lists[f'{name}_stem'][i]],
+                EARTHLY_BRANCHES[lists[f'{name}_branch'][i]],
+                name.capitalize()
+            )
+            for name in _PILLAR_NAMES
+        }
+        day_pillar = pillars['day']
+        category = DM_STRENGTH_LEVELS[lists['strength_category'][i]]
+        percentages = lists['profile_percentages'][i]
+        dominant = TEN_GODS[lists['dominant_profile'][i]]
+        
+        start_age = lists['luck_start_age'][i]
+        luck_pillars = []
+        for k, (stem_idx, branch_idx) in enumerate(zip(lists['luck_stems'][i], lists['luck_branches'][i])):
+            luck_pillars.append(LuckPillar(
+                pillar=Pillar(HEAVENLY_STEMS[stem_idx], EARTHLY_BRANCHES[branch_idx], f"LP{k+1}"),
+                start_age=start_age + k * 10,
+                end_age=start_age + k * 10 + 9
+            ).to_dict())
+        
+        yield {
+            'birth_info': {
+                'date': birth_date.isoformat(),
+                'hour': int(hours[i]),
+                'minute': 0,
+                'gender': genders[i]
+            },
+            'four_pillars': pillars_to_dict(pillars),
+            'day_master': {
+                'stem': day_pillar.stem,
+                'stem_cn': day_pillar.stem_cn,
+                'element': day_pillar.element,
+                'polarity': day_pillar.polarity,
+                'strength_pct': lists['strength_pct'][i],
+                'strength_category': category.value
+            },
+            'useful_gods': determine_useful_gods(day_pillar.element, category),
+            'profiles': {
+                'counts': dict(zip(TEN_GODS, lists['profile_counts'][i])),
+                'percentages': {
+                    god: percentages[TEN_GOD_INDEX[god]] or 0 for god in JOEY_YAP_PROFILE_ORDER
+                },
+                'dominant': dominant,
+                'profile_name': PROFILE_NAMES.get(dominant, dominant)
+            },
+            'luck_pillars': {
+                'direction': "Forward" if lists['luck_forward'][i] else "Reverse",
+                'start_age': start_age if luck_pillars else 0,
+                'start_detail': _luck_start_detail(
+                    datetime.combine(birth_date, time(int(hours[i]))),
+                    lists['luck_term_instant'][i],
+                    lists['luck_term_month'][i],
+                    lists['luck_forward'][i]
+                ),
+                'pillars': luck_pillars
+            },
+        }
+
+
+def _iter_bazi_batch(dates, hours, genders: List[str], num_luck_pillars: int, chunk_size: int):
+    for start in range(0, len(dates), chunk_size):
+        stop = start + chunk_size
+        chunk = (dates[start:stop], hours[start:stop], genders[start:stop])
+        columns = _analyze_bazi_columns(*chunk, num_luck_pillars)
+        yield from _iter_batch_rows(*chunk, columns)
+
+
+def analyze_bazi_batch(
+    birth_dates,
+    birth_hours,
+    genders,
+    num_luck_pillars: int = 8,
+    as_dicts: bool = False,
+    chunk_size: int = 10000
+):
+    """
+    BaZi analysis for a whole cohort of birth records.
+    
+    Pillars, DM strength, profiles and luck pillars are all calculated
+    with array arithmetic over the whole cohort.
+    
+    Args:
+        birth_dates: Sequence of dates (or a numpy datetime64 array)
+        birth_hours: Sequence of birth hours (0-23)
+        genders: Sequence of 'male'/'female', or a single value for all rows
+        num_luck_pillars: Number of luck pillars per row
+        as_dicts: If True, return a generator of per-row dicts with the
+            BATCH_SECTIONS of analyze_bazi, calculated chunk by chunk
+        chunk_size: Rows per chunk when streaming dicts
+    
+    Returns dict of numpy arrays (one row per birth record):
+        year_stem ... hour_branch: stem/branch indexes
+        dm_element: index into FIVE_ELEMENTS
+        strength_pct, strength_category (index into DM_STRENGTH_LEVELS)
+        useful, unfavorable: (rows, 5) bool masks over FIVE_ELEMENTS
+        profile_counts, profile_percentages: (rows, 10) in TEN_GODS order
+        dominant_profile: index into TEN_GODS
+        luck_forward, luck_start_age
+        luck_term_instant, luck_term_month: the solar term the start age
+            is counted to (datetime64 / BaZi month)
+        luck_stems, luck_branches: (rows, num_luck_pillars) indexes
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("analyze_bazi_batch requires numpy")
+    
+    dates = np.asarray(birth_dates, dtype='datetime64[D]').reshape(-1)
+    hours = np.asarray(birth_hours, dtype=np.int64).reshape(-1)
+    if isinstance(genders, str):
+        genders = [genders] * len(dates)
+    genders = list(genders)
+    if not len(dates) == len(hours) == len(genders):
+        raise ValueError("birth_dates, birth_hours and genders must have the same length")
+    
+    if as_dicts:
+        return _iter_bazi_batch(dates, hours, genders, num_luck_pillars, chunk_size)
+    return _analyze_bazi_columns(dates, hours, genders, num_luck_pillars)
+
+# =============================================================================
+# REVERSE PILLAR SEARCH (四柱反推)
+# =============================================================================
+
+def _pillar_indexes(pillar) -> Tuple[int, int]:
+    """
+    (stem_idx, branch_idx) for a Pillar, a (stem, branch) pair, or a
+    string such as 'Jia Zi', 'Jia-Zi' or '甲子'.
+    """
+    if isinstance(pillar, Pillar):
+        return pillar._stem_idx, pillar._branch_idx
+    if isinstance(pillar, str):
+        if len(pillar) == 2 and pillar[0] in HEAVENLY_STEMS_CN:
+            return HEAVENLY_STEMS_CN.index(pillar[0]), EARTHLY_BRANCHES_CN.index(pillar[1])
+        pillar = pillar.replace('-', ' ').split()
+    stem, branch = pillar
+    return STEM_INDEX[stem.capitalize()], BRANCH_INDEX[branch.capitalize()]
+
+
+def _month_spans() -> Dict[Tuple[int, int], List[Tuple[int, int, int]]]:
+    """
+    Calendar spans of each BaZi month.
+    
+    Maps (year_offset, bazi_month) -> [(month, first_day, last_day), ...],
+    where year_offset is -1 for dates before Li Chun (they belong to the
+    previous BaZi year) and 0 otherwise.
+    """
+    li_chun_month, li_chun_day = SOLAR_TERMS[1]
+    spans = {}
+    for month in range(1, 13):
+        for day in range(1, 32):
+            if day > (29 if month == 2 else 30 if month in (4, 6, 9, 11) else 31):
+                break
+            offset = -1 if (month, day) < (li_chun_month, li_chun_day) else 0
+            month_spans = spans.setdefault((offset, BAZI_MONTH_TABLE[month][day]), [])
+            if month_spans and month_spans[-1][0] == month and month_spans[-1][2] == day - 1:
+                month_spans[-1] = (month, month_spans[-1][1], day)
+            else:
+                month_spans.append((month, day, day))
+    return spans
+
+
+_BAZI_MONTH_SPANS = _month_spans()
+_DAY_CYCLE_EPOCH = date(1900, 1, 1).toordinal() - 10  # ordinal of a Jia Zi day
+
+
+def find_datetimes_for_pillars(
+    year,
+    month,
+    day,
+    hour,
+    start: int = 1900,
+    end: int = 2100
+) -> List[datetime]:
+    """
+    Find every birth datetime that produces the given Four Pillars.
+    
+    Solved with sexagenary arithmetic instead of scanning dates: the year
+    pillar fixes the BaZi year modulo 60, the month pillar picks one solar
+    month in that year, the day pillar repeats every 60 days so at most one
+    day of that month matches, and the hour pillar picks the hours.
+    
+    Args:
+        year, month, day, hour: Pillars as Pillar objects, (stem, branch)
+            pairs, or strings like 'Jia Zi' / '甲子'
+        start, end: Calendar year range to search (inclusive)
+    
+    Returns sorted list of datetimes (one per matching clock hour). Empty
+    if the pillars are not a possible combination.
+    """
+    indexes = [_pillar_indexes(p) for p in (year, month, day, hour)]
+    if any(s % 2 != b % 2 for s, b in indexes):
+        return []
+    (year_stem, year_branch), (month_stem, month_branch), (day_stem, day_branch), (hour_stem, hour_branch) = indexes
+    
+    # Month stem follows from the year stem (5-Tiger), hour stem from the day stem (5-Rat)
+    bazi_month = (month_branch - 2) % 12 + 1
+    if month_stem != ((year_stem * 2 + 2) + bazi_month - 1) % 10:
+        return []
+    if hour_stem != ((day_stem % 5) * 2 + hour_branch) % 10:
+        return []
+    hours = (0, 23) if hour_branch == 0 else (hour_branch * 2 - 1, hour_branch * 2)
+    
+    year_cycle = _cycle_index(year_stem, year_branch)
+    day_cycle = _cycle_index(day_stem, day_branch)
+    
+    # First BaZi year >= start - 1 with the right year pillar, then every 60 years
+    first_bazi_year = start - 1 + (year_cycle - (start - 1 - 4)) % 60
+    
+    results = []
+    for bazi_year in range(first_bazi_year, end + 1, 60):
+        for offset in (0, -1):
+            calendar_year = bazi_year - offset
+            if not start <= calendar_year <= end or not MINYEAR <= calendar_year <= MAXYEAR:
+                continue
+            for cal_month, first_day, last_day in _BAZI_MONTH_SPANS.get((offset, bazi_month), []):
+                first = date(calendar_year, cal_month, first_day).toordinal()
+                ordinal = first + (day_cycle - (first - _DAY_CYCLE_EPOCH)) % 60
+                if ordinal - first > last_day - first_day:
+                    continue
+                match = date.fromordinal(ordinal)
+                if match.month != cal_month:  # Feb 29 in a common year
+                    continue
+                results.extend(datetime(match.year, match.month, match.day, h) for h in hours)
+    
+    return sorted(results)
+
+
 # =============================================================================
 # VALIDATION / TESTING
 # =============================================================================
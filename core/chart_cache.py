@@ -0,0 +1,249 @@
+"""
+===============================================================================
+CHART CACHE - Shared, period-aligned caches for the engine entry points
+===============================================================================
+Ming QiMenDunJia 明奇门 - One result per chart period, for every session
+
+Streamlit reruns a page on every widget interaction, and every browser
+session runs in the same process. These caches live at module level, so
+identical requests - from one rerun to the next or from different users -
+get one stored result:
+- QMDJ charts by period: (date, Chinese double hour, palace focus).
+  Every hour of a double hour gives the same chart, so a day is at most
+  12 entries. Metadata (requested time) is rebuilt on every hit.
+- BaZi analyses by birth key: (date, hour, minute, gender, sections)
+- Annual overviews by (year, Day Master, natal profile counts)
+
+Each cache is a bounded LRU with an expiry per entry:
+- Charts live until their double hour is over (or, for past periods,
+  from now) plus CHART_RETENTION_SECONDS
+- BaZi and annual entries live until the end of the calendar year (the
+  annual sections are tied to the current year)
+
+Hits return a shallow copy: top-level keys can be replaced freely, nested
+values are shared between callers and must be treated as read-only.
+
+Version: 1.0
+===============================================================================
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from .bazi_calculator import (
+    analyze_bazi,
+    calculate_annual_pillar,
+    calculate_annual_profile_influence,
+    calculate_annual_six_aspects,
+    calculate_annual_ten_gods,
+    calculate_monthly_influence,
+    calculate_six_aspects,
+)
+from .qmdj_engine import SGT, chart_metadata, generate_qmdj_chart
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+# Explicit size limits (entries)
+CHART_CACHE_SIZE = 2048      # ~170 days of double hours
+BAZI_CACHE_SIZE = 1024
+ANNUAL_CACHE_SIZE = 1024
+
+# How long a chart outlives its double hour
+CHART_RETENTION_SECONDS = 2 * 3600
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class PeriodCache:
+    """
+    Thread-safe bounded LRU cache whose entries expire at a given time.
+
+    Values are stored as-is (not copied); the cached_* helpers below hand
+    out shallow copies.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        """Cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, value, expires_at: float = float('inf')):
+        """Store value until expires_at (epoch seconds), evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable, expires_at: Callable[[], float]):
+        """
+        Cached value for key, calling compute() on a miss.
+
+        expires_at is called after compute() so the expiry is measured
+        from when the value was stored.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value, expires_at())
+        return value
+
+    def purge(self) -> int:
+        """Drop expired entries; returns how many were dropped"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+_MISSING = object()
+
+CHART_CACHE = PeriodCache(CHART_CACHE_SIZE)
+BAZI_RESULT_CACHE = PeriodCache(BAZI_CACHE_SIZE)
+ANNUAL_CACHE = PeriodCache(ANNUAL_CACHE_SIZE)
+
+
+# =============================================================================
+# PERIODS
+# =============================================================================
+
+def chart_period(dt: datetime) -> Tuple[date, int]:
+    """
+    (date, double-hour index) of a chart time; 23:00 and 00:00 on the same
+    date are both Zi (0), as in the engine.
+    """
+    return dt.date(), (dt.hour + 1) // 2 % 12
+
+
+def period_end(dt: datetime) -> datetime:
+    """End of the double hour containing dt (tz-aware)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=SGT)
+    start = dt.replace(minute=0, second=0, microsecond=0)
+    if dt.hour == 23:
+        return start + timedelta(hours=1)
+    # Double hours start on odd hours (Zi is split around midnight)
+    return start + timedelta(hours=1 if dt.hour % 2 == 0 else 2)
+
+
+def _year_end(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(SGT)
+    return datetime(now.year + 1, 1, 1, tzinfo=SGT).timestamp()
+
+
+# =============================================================================
+# CACHED ENTRY POINTS
+# =============================================================================
+
+def cached_qmdj_chart(dt: datetime = None, palace_focus: int = None) -> Dict:
+    """
+    generate_qmdj_chart() served from CHART_CACHE.
+
+    Same result as the engine, with metadata for the requested dt.
+    """
+    if dt is None:
+        dt = datetime.now(SGT)
+    elif dt.tzinfo is None:
+        dt = dt.replace(tzinfo=SGT)
+
+    chart = CHART_CACHE.get_or_compute(
+        (chart_period(dt), palace_focus),
+        lambda: generate_qmdj_chart(dt, palace_focus),
+        lambda: max(period_end(dt).timestamp(), time.time()) + CHART_RETENTION_SECONDS,
+    )
+    chart = dict(chart)
+    chart['metadata'] = chart_metadata(dt)
+    return chart
+
+
+def cached_analyze_bazi(
+    birth_date: date,
+    birth_hour: int,
+    gender: str = 'male',
+    sections: Optional[Sequence[str]] = None,
+    birth_minute: int = 0
+) -> Dict:
+    """analyze_bazi() served from BAZI_RESULT_CACHE (keyed by birth details and sections)"""
+    key = (birth_date, birth_hour, birth_minute, gender, tuple(sections) if sections is not None else None)
+    result = BAZI_RESULT_CACHE.get_or_compute(
+        key,
+        lambda: analyze_bazi(birth_date, birth_hour, gender, sections=sections, birth_minute=birth_minute),
+        _year_end,
+    )
+    return dict(result)
+
+
+def cached_annual_overview(year: int, day_master: str, profile_counts: Dict[str, int],
+                           profile_percentages: Dict[str, float]) -> Dict:
+    """
+    Annual pillar, Ten Gods, profile influence, six aspects (natal and
+    annual) and monthly influence for one chart and year, from ANNUAL_CACHE.
+    """
+    key = (year, day_master, tuple(sorted(profile_counts.items())), tuple(sorted(profile_percentages.items())))
+
+    def compute():
+        annual_pillar = calculate_annual_pillar(year)
+        annual_profile_pcts = calculate_annual_profile_influence(profile_counts, annual_pillar, day_master)
+        natal_six_aspects = calculate_six_aspects(profile_percentages)
+        return {
+            'annual_pillar': annual_pillar,
+            'annual_gods': calculate_annual_ten_gods(day_master, annual_pillar),
+            'annual_profile_pcts': annual_profile_pcts,
+            'natal_six_aspects': natal_six_aspects,
+            'annual_six_aspects': calculate_annual_six_aspects(natal_six_aspects, annual_profile_pcts),
+            'monthly': calculate_monthly_influence(year, day_master),
+        }
+
+    return dict(ANNUAL_CACHE.get_or_compute(key, compute, _year_end))
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """Size and hit/miss counters of every shared cache"""
+    return {
+        'charts': CHART_CACHE.stats(),
+        'bazi': BAZI_RESULT_CACHE.stats(),
+        'annual': ANNUAL_CACHE.stats(),
+    }
+
+
+def clear_chart_caches():
+    """Empty every shared cache"""
+    CHART_CACHE.clear()
+    BAZI_RESULT_CACHE.clear()
+    ANNUAL_CACHE.clear()
@@ -0,0 +1,384 @@
+"""
+===============================================================================
+DATE SELECTION - 择日 Engine
+===============================================================================
+Ming QiMenDunJia 明奇门 - Rank days and hours for a BaZi profile
+
+Scores every day (and every two-hour Chinese hour) in a date range against
+a natal chart:
+- Branch clashes / combines / three harmony with the natal branches
+- Ten Gods of the day and hour stems (useful vs unfavorable elements)
+- QMDJ palace indicators (door, star, deity, emptiness, nobleman, horse)
+
+Day and hour pillars come from the batch pillar kernel, so scoring a range
+is a handful of array lookups. QMDJ charts are only generated for hours
+that can still make the top-N.
+
+Version: 1.0
+===============================================================================
+"""
+
+import heapq
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from .bazi_calculator import (
+    EARTHLY_BRANCHES,
+    HEAVENLY_STEMS,
+    HEAVENLY_STEMS_CN,
+    EARTHLY_BRANCHES_CN,
+    STEM_ELEMENTS,
+    BRANCH_ELEMENTS,
+    BRANCH_INDEX,
+    CLASH_MASKS,
+    COMBINE_MASKS,
+    HARMONY_MASKS,
+    STEM_INDEX,
+    TEN_GOD_MATRIX,
+    NUMPY_AVAILABLE,
+    calculate_four_pillars_batch,
+    np,
+)
+from .qmdj_engine import generate_qmdj_chart
+
+# =============================================================================
+# SCORING WEIGHTS
+# =============================================================================
+
+# How much an interaction with each natal branch counts
+NATAL_BRANCH_WEIGHTS = {'year': 1, 'month': 1, 'day': 2, 'hour': 1}
+
+CLASH_POINTS = -2
+COMBINE_POINTS = 2
+HARMONY_POINTS = 1
+
+# Day/hour stem element vs the profile's useful gods
+USEFUL_STEM_POINTS = 2
+UNFAVORABLE_STEM_POINTS = -2
+USEFUL_BRANCH_POINTS = 1
+UNFAVORABLE_BRANCH_POINTS = -1
+
+# Hour branch clashing the day branch of the same day
+HOUR_CLASHES_DAY_POINTS = -2
+
+# QMDJ palace indicators
+QMDJ_NATURE_POINTS = {
+    'door': {'Auspicious': 2, 'Inauspicious': -2},
+    'star': {'Auspicious': 1, 'Inauspicious': -1},
+    'deity': {'Auspicious': 1, 'Inauspicious': -1},
+}
+QMDJ_INDICATOR_POINTS = {
+    'is_empty': -2,
+    'has_nobleman': 1,
+    'has_horse_star': 1,
+}
+QMDJ_ELEMENT_POINTS = {'useful': 1, 'unfavorable': -1}
+
+# Bounds of qmdj score, used to stop generating charts early
+QMDJ_MAX_POINTS = (
+    sum(max(v.values()) for v in QMDJ_NATURE_POINTS.values())
+    + sum(v for v in QMDJ_INDICATOR_POINTS.values() if v > 0)
+    + QMDJ_ELEMENT_POINTS['useful']
+)
+
+# Clock hour used for each Chinese hour (Zi = 00:00, Chou = 01:00, ...)
+BRANCH_START_HOURS = [0] + [branch * 2 - 1 for branch in range(1, 12)]
+
+# =============================================================================
+# BRANCH RELATIONSHIP TABLES
+# =============================================================================
+
+def _branch_table(partner_masks: List[int]) -> List[List[int]]:
+    """12x12 0/1 table from per-branch partner bitmasks"""
+    return [[(mask >> b) & 1 for b in range(12)] for mask in partner_masks]
+
+
+CLASH_TABLE = _branch_table(CLASH_MASKS)
+COMBINE_TABLE = _branch_table(COMBINE_MASKS)
+HARMONY_TABLE = _branch_table(HARMONY_MASKS)
+
+# =============================================================================
+# PROFILE TABLES
+# =============================================================================
+
+def _profile_tables(profile: Dict) -> Dict:
+    """
+    Per-stem and per-branch score vectors for a natal chart.
+
+    profile needs 'four_pillars', 'day_master' and 'useful_gods' as
+    returned by analyze_bazi.
+    """
+    natal_branches = {
+        name: BRANCH_INDEX[p['branch']] for name, p in profile['four_pillars'].items()
+    }
+    useful = set(profile['useful_gods'].get('useful', []))
+    unfavorable = set(profile['useful_gods'].get('unfavorable', []))
+
+    def element_points(element: str, good: int, bad: int) -> int:
+        if element in useful:
+            return good
+        if element in unfavorable:
+            return bad
+        return 0
+
+    branch_points = []
+    for b in range(12):
+        points = 0
+        for name, natal in natal_branches.items():
+            weight = NATAL_BRANCH_WEIGHTS.get(name, 1)
+            points += weight * (
+                CLASH_POINTS * CLASH_TABLE[b][natal]
+                + COMBINE_POINTS * COMBINE_TABLE[b][natal]
+                + HARMONY_POINTS * HARMONY_TABLE[b][natal]
+            )
+        points += element_points(
+            BRANCH_ELEMENTS[EARTHLY_BRANCHES[b]], USEFUL_BRANCH_POINTS, UNFAVORABLE_BRANCH_POINTS
+        )
+        branch_points.append(points)
+
+    stem_points = [
+        element_points(STEM_ELEMENTS[stem], USEFUL_STEM_POINTS, UNFAVORABLE_STEM_POINTS)
+        for stem in HEAVENLY_STEMS
+    ]
+
+    return {
+        'natal_branches': natal_branches,
+        'useful': useful,
+        'unfavorable': unfavorable,
+        'gods': TEN_GOD_MATRIX[STEM_INDEX[profile['day_master']['stem']]],
+        'branch_points': np.array(branch_points, dtype=np.int16),
+        'stem_points': np.array(stem_points, dtype=np.int16),
+    }
+
+
+def _day_pillar_arrays(start: date, end: date) -> Dict:
+    """Day and hour pillar indexes for every day in [start, end] x 12 hours"""
+    num_days = (end - start).days + 1
+    if num_days <= 0:
+        raise ValueError("end date must not be before start date")
+    days = np.arange(num_days).astype('timedelta64[D]') + np.datetime64(start, 'D')
+    columns = calculate_four_pillars_batch(
+        np.repeat(days, 12),
+        np.tile(np.array(BRANCH_START_HOURS), num_days)
+    )
+    return {
+        'days': days,
+        'day_stem': columns['day_stem'][::12],
+        'day_branch': columns['day_branch'][::12],
+        'hour_stem': columns['hour_stem'].reshape(num_days, 12),
+        'hour_branch': columns['hour_branch'].reshape(num_days, 12),
+    }
+
+# =============================================================================
+# QMDJ INDICATORS
+# =============================================================================
+
+def score_qmdj_palace(chart: Dict, palace: Optional[int], tables: Dict) -> Dict:
+    """
+    Score the QMDJ indicators of one palace.
+
+    palace=None uses the hour's lead (Zhi Shi) palace.
+    """
+    if palace is None:
+        palace = chart.get('lead_indicators', {}).get('lead_stem_palace', 5)
+    palace_data = chart.get('palaces', {}).get(palace, {})
+
+    points = 0
+    for component, nature_points in QMDJ_NATURE_POINTS.items():
+        nature = palace_data.get(component, {}).get('nature', '')
+        points += nature_points.get(nature, 0)
+
+    indicators = palace_data.get('indicators', {})
+    for indicator, indicator_points in QMDJ_INDICATOR_POINTS.items():
+        if indicators.get(indicator):
+            points += indicator_points
+
+    palace_element = palace_data.get('palace_info', {}).get('element', '')
+    if palace_element in tables['useful']:
+        points += QMDJ_ELEMENT_POINTS['useful']
+    elif palace_element in tables['unfavorable']:
+        points += QMDJ_ELEMENT_POINTS['unfavorable']
+
+    return {
+        'palace': palace,
+        'score': points,
+        'door': palace_data.get('door', {}).get('name', ''),
+        'star': palace_data.get('star', {}).get('name', ''),
+        'deity': palace_data.get('deity', {}).get('name', ''),
+        'palace_element': palace_element,
+        'indicators': {k: v for k, v in indicators.items() if v},
+    }
+
+# =============================================================================
+# REASONS (only built for the returned results)
+# =============================================================================
+
+def _branch_reasons(branch_idx: int, label: str, tables: Dict) -> List[str]:
+    reasons = []
+    branch = EARTHLY_BRANCHES[branch_idx]
+    for name, natal in tables['natal_branches'].items():
+        natal_branch = EARTHLY_BRANCHES[natal]
+        if CLASH_TABLE[branch_idx][natal]:
+            reasons.append(f"{label} {branch} clashes natal {name} {natal_branch}")
+        if COMBINE_TABLE[branch_idx][natal]:
+            reasons.append(f"{label} {branch} combines natal {name} {natal_branch}")
+        if HARMONY_TABLE[branch_idx][natal]:
+            reasons.append(f"{label} {branch} in Three Harmony with natal {name} {natal_branch}")
+    return reasons
+
+
+def _stem_reason(stem_idx: int, label: str, tables: Dict) -> List[str]:
+    stem = HEAVENLY_STEMS[stem_idx]
+    element = STEM_ELEMENTS[stem]
+    god = tables['gods'][stem_idx]
+    if element in tables['useful']:
+        return [f"{label} stem {stem} ({god}) brings useful {element}"]
+    if element in tables['unfavorable']:
+        return [f"{label} stem {stem} ({god}) brings unfavorable {element}"]
+    return []
+
+
+def _pillar_chinese(stem_idx: int, branch_idx: int) -> str:
+    return f"{HEAVENLY_STEMS_CN[stem_idx]}{EARTHLY_BRANCHES_CN[branch_idx]}"
+
+# =============================================================================
+# DATE SELECTION
+# =============================================================================
+
+def rank_days(profile: Dict, start: date, end: date, top_n: int = 10) -> List[Dict]:
+    """
+    Rank the days in [start, end] for a BaZi profile (day pillar only).
+
+    Args:
+        profile: analyze_bazi result with 'four_pillars', 'day_master'
+            and 'useful_gods'
+        start, end: Date range (inclusive)
+        top_n: Number of days to return
+
+    Returns list of dicts (best first): date, score, day_pillar,
+    day_ten_god, reasons.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("rank_days requires numpy")
+
+    tables = _profile_tables(profile)
+    arrays = _day_pillar_arrays(start, end)
+    day_scores = (
+        tables['branch_points'][arrays['day_branch']]
+        + tables['stem_points'][arrays['day_stem']]
+    ).tolist()
+
+    best = heapq.nlargest(top_n, range(len(day_scores)), key=lambda i: (day_scores[i], -i))
+
+    results = []
+    for i in best:
+        stem_idx = int(arrays['day_stem'][i])
+        branch_idx = int(arrays['day_branch'][i])
+        results.append({
+            'date': start + timedelta(days=i),
+            'score': day_scores[i],
+            'day_pillar': _pillar_chinese(stem_idx, branch_idx),
+            'day_ten_god': tables['gods'][stem_idx],
+            'reasons': _stem_reason(stem_idx, 'Day', tables) + _branch_reasons(branch_idx, 'Day', tables),
+        })
+    return results
+
+
+def rank_hours(
+    profile: Dict,
+    start: date,
+    end: date,
+    top_n: int = 10,
+    palace: Optional[int] = None,
+    use_qmdj: bool = True
+) -> List[Dict]:
+    """
+    Rank every Chinese hour in [start, end] for a BaZi profile.
+
+    The BaZi score (day + hour pillar) is calculated for every hour with
+    array lookups. Hours are then visited best-first and a QMDJ chart is
+    only generated while an hour could still reach the top-N.
+
+    Args:
+        profile: analyze_bazi result with 'four_pillars', 'day_master'
+            and 'useful_gods'
+        start, end: Date range (inclusive)
+        top_n: Number of hours to return
+        palace: QMDJ palace to read (1-9); None uses each hour's lead palace
+        use_qmdj: Include QMDJ palace indicators in the score
+
+    Returns list of dicts (best first): datetime, score, bazi_score,
+    qmdj_score, day_pillar, hour_pillar, day_ten_god, hour_ten_god,
+    qmdj (palace details or None), reasons.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("rank_hours requires numpy")
+
+    tables = _profile_tables(profile)
+    arrays = _day_pillar_arrays(start, end)
+    branch_points = tables['branch_points']
+    stem_points = tables['stem_points']
+
+    day_branch = arrays['day_branch'][:, None]
+    hour_branch = arrays['hour_branch']
+    bazi_scores = (
+        branch_points[day_branch] + stem_points[arrays['day_stem'][:, None]]
+        + branch_points[hour_branch] + stem_points[arrays['hour_stem']]
+        + HOUR_CLASHES_DAY_POINTS * np.array(CLASH_TABLE, dtype=np.int16)[day_branch, hour_branch]
+    ).ravel()
+
+    # Best BaZi score first; ties keep chronological order
+    order = np.argsort(-bazi_scores, kind='stable').tolist()
+    bazi_scores = bazi_scores.tolist()
+
+    def slot_datetime(slot: int) -> datetime:
+        day_offset, branch = divmod(slot, 12)
+        slot_date = start + timedelta(days=day_offset)
+        return datetime(slot_date.year, slot_date.month, slot_date.day, BRANCH_START_HOURS[branch])
+
+    heap = []  # (score, -slot, qmdj) min-heap of the current top-N
+    for slot in order:
+        bazi_score = bazi_scores[slot]
+        if len(heap) >= top_n and bazi_score + (QMDJ_MAX_POINTS if use_qmdj else 0) < heap[0][0]:
+            break
+        qmdj = None
+        score = bazi_score
+        if use_qmdj:
+            qmdj = score_qmdj_palace(generate_qmdj_chart(slot_datetime(slot)), palace, tables)
+            score += qmdj['score']
+        item = (score, -slot, qmdj)
+        if len(heap) < top_n:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+
+    results = []
+    for score, neg_slot, qmdj in sorted(heap, key=lambda item: item[:2], reverse=True):
+        slot = -neg_slot
+        day_offset, branch = divmod(slot, 12)
+        day_stem = int(arrays['day_stem'][day_offset])
+        day_branch_idx = int(arrays['day_branch'][day_offset])
+        hour_stem = int(arrays['hour_stem'][day_offset, branch])
+
+        reasons = (
+            _stem_reason(day_stem, 'Day', tables) + _branch_reasons(day_branch_idx, 'Day', tables)
+            + _stem_reason(hour_stem, 'Hour', tables) + _branch_reasons(branch, 'Hour', tables)
+        )
+        if CLASH_TABLE[day_branch_idx][branch]:
+            reasons.append(f"Hour {EARTHLY_BRANCHES[branch]} clashes the day {EARTHLY_BRANCHES[day_branch_idx]}")
+        if qmdj:
+            reasons.append(f"QMDJ palace {qmdj['palace']}: {qmdj['door']} Door, {qmdj['star']} Star, {qmdj['deity']}")
+
+        results.append({
+            'datetime': slot_datetime(slot),
+            'score': score,
+            'bazi_score': bazi_scores[slot],
+            'qmdj_score': qmdj['score'] if qmdj else 0,
+            'day_pillar': _pillar_chinese(day_stem, day_branch_idx),
+            'hour_pillar': _pillar_chinese(hour_stem, branch),
+            'day_ten_god': tables['gods'][day_stem],
+            'hour_ten_god': tables['gods'][hour_stem],
+            'qmdj': qmdj,
+            'reasons': reasons,
+        })
+    return results
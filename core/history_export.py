@@ -0,0 +1,231 @@
+"""
+===============================================================================
+HISTORY EXPORT - Streaming JSONL / CSV export
+===============================================================================
+Ming QiMenDunJia 明奇门 - Bulk export of readings and charts
+
+Readings are pulled from the HistoryStore a batch at a time and encoded
+chunk by chunk, so memory stays flat however many years are exported:
+- JSONL: one JSON object per line
+- CSV: csv-module quoting (commas, quotes and newlines in notes survive)
+- Optional gzip on top of either format
+- Same filters as the History page (date range, verdict, outcome, ...)
+
+Any iterable of dicts (e.g. exported charts) can go through the same
+encoders with iter_export_records().
+
+Command line:
+    python -m core.history_export readings.jsonl.gz --from 2020-01-01 --to 2024-12-31
+
+Version: 1.0
+===============================================================================
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+from typing import Dict, IO, Iterable, Iterator, Optional, Sequence
+
+from .history_store import HistoryStore, get_history_store
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+EXPORT_FORMATS = ('jsonl', 'csv')
+
+EXPORT_MIME_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'gzip': 'application/gzip',
+}
+
+# CSV columns, in order; formations are joined with FORMATION_SEPARATOR
+CSV_COLUMNS = (
+    'id', 'created_at', 'date', 'time', 'palace', 'ju', 'lead_palace', 'star', 'door', 'deity',
+    'structure', 'score', 'verdict', 'outcome', 'notes', 'activity', 'source', 'formations',
+)
+FORMATION_SEPARATOR = '|'
+
+# Readings fetched from the store (and encoded) per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+
+# =============================================================================
+# ENCODERS
+# =============================================================================
+
+def _jsonl_chunks(records: Iterable[Dict], chunk_size: int) -> Iterator[str]:
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False, default=str))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_cell(value):
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return FORMATION_SEPARATOR.join(str(item) for item in value)
+
+
+def _csv_chunks(records: Iterable[Dict], columns: Sequence[str], chunk_size: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    rows = 0
+    for record in records:
+        # csv writes None as an empty cell; only lists and dicts need encoding
+        row = [record.get(column) for column in columns]
+        writer.writerow([
+            _csv_cell(value) if isinstance(value, (list, tuple, dict)) else value for value in row
+        ])
+        rows += 1
+        if rows >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_export_records(
+    records: Iterable[Dict],
+    fmt: str = 'jsonl',
+    compress: bool = False,
+    columns: Sequence[str] = CSV_COLUMNS,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Encode records as JSONL or CSV, yielding UTF-8 (optionally gzip) chunks.
+
+    Args:
+        records: Any iterable of dicts (consumed lazily)
+        fmt: 'jsonl' or 'csv'
+        compress: gzip the stream
+        columns: CSV columns (ignored for JSONL)
+        chunk_size: Records per chunk
+    """
+    if fmt == 'jsonl':
+        chunks = _jsonl_chunks(records, chunk_size)
+    elif fmt == 'csv':
+        chunks = _csv_chunks(records, columns, chunk_size)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}' (expected one of {EXPORT_FORMATS})")
+
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = gzip.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield gzip.flush()
+
+
+# =============================================================================
+# HISTORY EXPORT
+# =============================================================================
+
+def iter_history_export(
+    store: Optional[HistoryStore] = None,
+    fmt: str = 'jsonl',
+    compress: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    **filters
+) -> Iterator[bytes]:
+    """
+    Stream matching readings (oldest first) as JSONL or CSV chunks.
+
+    Args:
+        store: HistoryStore (defaults to get_history_store())
+        fmt, compress, chunk_size: See iter_export_records
+        **filters: verdict, outcome, palace, formation, date_from, date_to
+    """
+    store = store or get_history_store()
+    readings = store.iter_readings(batch_size=chunk_size, **filters)
+    return iter_export_records(readings, fmt, compress, chunk_size=chunk_size)
+
+
+def export_file_name(prefix: str, fmt: str, compress: bool = False, stamp: Optional[str] = None) -> str:
+    """e.g. ming_qimen_history_20250101.jsonl.gz"""
+    name = f"{prefix}_{stamp}" if stamp else prefix
+    return f"{name}.{fmt}{'.gz' if compress else ''}"
+
+
+def export_mime_type(fmt: str, compress: bool = False) -> str:
+    return EXPORT_MIME_TYPES['gzip' if compress else fmt]
+
+
+def write_export(chunks: Iterable[bytes], target) -> int:
+    """
+    Write export chunks to a path (atomically) or a binary file object.
+
+    Returns the number of bytes written.
+    """
+    if hasattr(target, 'write'):
+        return _write_chunks(chunks, target)
+
+    tmp_path = f"{target}.tmp"
+    with open(tmp_path, 'wb') as handle:
+        written = _write_chunks(chunks, handle)
+    os.replace(tmp_path, target)
+    return written
+
+
+def _write_chunks(chunks: Iterable[bytes], handle: IO[bytes]) -> int:
+    written = 0
+    for chunk in chunks:
+        handle.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def format_from_path(path: str):
+    """(fmt, compress) from a file name such as readings.csv.gz"""
+    compress = path.endswith('.gz')
+    stem = path[:-3] if compress else path
+    fmt = os.path.splitext(stem)[1].lstrip('.').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Cannot tell export format from '{path}' (use .jsonl or .csv, optionally .gz)")
+    return fmt, compress
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Stream the reading history to JSONL or CSV")
+    parser.add_argument('output', help="Output file (.jsonl, .csv, optionally .gz)")
+    parser.add_argument('--db', default=None, help="History database (defaults to HISTORY_DB_PATH)")
+    parser.add_argument('--from', dest='date_from', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', help="Last date (YYYY-MM-DD)")
+    parser.add_argument('--verdict')
+    parser.add_argument('--outcome')
+    args = parser.parse_args()
+
+    fmt, compress = format_from_path(args.output)
+    store = get_history_store(args.db) if args.db else get_history_store()
+    filters = {
+        key: value for key, value in (
+            ('date_from', args.date_from), ('date_to', args.date_to),
+            ('verdict', args.verdict), ('outcome', args.outcome),
+        ) if value
+    }
+
+    started = time.time()
+    written = write_export(iter_history_export(store, fmt, compress, **filters), args.output)
+    print(f"{store.count(**filters):,} readings -> {args.output} ({written:,} bytes) in {time.time() - started:.1f}s")
@@ -0,0 +1,437 @@
+"""
+===============================================================================
+HISTORY STORE - Persistent reading history
+===============================================================================
+Ming QiMenDunJia 明奇门 - SQLite-backed reading history
+
+Readings used to live only in st.session_state.reading_history and were
+lost on restart. This store keeps them in SQLite (WAL mode, so the page can
+read while a scan is being saved) with indexes on date, verdict, outcome,
+palace and formation:
+- Paginated, filtered queries (newest first)
+- Aggregate stats computed in SQL
+- Bulk insert for Strategic scans
+- Outcome counts per door/star/formation/... and columnar snapshots
+  (see outcome_analytics)
+
+A reading is a plain dict with the keys the History page has always used
+(date, time, palace, ju, lead_palace, star, door, score, verdict, outcome,
+notes) plus id, formations and any extra keys, which are kept as JSON.
+
+Version: 1.0
+===============================================================================
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+HISTORY_DB_PATH = os.environ.get(
+    'MING_QIMEN_HISTORY_DB',
+    os.path.join(os.path.expanduser('~'), '.ming_qimen', 'history.db')
+)
+
+OUTCOMES = ['PENDING', 'SUCCESS', 'PARTIAL', 'FAILURE', 'NOT_APPLICABLE']
+
+# Outcomes that count as resolved in success rates (not PENDING / NOT_APPLICABLE)
+RESOLVED_OUTCOMES = ('SUCCESS', 'PARTIAL', 'FAILURE')
+
+# Columns stored directly; everything else in a reading goes to `extra`
+READING_COLUMNS = (
+    'date', 'time', 'palace', 'ju', 'lead_palace', 'star', 'door', 'deity',
+    'score', 'verdict', 'outcome', 'notes', 'activity', 'source', 'structure',
+)
+
+# Columns outcome_counts() can group by (plus 'formation')
+GROUPABLE_COLUMNS = ('palace', 'ju', 'lead_palace', 'star', 'door', 'deity', 'verdict', 'activity', 'source', 'structure')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    date TEXT,
+    time TEXT,
+    palace INTEGER,
+    ju INTEGER,
+    lead_palace INTEGER,
+    star TEXT,
+    door TEXT,
+    deity TEXT,
+    score REAL,
+    verdict TEXT,
+    outcome TEXT NOT NULL DEFAULT 'PENDING',
+    notes TEXT NOT NULL DEFAULT '',
+    activity TEXT,
+    source TEXT,
+    extra TEXT,
+    structure TEXT
+);
+CREATE TABLE IF NOT EXISTS reading_formations (
+    reading_id INTEGER NOT NULL REFERENCES readings(id) ON DELETE CASCADE,
+    formation TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_readings_date ON readings(date, time);
+CREATE INDEX IF NOT EXISTS idx_readings_verdict ON readings(verdict);
+CREATE INDEX IF NOT EXISTS idx_readings_outcome ON readings(outcome);
+CREATE INDEX IF NOT EXISTS idx_readings_palace ON readings(palace);
+CREATE INDEX IF NOT EXISTS idx_formations_formation ON reading_formations(formation, reading_id);
+CREATE INDEX IF NOT EXISTS idx_formations_reading ON reading_formations(reading_id);
+"""
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class HistoryStore:
+    """
+    Reading history in a SQLite database.
+
+    One connection is shared by all Streamlit sessions of the process and
+    guarded by a lock; WAL mode lets other processes read concurrently.
+    Use ':memory:' as path for a throwaway store.
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after a database was created"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(readings)")}
+        if 'structure' not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE readings ADD COLUMN structure TEXT")
+                self._conn.execute(
+                    "UPDATE readings SET structure = json_extract(extra, '$.structure') WHERE extra IS NOT NULL"
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _row_values(reading: Dict, created_at: str) -> tuple:
+        extra = {
+            key: value for key, value in reading.items()
+            if key not in READING_COLUMNS and key not in ('id', 'created_at', 'formations')
+        }
+        values = [reading.get(column) for column in READING_COLUMNS]
+        values[READING_COLUMNS.index('outcome')] = reading.get('outcome') or 'PENDING'
+        values[READING_COLUMNS.index('notes')] = reading.get('notes') or ''
+        return (
+            reading.get('created_at', created_at),
+            *values,
+            json.dumps(extra, ensure_ascii=False, default=str) if extra else None,
+        )
+
+    def add_many(self, readings: Iterable[Dict]) -> List[int]:
+        """Insert readings in one transaction; returns their ids"""
+        created_at = datetime.now().isoformat(timespec='seconds')
+        placeholders = ', '.join('?' * (len(READING_COLUMNS) + 2))
+        sql = f"INSERT INTO readings (created_at, {', '.join(READING_COLUMNS)}, extra) VALUES ({placeholders})"
+
+        ids = []
+        with self._lock, self._conn:
+            for reading in readings:
+                cursor = self._conn.execute(sql, self._row_values(reading, created_at))
+                ids.append(cursor.lastrowid)
+                formations = reading.get('formations') or []
+                if formations:
+                    self._conn.executemany(
+                        "INSERT INTO reading_formations (reading_id, formation) VALUES (?, ?)",
+                        [(cursor.lastrowid, name) for name in formations]
+                    )
+            self._writes += 1
+        return ids
+
+    def add(self, reading: Dict) -> int:
+        """Insert one reading; returns its id"""
+        return self.add_many([reading])[0]
+
+    def update_outcome(self, reading_id: int, outcome: str, notes: Optional[str] = None):
+        """Record the outcome (and optionally notes) of a reading"""
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome '{outcome}' (expected one of {OUTCOMES})")
+        with self._lock, self._conn:
+            if notes is None:
+                self._conn.execute("UPDATE readings SET outcome = ? WHERE id = ?", (outcome, reading_id))
+            else:
+                self._conn.execute(
+                    "UPDATE readings SET outcome = ?, notes = ? WHERE id = ?", (outcome, notes, reading_id)
+                )
+            self._writes += 1
+
+    def clear(self):
+        """Delete every reading"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reading_formations")
+            self._conn.execute("DELETE FROM readings")
+            self._writes += 1
+
+    def data_version(self) -> tuple:
+        """
+        Change marker for the stored readings: differs after any write.
+
+        Writes through this store bump a counter; SQLite's data_version
+        changes when another connection (e.g. another process) commits.
+        Use it to key anything derived from the readings.
+        """
+        with self._lock:
+            return self._writes, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _where(
+        verdict: Optional[str] = None,
+        outcome: Optional[str] = None,
+        palace: Optional[int] = None,
+        formation: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ):
+        clauses, params = [], []
+        if verdict:
+            clauses.append("verdict = ?")
+            params.append(verdict)
+        if outcome:
+            clauses.append("outcome = ?")
+            params.append(outcome)
+        if palace:
+            clauses.append("palace = ?")
+            params.append(int(palace))
+        if formation:
+            clauses.append("id IN (SELECT reading_id FROM reading_formations WHERE formation = ?)")
+            params.append(formation)
+        if date_from:
+            clauses.append("date >= ?")
+            params.append(str(date_from))
+        if date_to:
+            clauses.append("date <= ?")
+            params.append(str(date_to))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _to_reading(self, row: sqlite3.Row, formations: List[str]) -> Dict:
+        reading = {'id': row['id'], 'created_at': row['created_at']}
+        for column in READING_COLUMNS:
+            if row[column] is not None:
+                reading[column] = row[column]
+        score = reading.get('score')
+        if isinstance(score, float) and score.is_integer():
+            reading['score'] = int(score)
+        reading['formations'] = formations
+        if row['extra']:
+            reading.update(json.loads(row['extra']))
+        return reading
+
+    def _formations_for(self, ids: List[int]) -> Dict[int, List[str]]:
+        formations = {reading_id: [] for reading_id in ids}
+        if ids:
+            placeholders = ', '.join('?' * len(ids))
+            for reading_id, name in self._conn.execute(
+                f"SELECT reading_id, formation FROM reading_formations WHERE reading_id IN ({placeholders}) ORDER BY rowid",
+                ids
+            ):
+                formations[reading_id].append(name)
+        return formations
+
+    def count(self, **filters) -> int:
+        """Number of readings matching the filters"""
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM readings{where}", params).fetchone()[0]
+
+    def query(self, limit: Optional[int] = 50, offset: int = 0, newest_first: bool = True, **filters) -> List[Dict]:
+        """
+        One page of readings.
+
+        Args:
+            limit, offset: Page window (limit=None for all)
+            newest_first: Order by reading date/time descending
+            **filters: verdict, outcome, palace, formation, date_from, date_to
+        """
+        where, params = self._where(**filters)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT * FROM readings{where} ORDER BY date {order}, time {order}, id {order}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [int(limit), int(offset)]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            formations = self._formations_for([row['id'] for row in rows])
+        return [self._to_reading(row, formations[row['id']]) for row in rows]
+
+    def iter_readings(self, batch_size: int = 500, newest_first: bool = False, **filters) -> Iterator[Dict]:
+        """
+        Stream every matching reading, batch_size rows at a time.
+
+        The ordered ids are read once up front and rows are then fetched by
+        id, so each batch costs the same however deep into the export it is
+        (OFFSET paging rescans every skipped row).
+        """
+        where, params = self._where(**filters)
+        order = "DESC" if newest_first else "ASC"
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                f"SELECT id FROM readings{where} ORDER BY date {order}, time {order}, id {order}", params
+            )]
+
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            placeholders = ', '.join('?' * len(batch))
+            with self._lock:
+                rows = {
+                    row['id']: row for row in
+                    self._conn.execute(f"SELECT * FROM readings WHERE id IN ({placeholders})", batch)
+                }
+                formations = self._formations_for(batch)
+            for reading_id in batch:
+                if reading_id in rows:  # Deleted since the ids were read
+                    yield self._to_reading(rows[reading_id], formations[reading_id])
+
+    def column_snapshot(self, **filters) -> Dict[str, List]:
+        """
+        Matching readings as parallel columns (oldest first).
+
+        Returns dict with 'id' and every READING_COLUMNS list, plus
+        'formation_reading' / 'formation' lists with one entry per
+        (reading id, formation) pair.
+        """
+        where, params = self._where(**filters)
+        columns = ('id',) + READING_COLUMNS
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM readings{where} ORDER BY date, time, id", params
+            ).fetchall()
+            pairs = self._conn.execute(
+                f"""SELECT reading_id, formation FROM reading_formations
+                    WHERE reading_id IN (SELECT id FROM readings{where}) ORDER BY rowid""",
+                params
+            ).fetchall()
+        snapshot = {column: [row[i] for row in rows] for i, column in enumerate(columns)}
+        snapshot['formation_reading'] = [reading_id for reading_id, _ in pairs]
+        snapshot['formation'] = [name for _, name in pairs]
+        return snapshot
+
+    def get(self, reading_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM readings WHERE id = ?", (reading_id,)).fetchone()
+            formations = self._formations_for([reading_id]) if row else {}
+        return self._to_reading(row, formations[reading_id]) if row else None
+
+    def stats(self, **filters) -> Dict:
+        """
+        Aggregate stats in one SQL pass.
+
+        Returns total, pending, resolved, success, partial, failure,
+        success_rate (successes over RESOLVED_OUTCOMES readings, in %) and
+        by_verdict counts.
+        """
+        where, params = self._where(**filters)
+        with self._lock:
+            row = self._conn.execute(
+                f"""SELECT COUNT(*),
+                           COALESCE(SUM(outcome = 'PENDING'), 0),
+                           COALESCE(SUM(outcome = 'SUCCESS'), 0),
+                           COALESCE(SUM(outcome = 'PARTIAL'), 0),
+                           COALESCE(SUM(outcome = 'FAILURE'), 0)
+                    FROM readings{where}""",
+                params
+            ).fetchone()
+            by_verdict = self._conn.execute(
+                f"SELECT COALESCE(verdict, 'NEUTRAL'), COUNT(*) FROM readings{where} GROUP BY 1 ORDER BY 2 DESC",
+                params
+            ).fetchall()
+
+        total, pending, success, partial, failure = row
+        resolved = success + partial + failure
+        return {
+            'total': total,
+            'pending': pending,
+            'resolved': resolved,
+            'success': success,
+            'partial': partial,
+            'failure': failure,
+            'success_rate': (success / resolved * 100) if resolved > 0 else 0,
+            'by_verdict': {verdict: count for verdict, count in by_verdict},
+        }
+
+    def outcome_counts(self, by: str, **filters) -> List[tuple]:
+        """
+        Outcome counts per value of one reading field, in one SQL pass.
+
+        Args:
+            by: 'formation' or a column in GROUPABLE_COLUMNS
+            **filters: Same as query()
+
+        Returns list of (value, total, success, partial, failure, not_applicable)
+        tuples; readings without a value for the field are skipped.
+        """
+        where, params = self._where(**filters)
+        if by == 'formation':
+            source = f"reading_formations f JOIN (SELECT id, outcome FROM readings{where}) r ON r.id = f.reading_id"
+            value, where = "f.formation", ""
+        elif by in GROUPABLE_COLUMNS:
+            source, value = "readings", by
+        else:
+            raise ValueError(f"Cannot group readings by '{by}'")
+        has_value = f"{value} IS NOT NULL AND {value} != ''"
+        where = f"{where} AND {has_value}" if where else f" WHERE {has_value}"
+        sql = f"""SELECT {value},
+                        COUNT(*),
+                        COALESCE(SUM(outcome = 'SUCCESS'), 0),
+                        COALESCE(SUM(outcome = 'PARTIAL'), 0),
+                        COALESCE(SUM(outcome = 'FAILURE'), 0),
+                        COALESCE(SUM(outcome = 'NOT_APPLICABLE'), 0)
+                 FROM {source}{where}
+                 GROUP BY 1"""
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(sql, params)]
+
+    def distinct(self, column: str) -> List:
+        """Distinct non-empty values of verdict, outcome, palace or formation (for filter widgets)"""
+        if column == 'formation':
+            sql = "SELECT DISTINCT formation FROM reading_formations ORDER BY 1"
+        elif column in ('verdict', 'outcome', 'palace'):
+            sql = f"SELECT DISTINCT {column} FROM readings WHERE {column} IS NOT NULL ORDER BY 1"
+        else:
+            raise ValueError(f"Cannot list distinct values of '{column}'")
+        with self._lock:
+            return [value for (value,) in self._conn.execute(sql)]
+
+
+_STORES: Dict[str, HistoryStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_history_store(path: str = HISTORY_DB_PATH) -> HistoryStore:
+    """Process-wide store for path, shared by every page and session"""
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = HistoryStore(path)
+        return store
@@ -0,0 +1,376 @@
+"""
+===============================================================================
+ML DATASET - Flat, typed chart features + outcomes
+===============================================================================
+Ming QiMenDunJia 明奇门 - Columnar export for model training
+
+Each reading is flattened into fixed, typed columns (no nested JSON):
+- Reading: date, minute of day, palace, score, verdict and outcome codes
+- QMDJ pillars: stem / branch index (0-9 / 0-11) of year, month, day, hour
+- Chart: structure (0 = Yin Dun, 1 = Yang Dun), ju, lead palace
+- Per palace 1-9: door, star and deity codes (their numbers in
+  EIGHT_DOORS / NINE_STARS / EIGHT_DEITIES) and empty / horse / nobleman flags
+- formations: bitset over FORMATIONS_DATABASE (bit i = i-th formation)
+- useful / unfavorable: BaZi element bitsets over ELEMENT_ORDER
+
+The chart is regenerated from each reading's date and hour (cached per
+Chinese hour), so readings saved before this module existed are covered.
+Rows are built and written in batches:
+- .parquet / .arrow (Arrow IPC / Feather v2) with pyarrow (optional)
+- .npz with numpy only
+
+Missing values are -1 in code columns.
+
+Command line:
+    python -m core.ml_dataset readings.parquet --from 2020-01-01
+
+Version: 1.0
+===============================================================================
+"""
+
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+from .formations import FORMATIONS_DATABASE
+from .history_store import OUTCOMES, HistoryStore, get_history_store
+from .qmdj_engine import (
+    EARTHLY_BRANCHES,
+    EIGHT_DEITIES,
+    EIGHT_DOORS,
+    HEAVENLY_STEMS,
+    NINE_STARS,
+    generate_qmdj_chart,
+)
+
+# =============================================================================
+# CODES
+# =============================================================================
+
+ELEMENT_ORDER = ('Wood', 'Fire', 'Earth', 'Metal', 'Water')
+
+# Ordinal verdict codes (0 = worst)
+VERDICT_ORDER = ('HIGHLY INAUSPICIOUS', 'INAUSPICIOUS', 'NEUTRAL', 'AUSPICIOUS', 'HIGHLY AUSPICIOUS')
+
+STRUCTURE_CODES = {'Yin Dun': 0, 'Yang Dun': 1}
+
+PILLAR_NAMES = ('Year', 'Month', 'Day', 'Hour')
+
+DOOR_CODES = {info['name']: number for number, info in EIGHT_DOORS.items()}
+STAR_CODES = {info['name']: number for number, info in NINE_STARS.items()}
+DEITY_CODES = {info['name']: number for number, info in EIGHT_DEITIES.items()}
+FORMATION_BITS = {formation.name_en: bit for bit, formation in enumerate(FORMATIONS_DATABASE)}
+
+_STEM_CODES = {stem: i for i, stem in enumerate(HEAVENLY_STEMS)}
+_BRANCH_CODES = {branch: i for i, branch in enumerate(EARTHLY_BRANCHES)}
+_VERDICT_CODES = {verdict: i for i, verdict in enumerate(VERDICT_ORDER)}
+_OUTCOME_CODES = {outcome: i for i, outcome in enumerate(OUTCOMES)}
+
+PALACES = range(1, 10)
+
+
+# =============================================================================
+# COLUMN LAYOUT
+# =============================================================================
+
+def _chart_columns() -> List[Tuple[str, str]]:
+    columns = []
+    for pillar in PILLAR_NAMES:
+        columns += [(f'{pillar.lower()}_stem', 'int8'), (f'{pillar.lower()}_branch', 'int8')]
+    columns += [('structure', 'int8'), ('ju', 'int8'), ('lead_palace', 'int8')]
+    for p in PALACES:
+        columns += [
+            (f'door_{p}', 'int8'), (f'star_{p}', 'int8'), (f'deity_{p}', 'int8'),
+            (f'empty_{p}', 'bool'), (f'horse_{p}', 'bool'), (f'nobleman_{p}', 'bool'),
+        ]
+    return columns
+
+
+# Columns derived from the regenerated chart, in order
+CHART_COLUMNS = tuple(_chart_columns())
+
+# Every dataset column and its numpy dtype, in file order
+ML_COLUMNS = (
+    ('reading_id', 'int64'),
+    ('date', 'datetime64[D]'),
+    ('minute', 'int16'),
+    ('palace', 'int8'),
+    ('score', 'float32'),
+    ('verdict', 'int8'),
+    ('outcome', 'int8'),
+) + CHART_COLUMNS + (
+    ('formations', 'uint64'),
+    ('useful', 'uint8'),
+    ('unfavorable', 'uint8'),
+)
+
+# Readings per written batch (one Parquet row group / Arrow record batch)
+ML_BATCH_SIZE = 10000
+
+ML_FORMATS = ('parquet', 'arrow', 'npz')
+
+
+# =============================================================================
+# FEATURES
+# =============================================================================
+
+@lru_cache(maxsize=8192)
+def _chart_features(day: str, hour: int) -> Tuple:
+    """CHART_COLUMNS values for one (date, Chinese hour); all -1 / False if unparseable"""
+    try:
+        chart = generate_qmdj_chart(datetime.strptime(f"{day} {hour:02d}", "%Y-%m-%d %H"))
+    except (TypeError, ValueError):
+        return tuple(False if dtype == 'bool' else -1 for _, dtype in CHART_COLUMNS)
+
+    values = []
+    for pillar in PILLAR_NAMES:
+        values += [
+            _STEM_CODES.get(chart['qmdj_pillars'][pillar]['stem'], -1),
+            _BRANCH_CODES.get(chart['qmdj_pillars'][pillar]['branch'], -1),
+        ]
+    values += [
+        STRUCTURE_CODES.get(chart['structure']['structure'], -1),
+        chart['structure']['ju_number'],
+        chart['lead_indicators']['lead_stem_palace'],
+    ]
+    for p in PALACES:
+        palace = chart['palaces'][p]
+        indicators = palace['indicators']
+        values += [
+            DOOR_CODES.get(palace['door']['name'], -1),
+            STAR_CODES.get(palace['star']['name'], -1),
+            DEITY_CODES.get(palace['deity']['name'], -1),
+            indicators['is_empty'], indicators['has_horse_star'], indicators['has_nobleman'],
+        ]
+    return tuple(values)
+
+
+def formation_bitset(names: Sequence[str]) -> int:
+    """Bitset over FORMATIONS_DATABASE; unknown names are ignored"""
+    bits = 0
+    for name in names or ():
+        bit = FORMATION_BITS.get(name)
+        if bit is not None:
+            bits |= 1 << bit
+    return bits
+
+
+def element_bitset(elements: Sequence[str]) -> int:
+    """Bitset over ELEMENT_ORDER; accepts 'Water', 'Yang Water', 'Water 水', ..."""
+    bits = 0
+    for text in elements or ():
+        for bit, element in enumerate(ELEMENT_ORDER):
+            if element.lower() in str(text).lower():
+                bits |= 1 << bit
+    return bits
+
+
+def _minute_of_day(text) -> int:
+    try:
+        hours, minutes = str(text).split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+    except (TypeError, ValueError):
+        return -1
+
+
+def reading_features(reading: Dict, profile: Optional[Dict] = None) -> Tuple:
+    """
+    One dataset row (values in ML_COLUMNS order) for a reading.
+
+    Useful / unfavorable elements come from the reading itself
+    ('useful_gods' / 'unfavorable') or else from profile.
+    """
+    profile = profile or {}
+    minute = _minute_of_day(reading.get('time'))
+    day = reading.get('date')
+    try:
+        date_value = np.datetime64(day, 'D')
+    except (TypeError, ValueError):
+        date_value = np.datetime64('NaT', 'D')
+
+    verdict = str(reading.get('verdict') or '').upper().replace('_', ' ')
+    return (
+        reading.get('id', -1),
+        date_value,
+        minute,
+        reading.get('palace') or -1,
+        reading['score'] if reading.get('score') is not None else np.nan,
+        _VERDICT_CODES.get(verdict, -1),
+        _OUTCOME_CODES.get(reading.get('outcome'), -1),
+    ) + _chart_features(day, minute // 60 if minute >= 0 else -1) + (
+        formation_bitset(reading.get('formations')),
+        element_bitset(reading.get('useful_gods', profile.get('useful_gods'))),
+        element_bitset(reading.get('unfavorable', profile.get('unfavorable'))),
+    )
+
+
+def features_to_columns(rows: List[Tuple]) -> Dict:
+    """Transpose reading_features rows into {column: typed numpy array}"""
+    if not NUMPY_AVAILABLE:
+        raise ImportError("features_to_columns requires numpy")
+    columns = list(zip(*rows)) if rows else [()] * len(ML_COLUMNS)
+    return {
+        name: np.array(values, dtype=dtype)
+        for (name, dtype), values in zip(ML_COLUMNS, columns)
+    }
+
+
+def iter_ml_batches(
+    store: Optional[HistoryStore] = None,
+    batch_size: int = ML_BATCH_SIZE,
+    profile: Optional[Dict] = None,
+    **filters
+) -> Iterator[Dict]:
+    """
+    Yield the dataset batch by batch as {column: numpy array} dicts.
+
+    Args:
+        store: HistoryStore (defaults to get_history_store())
+        batch_size: Readings per batch
+        profile: BaZi profile with useful_gods / unfavorable elements for
+            readings that don't carry their own
+        **filters: verdict, outcome, palace, formation, date_from, date_to
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("iter_ml_batches requires numpy")
+    store = store or get_history_store()
+    rows = []
+    for reading in store.iter_readings(batch_size=min(batch_size, 1000), **filters):
+        rows.append(reading_features(reading, profile))
+        if len(rows) >= batch_size:
+            yield features_to_columns(rows)
+            rows = []
+    if rows:
+        yield features_to_columns(rows)
+
+
+# =============================================================================
+# WRITE / LOAD
+# =============================================================================
+
+def arrow_schema():
+    """pyarrow schema of ML_COLUMNS"""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("arrow_schema requires pyarrow")
+    return pa.schema([(name, pa.from_numpy_dtype(np.dtype(dtype))) for name, dtype in ML_COLUMNS])
+
+
+def ml_format_from_path(path: str) -> str:
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    fmt = 'arrow' if fmt == 'feather' else fmt
+    if fmt not in ML_FORMATS:
+        raise ValueError(f"Cannot tell dataset format from '{path}' (use .parquet, .arrow / .feather or .npz)")
+    return fmt
+
+
+def write_ml_dataset(
+    path: str,
+    store: Optional[HistoryStore] = None,
+    batch_size: int = ML_BATCH_SIZE,
+    profile: Optional[Dict] = None,
+    **filters
+) -> int:
+    """
+    Write the dataset to path (format from the extension, written atomically).
+
+    Parquet gets one row group and Arrow IPC one record batch per
+    batch_size readings; .npz is assembled from the typed batches.
+    Returns the number of rows written.
+    """
+    fmt = ml_format_from_path(path)
+    if fmt != 'npz' and not PYARROW_AVAILABLE:
+        raise ImportError(f"Writing .{fmt} datasets requires pyarrow (or use .npz)")
+    batches = iter_ml_batches(store, batch_size, profile, **filters)
+
+    rows = 0
+    tmp_path = f"{path}.tmp"
+    if fmt == 'npz':
+        parts = {name: [] for name, _ in ML_COLUMNS}
+        for batch in batches:
+            for name, values in batch.items():
+                parts[name].append(values)
+            rows += len(batch['reading_id'])
+        columns = {
+            name: np.concatenate(values) if values else np.array([], dtype=dtype)
+            for (name, dtype), values in zip(ML_COLUMNS, parts.values())
+        }
+        with open(tmp_path, 'wb') as handle:
+            np.savez_compressed(handle, **columns)
+    else:
+        schema = arrow_schema()
+        writer = pq.ParquetWriter(tmp_path, schema) if fmt == 'parquet' else pa.ipc.new_file(tmp_path, schema)
+        try:
+            for batch in batches:
+                record_batch = pa.record_batch([batch[name] for name, _ in ML_COLUMNS], schema=schema)
+                if fmt == 'parquet':
+                    writer.write_table(pa.Table.from_batches([record_batch]))
+                else:
+                    writer.write_batch(record_batch)
+                rows += len(batch['reading_id'])
+        finally:
+            writer.close()
+
+    os.replace(tmp_path, path)
+    return rows
+
+
+def load_ml_dataset(path: str) -> Dict:
+    """Load a dataset written by write_ml_dataset as {column: numpy array}"""
+    fmt = ml_format_from_path(path)
+    if fmt == 'npz':
+        if not NUMPY_AVAILABLE:
+            raise ImportError("load_ml_dataset requires numpy")
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    if not PYARROW_AVAILABLE:
+        raise ImportError(f"Reading .{fmt} datasets requires pyarrow")
+    if fmt == 'parquet':
+        table = pq.read_table(path)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+    dtypes = dict(ML_COLUMNS)
+    return {
+        name: np.asarray(table.column(name).to_numpy(), dtype=dtypes.get(name))
+        for name in table.column_names
+    }
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Write the reading history as a flat ML dataset")
+    parser.add_argument('output', help="Output file (.parquet, .arrow / .feather or .npz)")
+    parser.add_argument('--db', default=None, help="History database (defaults to HISTORY_DB_PATH)")
+    parser.add_argument('--from', dest='date_from', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', help="Last date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    store = get_history_store(args.db) if args.db else get_history_store()
+    filters = {key: value for key, value in (('date_from', args.date_from), ('date_to', args.date_to)) if value}
+
+    started = time.time()
+    rows = write_ml_dataset(args.output, store, **filters)
+    print(f"{rows:,} rows x {len(ML_COLUMNS)} columns -> {args.output} in {time.time() - started:.1f}s")
@@ -0,0 +1,263 @@
+"""
+===============================================================================
+OUTCOME ANALYTICS - Which chart signals predict outcomes?
+===============================================================================
+Ming QiMenDunJia 明奇门 - Success rates from the reading history
+
+Groups recorded outcomes by a chart signal (door, star, deity, formation,
+ju, structure, palace, verdict) and reports per value:
+- Readings, resolved readings and SUCCESS / PARTIAL / FAILURE counts
+- Success rate with a Wilson score confidence interval
+- Lift over the baseline success rate of all resolved readings
+
+Two sources give the same numbers:
+- A HistoryStore: one GROUP BY query per signal, filters applied in SQL
+- A columnar snapshot (history_snapshot): dictionary-encoded columns,
+  one NumPy bincount per signal, no database round trips
+
+Only RESOLVED_OUTCOMES (SUCCESS, PARTIAL, FAILURE) count towards success
+rates, as in HistoryStore.stats(); PENDING and NOT_APPLICABLE do not.
+
+Version: 1.0
+===============================================================================
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from .history_store import GROUPABLE_COLUMNS, OUTCOMES, RESOLVED_OUTCOMES, HistoryStore
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+# Signals shown on the History page, in display order
+ANALYTICS_DIMENSIONS = ('door', 'star', 'deity', 'formation', 'ju', 'structure', 'palace', 'verdict')
+
+# z for a two-sided 95% confidence interval
+Z_95 = 1.959964
+
+# A PARTIAL outcome counts as this fraction of a success
+PARTIAL_WEIGHT = 0.5
+
+_OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+
+
+# =============================================================================
+# STATISTICS
+# =============================================================================
+
+def wilson_interval(successes: float, trials: float, z: float = Z_95) -> Tuple[float, float]:
+    """
+    Wilson score interval for a success proportion.
+
+    Unlike the normal approximation it stays inside [0, 1] and behaves for
+    small samples and rates near 0% or 100%. Returns (low, high) as
+    fractions; (0.0, 1.0) when there are no trials.
+    """
+    if trials <= 0:
+        return 0.0, 1.0
+    p = successes / trials
+    z2 = z * z
+    denominator = 1 + z2 / trials
+    center = (p + z2 / (2 * trials)) / denominator
+    margin = z * math.sqrt(max(p * (1 - p) / trials + z2 / (4 * trials * trials), 0.0)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def _rate_row(value, readings: int, success: int, partial: int, failure: int,
+              partial_weight: float, z: float, baseline_rate: Optional[float] = None) -> Dict:
+    resolved = success + partial + failure
+    score = success + partial_weight * partial
+    low, high = wilson_interval(score, resolved, z)
+    rate = score / resolved * 100 if resolved else 0.0
+    row = {
+        'value': value,
+        'readings': readings,
+        'resolved': resolved,
+        'success': success,
+        'partial': partial,
+        'failure': failure,
+        'success_rate': round(rate, 1),
+        'ci_low': round(low * 100, 1),
+        'ci_high': round(high * 100, 1),
+    }
+    if baseline_rate is not None:
+        row['lift'] = round(rate - baseline_rate, 1) if resolved else 0.0
+    return row
+
+
+# =============================================================================
+# COLUMNAR SNAPSHOTS
+# =============================================================================
+
+def _encode(values: List) -> Tuple:
+    """Dictionary-encode a column: (int32 codes, labels), code -1 for missing"""
+    codes_of, labels = {}, []
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None or value == '':
+            codes[i] = -1
+            continue
+        code = codes_of.get(value)
+        if code is None:
+            code = codes_of[value] = len(labels)
+            labels.append(value)
+        codes[i] = code
+    return codes, labels
+
+
+def history_snapshot(store: HistoryStore, **filters) -> Dict:
+    """
+    Columnar, dictionary-encoded copy of the matching readings for
+    repeated NumPy analysis.
+
+    Returns dict with:
+        <column>: int32 codes (-1 = missing) for every groupable column
+            and 'formation' (one entry per (reading, formation) pair)
+        labels: {column: list of values the codes index}
+        outcome: int8 codes into OUTCOMES
+        formation_row: reading index of each formation pair
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("history_snapshot requires numpy")
+
+    columns = store.column_snapshot(**filters)
+    row_of = {reading_id: row for row, reading_id in enumerate(columns['id'])}
+    snapshot = {'labels': {}}
+    for column in GROUPABLE_COLUMNS + ('formation',):
+        snapshot[column], snapshot['labels'][column] = _encode(columns[column])
+    snapshot['outcome'] = np.array(
+        [_OUTCOME_CODES.get(outcome, 0) for outcome in columns['outcome']], dtype=np.int8
+    )
+    snapshot['formation_row'] = np.array(
+        [row_of[reading_id] for reading_id in columns['formation_reading']], dtype=np.int64
+    )
+    return snapshot
+
+
+def _snapshot_counts(snapshot: Dict, by: str) -> List[tuple]:
+    """(value, readings, success, partial, failure) per value via one bincount"""
+    outcomes = snapshot['outcome']
+    if by == 'formation':
+        outcomes = outcomes[snapshot['formation_row']]
+    elif by not in GROUPABLE_COLUMNS:
+        raise ValueError(f"Cannot group readings by '{by}'")
+    codes = snapshot[by]
+    labels = snapshot['labels'][by]
+
+    present = codes >= 0
+    table = np.bincount(
+        codes[present].astype(np.int64) * len(OUTCOMES) + outcomes[present],
+        minlength=len(labels) * len(OUTCOMES)
+    ).reshape(len(labels), len(OUTCOMES))
+    success, partial, failure = (_OUTCOME_CODES[outcome] for outcome in RESOLVED_OUTCOMES)
+    return [
+        (label, int(row.sum()), int(row[success]), int(row[partial]), int(row[failure]))
+        for label, row in zip(labels, table)
+        if row.any()
+    ]
+
+
+# =============================================================================
+# SUCCESS RATES
+# =============================================================================
+
+Source = Union[HistoryStore, Dict]
+
+
+def _check_filters(source: Source, filters: Dict):
+    if filters and not isinstance(source, HistoryStore):
+        raise ValueError("Filters only apply to a HistoryStore; filter a snapshot when taking it")
+
+
+def baseline_rate(source: Source, partial_weight: float = PARTIAL_WEIGHT, z: float = Z_95, **filters) -> Dict:
+    """Success rate over every resolved reading (same keys as an outcome_rates row)"""
+    _check_filters(source, filters)
+    if isinstance(source, HistoryStore):
+        stats = source.stats(**filters)
+        counts = (stats['total'], stats['success'], stats['partial'], stats['failure'])
+    else:
+        outcomes = source['outcome']
+        counts = (len(outcomes),) + tuple(
+            int((outcomes == _OUTCOME_CODES[outcome]).sum()) for outcome in RESOLVED_OUTCOMES
+        )
+    return _rate_row('ALL', *counts, partial_weight, z)
+
+
+def outcome_rates(
+    source: Source,
+    by: str,
+    min_resolved: int = 1,
+    partial_weight: float = PARTIAL_WEIGHT,
+    z: float = Z_95,
+    **filters
+) -> List[Dict]:
+    """
+    Success rate per value of one chart signal.
+
+    Args:
+        source: HistoryStore (SQL) or history_snapshot() dict (NumPy)
+        by: 'formation' or a HistoryStore groupable column
+            (door, star, deity, ju, structure, palace, verdict, ...)
+        min_resolved: Drop values with fewer resolved readings
+        partial_weight: Credit for a PARTIAL outcome (0 - 1)
+        z: z-score of the confidence interval (default 95%)
+        **filters: Store filters (verdict, outcome, palace, formation,
+            date_from, date_to); stores only
+
+    Returns list of dicts (value, readings, resolved, success, partial,
+    failure, success_rate, ci_low, ci_high, lift), rates in percent and
+    lift in percentage points over baseline_rate. Sorted by ci_low so
+    values that are reliably good come first, not lucky small samples.
+    """
+    _check_filters(source, filters)
+    baseline = baseline_rate(source, partial_weight, z, **filters)['success_rate']
+    return _rates(source, by, min_resolved, partial_weight, z, baseline, filters)
+
+
+def _rates(source: Source, by: str, min_resolved: int, partial_weight: float, z: float,
+           baseline: float, filters: Dict) -> List[Dict]:
+    if isinstance(source, HistoryStore):
+        counts = [row[:5] for row in source.outcome_counts(by, **filters)]
+    else:
+        counts = _snapshot_counts(source, by)
+
+    rows = [
+        _rate_row(value, readings, success, partial, failure, partial_weight, z, baseline)
+        for value, readings, success, partial, failure in counts
+        if success + partial + failure >= min_resolved
+    ]
+    rows.sort(key=lambda row: (-row['ci_low'], -row['success_rate'], -row['resolved'], str(row['value'])))
+    return rows
+
+
+def outcome_report(
+    source: Source,
+    dimensions: Sequence[str] = ANALYTICS_DIMENSIONS,
+    min_resolved: int = 1,
+    partial_weight: float = PARTIAL_WEIGHT,
+    z: float = Z_95,
+    **filters
+) -> Dict:
+    """
+    Baseline plus outcome_rates for several signals.
+
+    Returns {'baseline': row, 'dimensions': {signal: rows}}.
+    """
+    _check_filters(source, filters)
+    baseline = baseline_rate(source, partial_weight, z, **filters)
+    return {
+        'baseline': baseline,
+        'dimensions': {
+            by: _rates(source, by, min_resolved, partial_weight, z, baseline['success_rate'], filters)
+            for by in dimensions
+        },
+    }
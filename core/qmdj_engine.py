@@ -621,6 +621,16 @@ def calculate_component_strength(component_element: str, palace_element: str) ->
 # MAIN QMDJ CHART GENERATION
 # ============================================================================
 
+def chart_metadata(dt: datetime, chinese_hour: Dict = None) -> Dict:
+    """Chart metadata (display date/time and Chinese hour) for a timezone-aware dt"""
+    return {
+        "datetime": dt.isoformat(),
+        "date_display": dt.strftime("%Y-%m-%d"),
+        "time_display": dt.strftime("%H:%M"),
+        "chinese_hour": chinese_hour or get_chinese_hour_info(dt.hour),
+        "timezone": "UTC+8"
+    }
+
 def generate_qmdj_chart(dt: datetime = None, palace_focus: int = None) -> Dict:
     """
     Generate complete QMDJ chart with all indicators.
@@ -709,13 +719,7 @@ def generate_qmdj_chart(dt: datetime = None, palace_focus: int = None) -> Dict:
     
     # Compile full chart
     chart = {
-        "metadata": {
-            "datetime": dt.isoformat(),
-            "date_display": dt.strftime("%Y-%m-%d"),
-            "time_display": dt.strftime("%H:%M"),
-            "chinese_hour": chinese_hour,
-            "timezone": "UTC+8"
-        },
+        "metadata": chart_metadata(dt, chinese_hour),
         "structure": structure_info,
         "qmdj_pillars": qmdj_pillars,
         "lead_indicators": lead_info,
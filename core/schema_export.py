@@ -0,0 +1,398 @@
+"""
+===============================================================================
+SCHEMA EXPORT - Universal Schema v3.0 serializer
+===============================================================================
+Ming QiMenDunJia 明奇门 - Charts and profiles straight to JSON bytes
+
+The Export page used to build the export dict by hand and json.dumps it
+twice (download and AI prompt). Almost all of a chart's payload is the
+nine palaces, and there are only a few thousand distinct palace payloads
+(palace info x star x door x deity), so:
+- Charts are compacted into CompactChart: scalars plus a layout id, the
+  nine palace payloads being interned once per distinct layout
+- Each distinct palace / metadata / profile fragment is JSON-encoded once
+  and cached, already indented for its position in the document
+- Whole documents are cached as templates per (layout, ju, structure,
+  profile), so encoding a chart only encodes its two timestamps
+- The AI prompt is built from the same encoded bytes
+
+Output is byte-for-byte what json.dumps(export_data, indent=2,
+ensure_ascii=False) gave (or the compact one-line form for JSONL).
+
+Version: 1.0
+===============================================================================
+"""
+
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from json.encoder import encode_basestring
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+SCHEMA_VERSION = "3.0"
+
+EXPORT_METADATA = {
+    "timezone": "UTC+8",
+    "method": "Chai Bu",
+}
+
+ANALYSIS_PROMPT_TEMPLATE = """# Chinese Metaphysics Analysis Request
+
+## Data (Universal Schema v{version})
+```json
+{data}
+```
+
+## Analysis Required
+Please provide comprehensive analysis covering:
+
+### QMDJ Analysis (if data available):
+1. Overall chart auspiciousness
+2. Best palace/direction for action
+3. Formation assessment
+4. Timing recommendations
+
+### BaZi Analysis (if data available):
+1. Day Master personality and traits
+2. Strength assessment implications
+3. Useful gods and favorable elements
+4. 10 Profiles interpretation
+5. Current luck period
+
+### Integrated Synthesis:
+1. How QMDJ timing aligns with BaZi destiny
+2. Strategic recommendations
+3. What to pursue vs avoid
+4. Key action items
+
+Please use Joey Yap terminology and provide practical, actionable advice."""
+
+INDENT = "  "
+
+# Distinct palace layouts remembered for interning
+LAYOUT_CACHE_SIZE = 4096
+
+
+# =============================================================================
+# COMPACT CHARTS
+# =============================================================================
+
+# Marks a frozen dict, so {"a": 1} and [["a", 1]] never share a cache entry
+_DICT = object()
+
+_PLAIN_TYPES = frozenset((str, int, type(None)))
+
+
+def _freeze(value):
+    """
+    Hashable copy of a JSON-like value for fragment cache keys.
+
+    Dicts become (_DICT, (key, value), ...) and lists tuples; bools and
+    floats are tagged with their type because 1 == 1.0 == True would
+    otherwise share one cached encoding.
+    """
+    if isinstance(value, dict):
+        # Flat str/int payloads (Chart page palaces) are hashable as they are
+        if _PLAIN_TYPES.issuperset(map(type, value.values())):
+            return (_DICT,) + tuple(value.items())
+        return (_DICT,) + tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (bool, float)):
+        return (type(value), value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, tuple):
+        if value and value[0] is _DICT:
+            return {key: _thaw(item) for key, item in value[1:]}
+        if len(value) == 2 and isinstance(value[0], type):
+            return value[1]
+        return [_thaw(item) for item in value]
+    return value
+
+
+class _LayoutId(int):
+    """
+    Layout id that carries its palaces ((key, frozen palace), ... or None).
+
+    Hashes and compares as the int, so fragment caches are keyed by the
+    id alone but can still encode the palaces on a miss.
+    """
+
+    def __new__(cls, value: int, palaces: Optional[tuple]):
+        layout = super().__new__(cls, value)
+        layout.palaces = palaces
+        return layout
+
+    def __reduce__(self):
+        return _LayoutId, (int(self), self.palaces)
+
+
+# Distinct palace layouts -> ids, bounded (oldest evicted first). Ids are
+# never reused, so an evicted layout only costs a new id (and re-encoding)
+# if it comes back; live CompactCharts keep their own palaces.
+_LAYOUT_IDS: "OrderedDict[Optional[tuple], _LayoutId]" = OrderedDict()
+_LAYOUT_COUNTER = itertools.count()
+_LAYOUT_LOCK = threading.Lock()
+
+
+def _layout_id(palaces: Optional[tuple]) -> _LayoutId:
+    layout = _LAYOUT_IDS.get(palaces)
+    if layout is None:
+        with _LAYOUT_LOCK:
+            layout = _LAYOUT_IDS.get(palaces)
+            if layout is None:
+                layout = _LAYOUT_IDS[palaces] = _LayoutId(next(_LAYOUT_COUNTER), palaces)
+                while len(_LAYOUT_IDS) > LAYOUT_CACHE_SIZE:
+                    _LAYOUT_IDS.popitem(last=False)
+    return layout
+
+
+@dataclass(frozen=True)
+class CompactChart:
+    """A chart reduced to its scalars plus an interned palace layout id"""
+    datetime: Optional[str]
+    structure: Optional[str]
+    structure_cn: Optional[str]
+    ju: Optional[int]
+    layout: _LayoutId
+
+    @property
+    def palaces(self) -> Optional[tuple]:
+        """((palace key, frozen palace payload), ...), or None for palaces: null"""
+        return self.layout.palaces
+
+
+def compact_chart(chart: Union[Dict, CompactChart]) -> CompactChart:
+    """CompactChart from a Chart page chart dict (datetime, structure, ju, palaces)"""
+    if isinstance(chart, CompactChart):
+        return chart
+    # A missing palaces key exports as {}, an explicit None as null
+    palaces = chart.get("palaces", {})
+    return CompactChart(
+        datetime=chart.get("datetime"),
+        structure=chart.get("structure"),
+        structure_cn=chart.get("structure_cn"),
+        ju=chart.get("ju"),
+        layout=_layout_id(
+            None if palaces is None else tuple((key, _freeze(palace)) for key, palace in palaces.items())
+        ),
+    )
+
+
+# =============================================================================
+# FRAGMENTS
+# =============================================================================
+
+@lru_cache(maxsize=16384)
+def _fragment(frozen, level: Optional[int]) -> str:
+    """JSON for a frozen value, indented for nesting level (None = one line)"""
+    value = _thaw(frozen)
+    if level is None:
+        return json.dumps(value, ensure_ascii=False)
+    return json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + INDENT * level)
+
+
+def _encode_scalar(value) -> str:
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None:
+        return "null"
+    if type(value) is int:
+        return str(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+@lru_cache(maxsize=1024, typed=True)
+def _encode_key(key) -> str:
+    # json.dumps turns int keys into strings
+    return json.dumps({key: 0}, ensure_ascii=False)[1:-4]
+
+
+def _encode_object(items, level: Optional[int]) -> str:
+    """Object from (key, already-encoded value) pairs, json.dumps layout"""
+    items = [f"{_encode_key(key)}: {value}" for key, value in items]
+    if not items:
+        return "{}"
+    if level is None:
+        return "{" + ", ".join(items) + "}"
+    inner = "\n" + INDENT * (level + 1)
+    return "{" + inner + ("," + inner).join(items) + "\n" + INDENT * level + "}"
+
+
+def _child(level: Optional[int]) -> Optional[int]:
+    return None if level is None else level + 1
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _palaces_fragment(layout: _LayoutId, level: Optional[int]) -> str:
+    if layout.palaces is None:
+        return "null"
+    palace_level = None if level is None else level + 1
+    return _encode_object(((key, _fragment(palace, palace_level)) for key, palace in layout.palaces), level)
+
+
+@lru_cache(maxsize=16)
+def _metadata_fragment(kind: str, level: Optional[int]) -> str:
+    return _fragment(_freeze({**EXPORT_METADATA, "analysis_type": kind}), level)
+
+
+def analysis_type(has_qmdj: bool, has_bazi: bool) -> str:
+    return "INTEGRATED" if (has_qmdj and has_bazi) else ("QMDJ_ONLY" if has_qmdj else "BAZI_ONLY")
+
+
+# =============================================================================
+# PROFILES
+# =============================================================================
+
+def bazi_section(bazi: Optional[Dict], profile: Optional[Dict] = None) -> Dict:
+    """bazi_data section from the BaZi page result and/or the saved profile"""
+    bazi = bazi or {}
+    profile = profile or {}
+    return {
+        "day_master": {
+            "stem": bazi.get("dm", profile.get("day_master")),
+            "element": bazi.get("dm_elem", profile.get("element")),
+            "strength": bazi.get("strength_cat", profile.get("strength")),
+            "strength_pct": bazi.get("strength_pct")
+        },
+        "useful_gods": bazi.get("useful", profile.get("useful_gods", [])),
+        "unfavorable": bazi.get("unfav", profile.get("unfavorable", [])),
+        "pillars": bazi.get("pillars", []),
+        "ten_profiles": bazi.get("gods_dist", {}),
+        "main_profile": bazi.get("main_profile", profile.get("profile"))
+    }
+
+
+def _encode_bazi(section: Dict, level: Optional[int]) -> str:
+    try:
+        return _fragment(_freeze(section), level)
+    except TypeError:
+        # Unhashable leaf (e.g. a set) - encode directly
+        text = json.dumps(section, indent=None if level is None else 2, ensure_ascii=False, default=str)
+        return text if level is None else text.replace("\n", "\n" + INDENT * level)
+
+
+# =============================================================================
+# DOCUMENTS
+# =============================================================================
+
+# Raw placeholders for the per-chart fields; encoded JSON never contains NUL
+_EXPORTED_AT = "\x00exported_at\x00"
+_DATETIME = "\x00datetime\x00"
+
+
+@lru_cache(maxsize=4096)
+def _document_template(chart_key: Optional[tuple], bazi_text: Optional[str], level: Optional[int]) -> Tuple[str, str, str]:
+    """
+    A document split around its exported_at and datetime values.
+
+    chart_key is (layout, structure, structure_cn, ju) or None.
+    """
+    items = [
+        ("schema_version", _encode_scalar(SCHEMA_VERSION)),
+        ("exported_at", _EXPORTED_AT),
+        ("metadata", _metadata_fragment(analysis_type(chart_key is not None, bazi_text is not None), _child(level))),
+    ]
+    if chart_key is not None:
+        layout, structure, structure_cn, ju = chart_key
+        qmdj_level = _child(level)
+        items.append(("qmdj_data", _encode_object((
+            ("datetime", _DATETIME),
+            ("structure", _encode_scalar(structure)),
+            ("structure_cn", _encode_scalar(structure_cn)),
+            ("ju_number", _encode_scalar(_thaw(ju))),
+            ("palaces", _palaces_fragment(layout, _child(qmdj_level))),
+        ), qmdj_level)))
+    if bazi_text is not None:
+        items.append(("bazi_data", bazi_text))
+
+    head, rest = _encode_object(items, level).split(_EXPORTED_AT)
+    middle, tail = rest.split(_DATETIME) if chart_key is not None else (rest, "")
+    return head, middle, tail
+
+
+def _encode_document(chart: Optional[CompactChart], bazi_text: Optional[str],
+                     exported_at: str, level: Optional[int]) -> bytes:
+    if chart is None:
+        head, middle, _ = _document_template(None, bazi_text, level)
+        return (head + _encode_scalar(exported_at) + middle).encode("utf-8")
+    head, middle, tail = _document_template(
+        (chart.layout, chart.structure, chart.structure_cn, _freeze(chart.ju)), bazi_text, level
+    )
+    return (head + _encode_scalar(exported_at) + middle + _encode_scalar(chart.datetime) + tail).encode("utf-8")
+
+
+def encode_export(
+    chart: Optional[Union[Dict, CompactChart]] = None,
+    bazi_data: Optional[Dict] = None,
+    exported_at: Optional[str] = None,
+    indent: bool = True
+) -> bytes:
+    """
+    Encode one Universal Schema v3.0 document.
+
+    Args:
+        chart: Chart dict or CompactChart (None to leave out qmdj_data)
+        bazi_data: bazi_section() dict (None to leave out bazi_data)
+        exported_at: Timestamp string (defaults to now)
+        indent: 2-space indented (download / prompt) or one line (JSONL)
+
+    Returns UTF-8 JSON bytes.
+    """
+    level = 0 if indent else None
+    return _encode_document(
+        compact_chart(chart) if chart is not None else None,
+        _encode_bazi(bazi_data, _child(level)) if bazi_data is not None else None,
+        exported_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        level
+    )
+
+
+def iter_export_documents(
+    charts: Iterable[Union[Dict, CompactChart]],
+    bazi_data: Optional[Dict] = None,
+    exported_at: Optional[str] = None,
+    indent: bool = True
+) -> Iterator[bytes]:
+    """Encode many charts sharing one profile (encoded once) and timestamp"""
+    level = 0 if indent else None
+    exported_at = exported_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    bazi_text = _encode_bazi(bazi_data, _child(level)) if bazi_data is not None else None
+    for chart in charts:
+        yield _encode_document(compact_chart(chart), bazi_text, exported_at, level)
+
+
+def iter_export_jsonl(
+    charts: Iterable[Union[Dict, CompactChart]],
+    bazi_data: Optional[Dict] = None,
+    exported_at: Optional[str] = None
+) -> Iterator[bytes]:
+    """One compact document line per chart (JSONL)"""
+    for document in iter_export_documents(charts, bazi_data, exported_at, indent=False):
+        yield document + b"\n"
+
+
+def analysis_prompt(encoded: bytes) -> str:
+    """AI analysis prompt around an encoded (indented) export document"""
+    return ANALYSIS_PROMPT_TEMPLATE.format(version=SCHEMA_VERSION, data=encoded.decode("utf-8"))
+
+
+def clear_fragment_cache():
+    """Drop cached fragments, templates and interned layouts (live CompactCharts keep their palaces)"""
+    with _LAYOUT_LOCK:
+        _LAYOUT_IDS.clear()
+    _fragment.cache_clear()
+    _palaces_fragment.cache_clear()
+    _metadata_fragment.cache_clear()
+    _document_template.cache_clear()
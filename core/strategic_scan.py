@@ -0,0 +1,772 @@
+"""
+===============================================================================
+STRATEGIC SCAN - Hour and direction scoring for the Strategic page
+===============================================================================
+Ming QiMenDunJia 明奇门 - Golden hours for an activity over days or weeks
+
+Scores each Chinese double hour for an activity by its target palace:
+- Door (favoring the activity or not), formations, Death & Emptiness,
+  Horse Star, Nobleman and BaZi element alignment
+- scan_day(): the 12 double hours of one day
+- score_hours_matrix() / scan_day_matrix(): hours x activities in one
+  kernel call
+- StrategicScan: a date range (up to SCAN_MAX_DAYS) scanned by a
+  background worker pool. The page polls snapshot() for progress and
+  partial results, and can cancel() it at any time.
+
+Scoring is split in three:
+- chart_codes(): each palace of a chart as integer codes (door, star,
+  deity, element, formation score, indicator flags), cached per chart
+  period - charts and formations are computed once per double hour
+- hour_score_kernel() / direction_score_kernel(): pure NumPy functions
+  from code arrays to scores and verdicts, for any number of hours,
+  palaces and activities at once
+- hour_insights(): the text reasons, built only for hours that are
+  shown (score_hour, with_insights, hour_result(insights=True))
+
+A range scan keeps a top-K heap of golden hours and one summary per day
+instead of every scored hour.
+
+Version: 1.0
+===============================================================================
+"""
+
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from .bazi_calculator import FIVE_ELEMENTS, NUMPY_AVAILABLE, np
+from .chart_cache import CHART_CACHE_SIZE, PeriodCache, cached_qmdj_chart, chart_period
+from .formations import FormationCategory, detect_formations, get_formation_score
+from .qmdj_engine import EIGHT_DEITIES, EIGHT_DOORS, NINE_STARS, SGT
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+CHINESE_HOURS = [
+    ("Zi", "子", "23:00-01:00", "Rat"),
+    ("Chou", "丑", "01:00-03:00", "Ox"),
+    ("Yin", "寅", "03:00-05:00", "Tiger"),
+    ("Mao", "卯", "05:00-07:00", "Rabbit"),
+    ("Chen", "辰", "07:00-09:00", "Dragon"),
+    ("Si", "巳", "09:00-11:00", "Snake"),
+    ("Wu", "午", "11:00-13:00", "Horse"),
+    ("Wei", "未", "13:00-15:00", "Goat"),
+    ("Shen", "申", "15:00-17:00", "Monkey"),
+    ("You", "酉", "17:00-19:00", "Rooster"),
+    ("Xu", "戌", "19:00-21:00", "Dog"),
+    ("Hai", "亥", "21:00-23:00", "Pig")
+]
+
+ACTIVITY_TYPES = {
+    "💼 Business Meeting": {"palace": 6, "doors": ["Open", "Rest"], "desc": "Authority, negotiations"},
+    "📝 Sign Contract": {"palace": 6, "doors": ["Open", "Life"], "desc": "Binding agreements"},
+    "💰 Investment": {"palace": 4, "doors": ["Life", "Open"], "desc": "Wealth growth"},
+    "💕 Dating/Romance": {"palace": 2, "doors": ["Rest", "Scenery"], "desc": "Relationships, connection"},
+    "📚 Study/Exam": {"palace": 8, "doors": ["Scenery", "Life"], "desc": "Learning, recognition"},
+    "✈️ Travel": {"palace": 1, "doors": ["Open", "Rest"], "desc": "Movement, journeys"},
+    "🏥 Medical Visit": {"palace": 3, "doors": ["Life", "Rest"], "desc": "Health matters"},
+    "🏠 Property Deal": {"palace": 8, "doors": ["Life", "Open"], "desc": "Real estate, stability"},
+    "⚖️ Legal Matter": {"palace": 6, "doors": ["Open"], "desc": "Official processes"},
+    "🎯 General Action": {"palace": 5, "doors": ["Open", "Life", "Rest"], "desc": "Any activity"}
+}
+DEFAULT_ACTIVITY = "🎯 General Action"
+
+# Brief door meanings (not full interpretations)
+DOOR_INSIGHTS = {
+    "Open": ("✨", "Opens opportunities, authority support"),
+    "Rest": ("💤", "Ease, networking, passive gains"),
+    "Life": ("🌱", "Growth, creation, wealth building"),
+    "Harm": ("⚔️", "Competition, conflict, breakthroughs"),
+    "Delusion": ("🌫️", "Hidden matters, strategy, secrecy"),
+    "Scenery": ("🎭", "Recognition, expression, visibility"),
+    "Death": ("💀", "Endings, stagnation - avoid new starts"),
+    "Fear": ("⚡", "Surprises, legal issues, alertness")
+}
+
+DIRECTIONS = [
+    ("N", "North", 1), ("NE", "Northeast", 8), ("E", "East", 3),
+    ("SE", "Southeast", 4), ("S", "South", 9), ("SW", "Southwest", 2),
+    ("W", "West", 7), ("NW", "Northwest", 6)
+]
+
+FAVORABLE_DOORS = ("Open", "Life", "Rest")
+HARMFUL_DOORS = ("Death", "Harm", "Fear")
+
+# Range scans
+SCAN_MAX_DAYS = 90
+SCAN_TOP_K = 10
+SCAN_WORKERS = min(4, os.cpu_count() or 1)
+SCAN_CHUNK_DAYS = 7          # days per kernel call (and progress step)
+
+SCAN_RUNNING = 'running'
+SCAN_DONE = 'done'
+SCAN_CANCELLED = 'cancelled'
+SCAN_FAILED = 'failed'
+
+
+# =============================================================================
+# CODE TABLES
+# =============================================================================
+
+# Code 0 is "unknown" in every table
+DOOR_NAMES = ('',) + tuple(EIGHT_DOORS[number]['name'] for number in sorted(EIGHT_DOORS))
+STAR_NAMES = ('',) + tuple(NINE_STARS[number]['name'] for number in sorted(NINE_STARS))
+DEITY_NAMES = ('',) + tuple(EIGHT_DEITIES[number]['name'] for number in sorted(EIGHT_DEITIES))
+ELEMENT_NAMES = ('',) + tuple(FIVE_ELEMENTS)
+
+DOOR_CODES = {name: code for code, name in enumerate(DOOR_NAMES)}
+STAR_CODES = {name: code for code, name in enumerate(STAR_NAMES)}
+DEITY_CODES = {name: code for code, name in enumerate(DEITY_NAMES)}
+ELEMENT_CODES = {name: code for code, name in enumerate(ELEMENT_NAMES)}
+
+# Columns of a chart_codes() row (one row per palace)
+PALACE_FIELDS = (
+    'door', 'star', 'deity', 'element', 'formation_score', 'auspicious',
+    'is_empty', 'has_horse', 'has_nobleman', 'is_lead_palace',
+)
+(_DOOR, _STAR, _DEITY, _ELEMENT, _FORMATION_SCORE, _AUSPICIOUS,
+ _IS_EMPTY, _HAS_HORSE, _HAS_NOBLEMAN, _IS_LEAD_PALACE) = range(len(PALACE_FIELDS))
+
+# Verdict codes returned by the kernels
+VERDICTS = ('bad', 'neutral', 'good')
+
+ACTIVITY_NAMES = tuple(ACTIVITY_TYPES)
+ACTIVITY_INDEX = {name: i for i, name in enumerate(ACTIVITY_NAMES)}
+
+if NUMPY_AVAILABLE:
+    ACTIVITY_PALACES = np.array([info["palace"] for info in ACTIVITY_TYPES.values()], dtype=np.intp)
+    ACTIVITY_TRAVEL = np.array(["Travel" in name for name in ACTIVITY_NAMES], dtype=np.int16)
+    # [activity, door code]: door favors the activity
+    FAVORED_DOORS = np.array(
+        [[door in info["doors"] for door in DOOR_NAMES] for info in ACTIVITY_TYPES.values()], dtype=bool
+    )
+    FAVORABLE_DOOR_MASK = np.array([door in FAVORABLE_DOORS for door in DOOR_NAMES], dtype=bool)
+    HARMFUL_DOOR_MASK = np.array([door in HARMFUL_DOORS for door in DOOR_NAMES], dtype=bool)
+else:
+    ACTIVITY_PALACES = ACTIVITY_TRAVEL = FAVORED_DOORS = FAVORABLE_DOOR_MASK = HARMFUL_DOOR_MASK = None
+
+# Palace codes per chart period (charts are deterministic, so no expiry)
+PALACE_CODE_CACHE = PeriodCache(CHART_CACHE_SIZE)
+
+
+# =============================================================================
+# PALACE SIGNALS
+# =============================================================================
+
+def palace_signals(chart: Dict, palace: int) -> Dict:
+    """
+    Flat view of one engine palace: door / star / deity names, palace
+    element and indicator flags (the keys detect_formations reads).
+    """
+    data = chart.get("palaces", {}).get(palace, {})
+    indicators = data.get("indicators", {})
+    return {
+        "door": data.get("door", {}).get("name", ""),
+        "star": data.get("star", {}).get("name", ""),
+        "deity": data.get("deity", {}).get("name", ""),
+        "palace_element": data.get("palace_info", {}).get("element", ""),
+        "death_emptiness": indicators.get("is_empty", False),
+        "has_horse": indicators.get("has_horse_star", False),
+        "has_nobleman": indicators.get("has_nobleman", False),
+        "is_lead_palace": indicators.get("is_lead_palace", False),
+    }
+
+
+def useful_elements(user_profile: Optional[Dict]) -> FrozenSet[str]:
+    """Useful elements of a profile (analyze_bazi result or a flat list)"""
+    if not user_profile:
+        return frozenset()
+    useful = user_profile.get("useful_gods", [])
+    if isinstance(useful, dict):
+        useful = useful.get("useful", [])
+    return frozenset(useful)
+
+
+@lru_cache(maxsize=8192)
+def _palace_formations(door: str, star: str, deity: str, palace_element: str,
+                       death_emptiness: bool, has_horse: bool, has_nobleman: bool,
+                       is_lead_palace: bool) -> Tuple:
+    """(formation score, names, categories, labels) for a palace's signals"""
+    formations = detect_formations({
+        "door": door, "star": star, "deity": deity, "palace_element": palace_element,
+        "death_emptiness": death_emptiness, "has_horse": has_horse,
+        "has_nobleman": has_nobleman, "is_lead_palace": is_lead_palace,
+    })
+    f_score, _ = get_formation_score(formations)
+
+    labels = []
+    for f in formations:
+        if f.category == FormationCategory.AUSPICIOUS:
+            labels.append(f"✨ {f.name_en}")
+        elif f.category == FormationCategory.INAUSPICIOUS:
+            labels.append(f"⚠️ {f.name_en}")
+        else:
+            labels.append(f"📜 {f.name_en}")
+
+    return (
+        f_score,
+        tuple(f.name_en for f in formations),
+        tuple(f.category.value for f in formations),
+        tuple(labels),
+    )
+
+
+def _signal_formations(palace_data: Dict) -> Tuple:
+    """_palace_formations() of a palace_signals() dict"""
+    return _palace_formations(
+        palace_data["door"], palace_data["star"], palace_data["deity"], palace_data["palace_element"],
+        palace_data["death_emptiness"], palace_data["has_horse"], palace_data["has_nobleman"],
+        palace_data["is_lead_palace"],
+    )
+
+
+@lru_cache(maxsize=8192)
+def _palace_codes(door: str, star: str, deity: str, palace_element: str,
+                  death_emptiness: bool, has_horse: bool, has_nobleman: bool,
+                  is_lead_palace: bool) -> Tuple:
+    """A chart_codes() row for a palace's signals"""
+    f_score, _, categories, _ = _palace_formations(
+        door, star, deity, palace_element, death_emptiness, has_horse, has_nobleman, is_lead_palace
+    )
+    return (
+        DOOR_CODES.get(door, 0),
+        STAR_CODES.get(star, 0),
+        DEITY_CODES.get(deity, 0),
+        ELEMENT_CODES.get(palace_element, 0),
+        f_score,
+        FormationCategory.AUSPICIOUS.value in categories,
+        death_emptiness,
+        has_horse,
+        has_nobleman,
+        is_lead_palace,
+    )
+
+
+def chart_codes(chart: Dict):
+    """
+    int16 array [palace, PALACE_FIELDS] of a chart (row 0 unused).
+
+    Formations are detected here, once per palace, so the kernels only
+    see their score and whether any is auspicious.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("chart_codes requires numpy")
+
+    rows = [(0,) * len(PALACE_FIELDS)]
+    palaces = chart.get("palaces", {})
+    for palace in range(1, 10):
+        data = palaces.get(palace, {})
+        indicators = data.get("indicators", {})
+        rows.append(_palace_codes(
+            data.get("door", {}).get("name", ""),
+            data.get("star", {}).get("name", ""),
+            data.get("deity", {}).get("name", ""),
+            data.get("palace_info", {}).get("element", ""),
+            bool(indicators.get("is_empty", False)),
+            bool(indicators.get("has_horse_star", False)),
+            bool(indicators.get("has_nobleman", False)),
+            bool(indicators.get("is_lead_palace", False)),
+        ))
+    codes = np.array(rows, dtype=np.int16)
+    codes.setflags(write=False)
+    return codes
+
+
+def hour_codes(hour_dt: datetime):
+    """chart_codes() of the chart for hour_dt, cached per chart period"""
+    if hour_dt.tzinfo is None:
+        hour_dt = hour_dt.replace(tzinfo=SGT)
+    return PALACE_CODE_CACHE.get_or_compute(
+        chart_period(hour_dt),
+        lambda: chart_codes(cached_qmdj_chart(hour_dt)),
+        lambda: float('inf'),
+    )
+
+
+def activity_codes(activities: Sequence[str]):
+    """ACTIVITY_NAMES indices (unknown activities score as DEFAULT_ACTIVITY)"""
+    default = ACTIVITY_INDEX[DEFAULT_ACTIVITY]
+    return np.array([ACTIVITY_INDEX.get(activity, default) for activity in activities], dtype=np.intp)
+
+
+def element_mask(elements: FrozenSet[str]):
+    """bool array over ELEMENT_NAMES codes"""
+    return np.array([name in elements for name in ELEMENT_NAMES], dtype=bool)
+
+
+# =============================================================================
+# SCORING KERNELS
+# =============================================================================
+
+def hour_score_kernel(activity, door, element, formation_score, is_empty, has_horse, has_nobleman,
+                      useful_mask):
+    """
+    Scores and verdict codes for any number of hours x palaces at once.
+
+    All arguments are integer arrays (or scalars) that broadcast together:
+    activity indices into ACTIVITY_NAMES, door / element codes and
+    formation score / indicator flags as in chart_codes(). useful_mask is
+    element_mask() of the profile's useful elements.
+
+    Returns (int8 scores 1 - 10, int8 codes into VERDICTS).
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("hour_score_kernel requires numpy")
+
+    door_points = np.where(FAVORED_DOORS[activity, door], 2, np.where(HARMFUL_DOOR_MASK[door], -2, 0))
+    score = (
+        5 + door_points + formation_score
+        - 2 * is_empty
+        + has_horse * ACTIVITY_TRAVEL[activity]
+        + has_nobleman
+        + useful_mask[element]
+    )
+    score = np.clip(score, 1, 10).astype(np.int8)
+    return score, verdict_codes(score)
+
+
+def direction_score_kernel(door, is_empty, auspicious):
+    """
+    Direction scores and verdict codes for arrays of palaces.
+
+    Favorable doors score 7, harmful doors 3, others 5; Death & Emptiness
+    takes 2 points and makes the direction bad; an auspicious formation
+    adds a point.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("direction_score_kernel requires numpy")
+
+    favorable = FAVORABLE_DOOR_MASK[door]
+    harmful = HARMFUL_DOOR_MASK[door]
+    score = np.where(favorable, 7, np.where(harmful, 3, 5)) - 2 * is_empty + (auspicious > 0)
+    verdict = np.where((is_empty > 0) | harmful, 0, np.where(favorable, 2, 1))
+    return np.clip(score, 1, 10).astype(np.int8), verdict.astype(np.int8)
+
+
+def verdict_codes(scores):
+    """0 = bad (<= 3), 1 = neutral, 2 = good (>= 7)"""
+    return ((scores >= 7).astype(np.int8) + (scores > 3)).astype(np.int8)
+
+
+# =============================================================================
+# RESULTS AND INSIGHTS (built only for hours that are shown)
+# =============================================================================
+
+def _palace_data(codes) -> Dict:
+    """palace_signals() dict back from a chart_codes() row"""
+    return {
+        "door": DOOR_NAMES[codes[_DOOR]],
+        "star": STAR_NAMES[codes[_STAR]],
+        "deity": DEITY_NAMES[codes[_DEITY]],
+        "palace_element": ELEMENT_NAMES[codes[_ELEMENT]],
+        "death_emptiness": bool(codes[_IS_EMPTY]),
+        "has_horse": bool(codes[_HAS_HORSE]),
+        "has_nobleman": bool(codes[_HAS_NOBLEMAN]),
+        "is_lead_palace": bool(codes[_IS_LEAD_PALACE]),
+    }
+
+
+def _hour_result(codes, score: int, verdict: int) -> Dict:
+    palace_data = _palace_data(codes)
+    _, names, categories, _ = _signal_formations(palace_data)
+    return {
+        "score": int(score),
+        "door": palace_data["door"],
+        "star": palace_data["star"],
+        "deity": palace_data["deity"],
+        "heaven_stem": "",
+        "formations": list(names),
+        "formation_categories": list(categories),
+        "verdict": VERDICTS[verdict],
+        "palace_data": palace_data
+    }
+
+
+def hour_insights(activity: str, palace_data: Dict, user_profile: Dict = None) -> List[str]:
+    """Brief reasons behind an hour's score (door, formations, indicators, BaZi)"""
+    activity_info = ACTIVITY_TYPES.get(activity, ACTIVITY_TYPES[DEFAULT_ACTIVITY])
+    door = palace_data["door"]
+    palace_element = palace_data["palace_element"]
+    insights = []
+
+    door_emoji, door_meaning = DOOR_INSIGHTS.get(door, ("", ""))
+    if door in activity_info["doors"]:
+        insights.append(f"{door_emoji} {door} Door favors this activity")
+    else:
+        insights.append(f"{door_emoji} {door} Door: {door_meaning}")
+
+    labels = _signal_formations(palace_data)[3]
+    if labels:
+        insights.append(f"Formations: {', '.join(labels[:3])}")
+
+    if palace_data["death_emptiness"]:
+        insights.append("💀 Palace in Death & Emptiness - energy blocked")
+
+    if palace_data["has_horse"]:
+        if "Travel" in activity:
+            insights.append("🐴 Horse Star activates - good for movement")
+        else:
+            insights.append("🐴 Horse Star present - things move fast")
+
+    if palace_data["has_nobleman"]:
+        insights.append("👑 Nobleman arrives - helpful people appear")
+
+    if palace_element in useful_elements(user_profile):
+        insights.append(f"🎴 Palace {palace_element} aligns with your BaZi")
+
+    return insights
+
+
+def with_insights(result: Dict, activity: str, user_profile: Dict = None) -> Dict:
+    """Add 'insights' to an hour result (in place) and return it"""
+    result["insights"] = hour_insights(activity, result["palace_data"], user_profile)
+    return result
+
+
+# =============================================================================
+# SCORING
+# =============================================================================
+
+def target_palace(activity: str) -> int:
+    return ACTIVITY_TYPES.get(activity, ACTIVITY_TYPES[DEFAULT_ACTIVITY])["palace"]
+
+
+def _score_codes(codes, activity, useful_mask):
+    return hour_score_kernel(
+        activity, codes[..., _DOOR], codes[..., _ELEMENT], codes[..., _FORMATION_SCORE],
+        codes[..., _IS_EMPTY], codes[..., _HAS_HORSE], codes[..., _HAS_NOBLEMAN], useful_mask
+    )
+
+
+def score_hour(hour_dt: datetime, activity: str, user_profile: Dict = None, chart: Dict = None) -> Dict:
+    """
+    Score an hour for an activity with brief insights explaining why.
+
+    Args:
+        hour_dt: Any time in the double hour
+        activity: ACTIVITY_TYPES key
+        user_profile: Optional BaZi profile (useful elements add a point)
+        chart: Chart for hour_dt, if already generated
+    """
+    codes = chart_codes(chart) if chart else hour_codes(hour_dt)
+    activity_code = activity_codes([activity])[0]
+    palace_codes = codes[ACTIVITY_PALACES[activity_code]]
+    score, verdict = _score_codes(palace_codes, activity_code, element_mask(useful_elements(user_profile)))
+    return with_insights(_hour_result(palace_codes, score, verdict), activity, user_profile)
+
+
+def score_hours_matrix(hour_dts: Sequence[datetime], activities: Optional[Sequence[str]] = None,
+                       user_profile: Dict = None) -> Dict:
+    """
+    Score every hour for several activities with one kernel call.
+
+    Each hour's palace codes (chart and formations) are computed once per
+    chart period and shared by every activity; no result dicts or insight
+    text are built - use hour_result() for the hours that are shown.
+
+    Args:
+        hour_dts: Times to score (any time in each double hour)
+        activities: ACTIVITY_TYPES keys (default: all of them)
+        user_profile: Optional BaZi profile
+
+    Returns dict with:
+        activities: Column order
+        hours: hour_dts, row order
+        scores: int8 array [hour, activity] (1 - 10)
+        verdicts: int8 array [hour, activity] of VERDICTS codes
+        codes: int16 array [hour, activity, PALACE_FIELDS] of each
+            activity's target palace
+        best: {activity: row of its highest score, earliest on ties}
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("score_hours_matrix requires numpy")
+
+    activities = list(ACTIVITY_TYPES) if activities is None else list(activities)
+    activity_index = activity_codes(activities)
+    if hour_dts:
+        codes = np.stack([hour_codes(hour_dt) for hour_dt in hour_dts])
+    else:
+        codes = np.zeros((0, 10, len(PALACE_FIELDS)), dtype=np.int16)
+    codes = codes[:, ACTIVITY_PALACES[activity_index]]
+
+    scores, verdicts = _score_codes(codes, activity_index, element_mask(useful_elements(user_profile)))
+    return {
+        "activities": activities,
+        "hours": list(hour_dts),
+        "scores": scores,
+        "verdicts": verdicts,
+        "codes": codes,
+        "best": {
+            activity: int(np.argmax(scores[:, col])) if len(scores) else None
+            for col, activity in enumerate(activities)
+        },
+    }
+
+
+def hour_result(matrix: Dict, row: int, col: int = 0, user_profile: Dict = None, insights: bool = False) -> Dict:
+    """
+    score_hour()-style dict for one cell of a score_hours_matrix (with
+    hour_dt, and hour_name / time_range for day matrices). Insights are
+    only built when asked for.
+    """
+    result = _hour_result(matrix["codes"][row, col], matrix["scores"][row, col], matrix["verdicts"][row, col])
+    result["hour_dt"] = matrix["hours"][row]
+    if "hour_names" in matrix:
+        result["hour_name"] = matrix["hour_names"][row]
+        result["time_range"] = matrix["time_ranges"][row]
+    if insights:
+        with_insights(result, matrix["activities"][col], user_profile)
+    return result
+
+
+def score_directions(chart: Optional[Dict]) -> Dict[str, Dict]:
+    """score_direction() for every entry of DIRECTIONS with one kernel call"""
+    if not chart:
+        return {d: score_direction(None, d, palace) for d, _, palace in DIRECTIONS}
+
+    codes = chart_codes(chart)[[palace for _, _, palace in DIRECTIONS]]
+    scores, verdicts = direction_score_kernel(codes[:, _DOOR], codes[:, _IS_EMPTY], codes[:, _AUSPICIOUS])
+    results = {}
+    for (d, _, _), row, score, verdict in zip(DIRECTIONS, codes, scores, verdicts):
+        door = DOOR_NAMES[row[_DOOR]]
+        door_emoji, door_meaning = DOOR_INSIGHTS.get(door, ("", "Unknown"))
+        results[d] = {
+            "score": int(score),
+            "verdict": VERDICTS[verdict],
+            "door": door,
+            "insight": f"{door_emoji} {door_meaning}"
+        }
+    return results
+
+
+def score_direction(chart: Optional[Dict], direction: str, palace_num: int) -> Dict:
+    """Score a direction with brief insight."""
+    if not chart:
+        return {"score": 5, "verdict": "neutral", "door": "?", "insight": "No data"}
+
+    codes = chart_codes(chart)[palace_num]
+    score, verdict = direction_score_kernel(codes[_DOOR], codes[_IS_EMPTY], codes[_AUSPICIOUS])
+    door = DOOR_NAMES[codes[_DOOR]]
+    door_emoji, door_meaning = DOOR_INSIGHTS.get(door, ("", "Unknown"))
+    return {
+        "score": int(score),
+        "verdict": VERDICTS[verdict],
+        "door": door,
+        "insight": f"{door_emoji} {door_meaning}"
+    }
+
+
+# =============================================================================
+# DAY SCAN
+# =============================================================================
+
+def hour_slots(day: date) -> List[Tuple[str, str, datetime]]:
+    """
+    (hour name, time range, start time) of the 12 double hours of a day.
+    Zi starts at 23:00 the evening before.
+    """
+    slots = []
+    for hour_name, hour_cn, time_range, _ in CHINESE_HOURS:
+        start_hour = int(time_range.split(":")[0])
+        start_day = day - timedelta(days=1) if start_hour == 23 else day
+        hour_dt = datetime(start_day.year, start_day.month, start_day.day, start_hour, tzinfo=SGT)
+        slots.append((f"{hour_name} {hour_cn}", time_range, hour_dt))
+    return slots
+
+
+def scan_day_matrix(day: date, activities: Optional[Sequence[str]] = None, user_profile: Dict = None) -> Dict:
+    """score_hours_matrix for the 12 double hours of a day, plus hour_names and time_ranges"""
+    slots = hour_slots(day)
+    matrix = score_hours_matrix([hour_dt for _, _, hour_dt in slots], activities, user_profile)
+    matrix["hour_names"] = [hour_name for hour_name, _, _ in slots]
+    matrix["time_ranges"] = [time_range for _, time_range, _ in slots]
+    return matrix
+
+
+def scan_day(day: date, activity: str, user_profile: Dict = None) -> List[Dict]:
+    """
+    The 12 double hours of a day as score_hour()-style dicts with
+    hour_name / time_range / hour_dt, without insights (see with_insights)
+    """
+    matrix = scan_day_matrix(day, [activity], user_profile)
+    return [hour_result(matrix, row) for row in range(len(matrix["hours"]))]
+
+
+# =============================================================================
+# RANGE SCAN (BACKGROUND)
+# =============================================================================
+
+class StrategicScan:
+    """
+    Scan a date range for an activity in a background thread pool.
+
+    Only the top_k golden hours (highest score, earliest first on ties)
+    and a one-line summary per day are kept. snapshot() is safe to call
+    from any thread while the scan runs.
+
+        scan = StrategicScan(start, end, activity).start()
+        ...
+        scan.snapshot()['top']
+    """
+
+    def __init__(self, start: date, end: date, activity: str, user_profile: Dict = None,
+                 top_k: int = SCAN_TOP_K, workers: int = SCAN_WORKERS):
+        if end < start:
+            raise ValueError("Scan range ends before it starts")
+        days = (end - start).days + 1
+        if days > SCAN_MAX_DAYS:
+            raise ValueError(f"Scan range is {days} days (at most {SCAN_MAX_DAYS})")
+
+        self.start_date = start
+        self.end_date = end
+        self.activity = activity
+        self.user_profile = user_profile
+        self.top_k = top_k
+        self.workers = max(1, workers)
+        self.days = [start + timedelta(days=i) for i in range(days)]
+
+        self.status = SCAN_RUNNING
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._heap: List[Tuple] = []
+        self._daily: Dict[date, Dict] = {}
+        self._hours_scanned = 0
+        self._pending = -(-len(self.days) // SCAN_CHUNK_DAYS)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> 'StrategicScan':
+        self.started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="strategic-scan")
+        for i in range(0, len(self.days), SCAN_CHUNK_DAYS):
+            future = self._executor.submit(self._scan_days, self.days[i:i + SCAN_CHUNK_DAYS])
+            future.add_done_callback(self._chunk_finished)
+        self._executor.shutdown(wait=False)
+        return self
+
+    def cancel(self):
+        """Stop after the days already being scanned; pending days are dropped"""
+        self._cancel.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        elif self.running:
+            self.status = SCAN_CANCELLED
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the scan has finished; False on timeout"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.running:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    @property
+    def running(self) -> bool:
+        return self.status == SCAN_RUNNING
+
+    def _scan_days(self, days: List[date]) -> Optional[Tuple[List[date], Dict]]:
+        """One kernel call for a chunk of days"""
+        if self._cancel.is_set():
+            return None
+        slots = [slot for day in days for slot in hour_slots(day)]
+        matrix = score_hours_matrix([hour_dt for _, _, hour_dt in slots], [self.activity], self.user_profile)
+        matrix["hour_names"] = [hour_name for hour_name, _, _ in slots]
+        matrix["time_ranges"] = [time_range for _, time_range, _ in slots]
+        return days, matrix
+
+    def _chunk_finished(self, future):
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                error = future.exception()
+                if error is not None:
+                    self.error = f"{type(error).__name__}: {error}"
+                    self._cancel.set()
+                elif future.result() is not None:
+                    self._merge(*future.result())
+            if self._pending == 0:
+                if self.error:
+                    self.status = SCAN_FAILED
+                elif self._cancel.is_set():
+                    self.status = SCAN_CANCELLED
+                else:
+                    self.status = SCAN_DONE
+                self.finished_at = time.time()
+
+    def _merge(self, days: List[date], matrix: Dict):
+        """
+        Push a chunk's hours into the top-K heap and record each day's
+        summary (lock held). Result dicts are only built for hours that
+        make the heap.
+        """
+        scores = matrix["scores"][:, 0]
+        verdicts = matrix["verdicts"][:, 0]
+        hours_per_day = len(CHINESE_HOURS)
+
+        for row, score in enumerate(scores.tolist()):
+            self._seq += 1
+            key = (score, -matrix["hours"][row].timestamp(), -self._seq)
+            if len(self._heap) < self.top_k or key > self._heap[0][:3]:
+                result = hour_result(matrix, row)
+                result["date"] = days[row // hours_per_day]
+                entry = key + (result,)
+                if len(self._heap) < self.top_k:
+                    heapq.heappush(self._heap, entry)
+                else:
+                    heapq.heapreplace(self._heap, entry)
+
+        for i, day in enumerate(days):
+            rows = slice(i * hours_per_day, (i + 1) * hours_per_day)
+            day_scores = scores[rows]
+            best = i * hours_per_day + int(np.argmax(day_scores))
+            self._daily[day] = {
+                "date": day,
+                "best_score": int(scores[best]),
+                "best_hour": matrix["hour_names"][best],
+                "best_door": DOOR_NAMES[matrix["codes"][best, 0, _DOOR]],
+                "average_score": round(float(day_scores.mean()), 1),
+                "good_hours": int((verdicts[rows] == VERDICTS.index("good")).sum()),
+            }
+        self._hours_scanned += len(scores)
+
+    def snapshot(self) -> Dict:
+        """
+        Progress and partial results.
+
+        Returns dict with status, days_done, days_total, hours_scanned,
+        progress (0 - 1), elapsed (seconds), error, top (best hours first)
+        and daily (one summary per scanned day, by date).
+        """
+        with self._lock:
+            top = [entry[3] for entry in sorted(self._heap, key=lambda e: e[:3], reverse=True)]
+            daily = [self._daily[day] for day in sorted(self._daily)]
+            days_done = len(self._daily)
+            end = self.finished_at or time.time()
+            return {
+                "status": self.status,
+                "days_done": days_done,
+                "days_total": len(self.days),
+                "hours_scanned": self._hours_scanned,
+                "progress": days_done / len(self.days),
+                "elapsed": round(end - (self.started_at or end), 2),
+                "error": self.error,
+                "top": top,
+                "daily": daily,
+            }
+
+
+def scan_range(start: date, end: date, activity: str, user_profile: Dict = None,
+               top_k: int = SCAN_TOP_K, workers: int = SCAN_WORKERS) -> StrategicScan:
+    """Start a StrategicScan in the background and return it"""
+    return StrategicScan(start, end, activity, user_profile, top_k, workers).start()
@@ -1,8 +1,18 @@
 # pages/2_Export.py - Ming QiMenDunJia v10.3 PRO
 # Export Center - Fixed session state sync
 import streamlit as st
-import json
+import gzip
+import sys
 from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.history_export import export_file_name, export_mime_type
+from core.schema_export import analysis_prompt, bazi_section, encode_export
 
 st.set_page_config(page_title="Export | Ming Qimen", page_icon="📦", layout="wide")
 
@@ -79,59 +89,35 @@ def main():
     if has_qmdj or has_bazi:
         st.subheader("📤 Export Options")
         
-        # Build export data
-        export_data = {
-            "schema_version": "3.0",
-            "exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "metadata": {
-                "timezone": "UTC+8",
-                "method": "Chai Bu",
-                "analysis_type": "INTEGRATED" if (has_qmdj and has_bazi) else ("QMDJ_ONLY" if has_qmdj else "BAZI_ONLY")
-            }
-        }
-        
-        # Add QMDJ data
-        if has_qmdj:
-            chart = st.session_state.qmdj_chart
-            export_data["qmdj_data"] = {
-                "datetime": chart.get("datetime"),
-                "structure": chart.get("structure"),
-                "structure_cn": chart.get("structure_cn"),
-                "ju_number": chart.get("ju"),
-                "palaces": chart.get("palaces", {})
-            }
-        
-        # Add BaZi data
-        if has_bazi:
-            bazi = st.session_state.get("bazi_data", {})
-            profile = st.session_state.get("user_profile", {})
-            
-            export_data["bazi_data"] = {
-                "day_master": {
-                    "stem": bazi.get("dm", profile.get("day_master")),
-                    "element": bazi.get("dm_elem", profile.get("element")),
-                    "strength": bazi.get("strength_cat", profile.get("strength")),
-                    "strength_pct": bazi.get("strength_pct")
-                },
-                "useful_gods": bazi.get("useful", profile.get("useful_gods", [])),
-                "unfavorable": bazi.get("unfav", profile.get("unfavorable", [])),
-                "pillars": bazi.get("pillars", []),
-                "ten_profiles": bazi.get("gods_dist", {}),
-                "main_profile": bazi.get("main_profile", profile.get("profile"))
-            }
+        # Encode once; download, clipboard, prompt and preview share the bytes
+        chart = st.session_state.qmdj_chart if has_qmdj else None
+        bazi_data = bazi_section(
+            st.session_state.get("bazi_data"), st.session_state.get("user_profile")
+        ) if has_bazi else None
+        export_bytes = encode_export(chart, bazi_data)
+        json_str = export_bytes.decode("utf-8")
         
         # Export buttons
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            json_str = json.dumps(export_data, indent=2, ensure_ascii=False)
             st.download_button(
                 "📥 Download JSON",
-                json_str,
+                export_bytes,
                 file_name=f"ming_qimen_export_{datetime.now().strftime('%Y%m%d_%H%M')}.json",
                 mime="application/json",
                 use_container_width=True
             )
+            # One record per line, ready to append to an ML dataset
+            st.download_button(
+                "📥 Download JSONL (gzip)",
+                gzip.compress(encode_export(chart, bazi_data, indent=False) + b"\n"),
+                file_name=export_file_name(
+                    "ming_qimen_export", "jsonl", True, datetime.now().strftime('%Y%m%d_%H%M')
+                ),
+                mime=export_mime_type("jsonl", True),
+                use_container_width=True
+            )
         
         with col2:
             if st.button("📋 Copy to Clipboard", use_container_width=True):
@@ -147,36 +133,7 @@ def main():
             st.divider()
             st.subheader("🤖 AI Analysis Prompt")
             
-            prompt = f"""# Chinese Metaphysics Analysis Request
-
-## Data (Universal Schema v3.0)
-```json
-{json.dumps(export_data, indent=2, ensure_ascii=False)}
-```
-
-## Analysis Required
-Please provide comprehensive analysis covering:
-
-### QMDJ Analysis (if data available):
-1. Overall chart auspiciousness
-2. Best palace/direction for action
-3. Formation assessment
-4. Timing recommendations
-
-### BaZi Analysis (if data available):
-1. Day Master personality and traits
-2. Strength assessment implications
-3. Useful gods and favorable elements
-4. 10 Profiles interpretation
-5. Current luck period
-
-### Integrated Synthesis:
-1. How QMDJ timing aligns with BaZi destiny
-2. Strategic recommendations
-3. What to pursue vs avoid
-4. Key action items
-
-Please use Joey Yap terminology and provide practical, actionable advice."""
+            prompt = analysis_prompt(export_bytes)
 
             st.code(prompt, language="markdown")
             
@@ -188,7 +145,7 @@ Please use Joey Yap terminology and provide practical, actionable advice."""
         
         # Preview
         with st.expander("👁️ Preview Export Data"):
-            st.json(export_data)
+            st.json(json_str)
     
     else:
         st.warning("⚠️ No chart data available. Please generate a chart first.")
@@ -5,7 +5,23 @@ View past readings and track outcomes
 
 import streamlit as st
 from datetime import datetime, timezone, timedelta
-import json
+import math
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.history_store import get_history_store, OUTCOMES
+from core.history_export import (
+    EXPORT_FORMATS, export_file_name, export_mime_type, iter_history_export, write_export
+)
+from core.ml_dataset import ML_COLUMNS, ML_FORMATS, PYARROW_AVAILABLE, write_ml_dataset
+from core.outcome_analytics import ANALYTICS_DIMENSIONS, outcome_report
 
 st.set_page_config(page_title="History | Ming Qimen", page_icon="📜", layout="wide")
 
@@ -105,21 +121,49 @@ st.markdown("*Past readings and outcome tracking*")
 
 st.divider()
 
-# Initialize history in session state
-if "reading_history" not in st.session_state:
+store = get_history_store()
+
+# Readings saved by older versions only lived in session state - move them into the store
+if st.session_state.get("reading_history"):
+    store.add_many(st.session_state.reading_history)
     st.session_state.reading_history = []
 
-history = st.session_state.reading_history
+# Readings per page
+PAGE_SIZES = [10, 25, 50, 100]
+
+stats = store.stats()
+total = stats["total"]
+
+# Changes with every write to the store (readings added, outcomes or notes
+# recorded, history cleared - here or in another process), so a prepared
+# download is never offered for data that has since changed
+data_version = store.data_version()
+
+
+def prepared_download(state_key, cache_key, label, build):
+    """
+    Result of build(), computed only when the prepare button is clicked and
+    kept in session state until cache_key changes (reruns reuse it).
+    Returns None until prepared.
+    """
+    prepared = st.session_state.get(state_key)
+    if prepared and prepared[0] == cache_key:
+        return prepared[1]
+    if st.button(label, key=f"{state_key}_prepare"):
+        with st.spinner("Preparing download..."):
+            result = build()
+        st.session_state[state_key] = (cache_key, result)
+        return result
+    return None
+
 
 # Stats row
-if history:
+if total:
     col1, col2, col3, col4 = st.columns(4)
     
-    total = len(history)
-    pending = len([h for h in history if h.get("outcome") == "PENDING"])
-    success = len([h for h in history if h.get("outcome") == "SUCCESS"])
-    
-    success_rate = (success / (total - pending) * 100) if (total - pending) > 0 else 0
+    pending = stats["pending"]
+    success = stats["success"]
+    success_rate = stats["success_rate"]
     
     with col1:
         st.markdown(f"""
@@ -156,10 +200,45 @@ if history:
     st.divider()
 
 # Display history
-if history:
+if total:
     st.subheader("📋 Reading History")
     
-    for idx, reading in enumerate(reversed(history)):
+    # Filters are applied in SQL; only one page of readings is loaded
+    fcol1, fcol2, fcol3, fcol4 = st.columns([2, 1, 1, 1])
+    with fcol1:
+        date_range = st.date_input("Date range", value=(), key="history_dates")
+    with fcol2:
+        verdict_filter = st.selectbox("Verdict", ["All"] + store.distinct("verdict"), key="history_verdict")
+    with fcol3:
+        outcome_filter = st.selectbox("Outcome", ["All"] + OUTCOMES, key="history_outcome")
+    with fcol4:
+        page_size = st.selectbox("Per page", PAGE_SIZES, index=1, key="history_page_size")
+    
+    filters = {
+        "verdict": None if verdict_filter == "All" else verdict_filter,
+        "outcome": None if outcome_filter == "All" else outcome_filter,
+        "date_from": date_range[0].isoformat() if len(date_range) > 0 else None,
+        "date_to": date_range[1].isoformat() if len(date_range) > 1 else None,
+    }
+    
+    matching = store.count(**filters)
+    num_pages = max(1, math.ceil(matching / page_size))
+    if st.session_state.get("history_page", 1) > num_pages:
+        st.session_state.history_page = num_pages
+    
+    pcol1, pcol2 = st.columns([1, 3])
+    with pcol1:
+        page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, key="history_page")
+    offset = (page - 1) * page_size
+    history = store.query(limit=page_size, offset=offset, **filters)
+    with pcol2:
+        if matching:
+            st.caption(f"Showing {offset + 1}-{offset + len(history)} of {matching} matching readings "
+                       f"({total} total) • Page {page} of {num_pages}")
+        else:
+            st.caption(f"No readings match these filters ({total} total)")
+    
+    for reading in history:
         verdict = reading.get("verdict", "NEUTRAL")
         verdict_class = f"verdict-{verdict.lower().replace(' ', '-')}"
         outcome = reading.get("outcome", "PENDING")
@@ -186,69 +265,155 @@ if history:
         </div>
         """, unsafe_allow_html=True)
         
-        with st.expander(f"Details & Outcome Tracking"):
+        # Details and outcome widgets are only built (and re-read) once opened
+        if st.toggle("Details & Outcome Tracking", key=f"details_{reading['id']}"):
+            details = store.get(reading["id"]) or reading
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("**Reading Details:**")
-                st.json(reading)
+                st.json(details)
             
             with col2:
                 st.markdown("**Update Outcome:**")
                 new_outcome = st.selectbox(
                     "Outcome",
-                    ["PENDING", "SUCCESS", "PARTIAL", "FAILURE", "NOT_APPLICABLE"],
-                    index=["PENDING", "SUCCESS", "PARTIAL", "FAILURE", "NOT_APPLICABLE"].index(outcome),
-                    key=f"outcome_{idx}"
+                    OUTCOMES,
+                    index=OUTCOMES.index(details.get("outcome")) if details.get("outcome") in OUTCOMES else 0,
+                    key=f"outcome_{reading['id']}"
                 )
                 
-                notes = st.text_area("Notes", reading.get("notes", ""), key=f"notes_{idx}")
+                notes = st.text_area("Notes", details.get("notes", ""), key=f"notes_{reading['id']}")
                 
-                if st.button("💾 Save", key=f"save_{idx}"):
-                    # Update in reversed order
-                    actual_idx = len(history) - 1 - idx
-                    st.session_state.reading_history[actual_idx]["outcome"] = new_outcome
-                    st.session_state.reading_history[actual_idx]["notes"] = notes
+                if st.button("💾 Save", key=f"save_{reading['id']}"):
+                    store.update_outcome(reading["id"], new_outcome, notes)
                     st.success("Saved!")
                     st.rerun()
     
     st.divider()
     
+    # Signal analytics - which doors, stars, formations... actually deliver
+    st.subheader("📊 Signal Analytics")
+    
+    if st.toggle("Show success rates by chart signal", key="history_analytics"):
+        acol1, acol2, acol3 = st.columns([2, 1, 1])
+        with acol1:
+            signal = st.selectbox(
+                "Group by", ANALYTICS_DIMENSIONS,
+                format_func=lambda d: d.title(), key="analytics_signal"
+            )
+        with acol2:
+            min_resolved = st.number_input("Min. resolved", min_value=1, value=5, key="analytics_min")
+        with acol3:
+            partial_weight = st.selectbox(
+                "Partial counts as", [0.5, 0.0, 1.0],
+                format_func=lambda w: f"{w:g} success", key="analytics_partial"
+            )
+        
+        report = outcome_report(store, [signal], int(min_resolved), partial_weight, **filters)
+        baseline, rows = report["baseline"], report["dimensions"][signal]
+        st.caption(
+            f"Baseline: {baseline['success_rate']}% of {baseline['resolved']} resolved readings "
+            f"(95% CI {baseline['ci_low']}-{baseline['ci_high']}%) • Sorted by lower CI bound"
+        )
+        if rows:
+            st.dataframe(
+                [{
+                    signal.title(): row["value"],
+                    "Resolved": row["resolved"],
+                    "Success %": row["success_rate"],
+                    "95% CI": f"{row['ci_low']}-{row['ci_high']}%",
+                    "Lift (pts)": row["lift"],
+                    "Readings": row["readings"],
+                } for row in rows],
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info(f"No {signal} has {int(min_resolved)}+ resolved readings yet. Record outcomes above.")
+    
+    st.divider()
+    
     # Export history
     st.subheader("📤 Export History")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        json_str = json.dumps(history, indent=2, ensure_ascii=False)
-        st.download_button(
-            "⬇️ Download as JSON",
-            json_str,
-            file_name=f"ming_qimen_history_{datetime.now().strftime('%Y%m%d')}.json",
-            mime="application/json",
-            use_container_width=True
-        )
+    # Readings are streamed from the store in chunks into a temp file,
+    # so only the (optionally gzipped) file is ever held, not the readings.
+    # The file is built on request and reused until filters or data change.
+    if st.toggle(f"Prepare download ({matching} matching readings)", key="history_export"):
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            export_fmt = st.selectbox(
+                "Format", EXPORT_FORMATS, format_func=str.upper, key="history_export_fmt"
+            )
+        with col2:
+            export_gzip = st.checkbox("gzip", value=matching > 5000, key="history_export_gzip")
+        
+        def build_export():
+            with tempfile.TemporaryFile() as spool:
+                write_export(iter_history_export(store, export_fmt, export_gzip, **filters), spool)
+                spool.seek(0)
+                return spool.read()
+        
+        with col3:
+            export_data = prepared_download(
+                "history_export_data",
+                (tuple(sorted(filters.items())), export_fmt, export_gzip, data_version),
+                f"📦 Build {export_fmt.upper()} export",
+                build_export
+            )
+            if export_data is not None:
+                st.download_button(
+                    f"⬇️ Download {export_fmt.upper()}{' (gzip)' if export_gzip else ''}",
+                    export_data,
+                    file_name=export_file_name(
+                        "ming_qimen_history", export_fmt, export_gzip, datetime.now().strftime('%Y%m%d')
+                    ),
+                    mime=export_mime_type(export_fmt, export_gzip),
+                    use_container_width=True
+                )
     
-    with col2:
-        # CSV format
-        csv_lines = ["Date,Time,Palace,Ju,Star,Door,Score,Verdict,Outcome,Notes"]
-        for h in history:
-            csv_lines.append(f"{h.get('date','')},{h.get('time','')},{h.get('palace','')},{h.get('ju','')},{h.get('star','')},{h.get('door','')},{h.get('score','')},{h.get('verdict','')},{h.get('outcome','')},{h.get('notes','').replace(',',';')}")
+    # Flat, typed chart features + outcomes for model training
+    if st.toggle("Prepare ML dataset (Parquet / Arrow / npz)", key="history_ml_export"):
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            ml_fmt = st.selectbox(
+                "Dataset format", ML_FORMATS if PYARROW_AVAILABLE else ("npz",),
+                format_func=str.upper, key="history_ml_fmt"
+            )
         
-        csv_str = "\n".join(csv_lines)
-        st.download_button(
-            "⬇️ Download as CSV",
-            csv_str,
-            file_name=f"ming_qimen_history_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        # One chart is generated per reading, so build only on request
+        def build_ml_dataset():
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                ml_path = os.path.join(tmp_dir, f"dataset.{ml_fmt}")
+                rows = write_ml_dataset(ml_path, store, **filters)
+                with open(ml_path, "rb") as handle:
+                    return rows, handle.read()
+        
+        with col2:
+            ml_dataset = prepared_download(
+                "history_ml_data",
+                (tuple(sorted(filters.items())), ml_fmt, data_version),
+                f"🧮 Build {ml_fmt.upper()} dataset",
+                build_ml_dataset
+            )
+            if ml_dataset is not None:
+                ml_rows, ml_data = ml_dataset
+                st.download_button(
+                    f"⬇️ Download {ml_fmt.upper()} ({ml_rows} rows × {len(ML_COLUMNS)} columns)",
+                    ml_data,
+                    file_name=f"ming_qimen_dataset_{datetime.now().strftime('%Y%m%d')}.{ml_fmt}",
+                    mime="application/octet-stream",
+                    use_container_width=True
+                )
+        if not PYARROW_AVAILABLE:
+            st.caption("Install pyarrow for Parquet / Arrow output")
     
     # Clear history
     st.divider()
     if st.button("🗑️ Clear All History", type="secondary"):
         if st.checkbox("I understand this cannot be undone"):
-            st.session_state.reading_history = []
+            store.clear()
             st.success("History cleared!")
             st.rerun()
 
@@ -269,13 +434,11 @@ else:
 with st.sidebar:
     st.markdown("### 📜 History")
     
-    if history:
-        st.markdown(f"**Total:** {len(history)} readings")
+    if total:
+        st.markdown(f"**Total:** {total} readings")
         
         # Quick stats
-        verdicts = [h.get("verdict", "NEUTRAL") for h in history]
-        for v in set(verdicts):
-            count = verdicts.count(v)
+        for v, count in stats["by_verdict"].items():
             st.markdown(f"- {v}: {count}")
     else:
         st.info("No history yet")
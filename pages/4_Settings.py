@@ -25,7 +25,8 @@ if str(ROOT_DIR) not in sys.path:
 
 # Try to import BaZi calculator
 try:
-    from core.bazi_calculator import analyze_bazi, ELEMENT_COLORS
+    from core.bazi_calculator import ELEMENT_COLORS
+    from core.chart_cache import cached_analyze_bazi
     IMPORT_SUCCESS = True
 except ImportError:
     IMPORT_SUCCESS = False
@@ -34,6 +35,9 @@ except ImportError:
         'Metal': '#C0C0C0', 'Water': '#1E90FF'
     }
 
+# analyze_bazi sections used by the profile card
+PROFILE_SECTIONS = ['birth_info', 'four_pillars', 'day_master', 'useful_gods', 'profiles', 'life_star']
+
 
 def main():
     st.set_page_config(
@@ -211,8 +215,12 @@ def main():
                 
                 if st.button("🔮 Calculate My BaZi", type="primary", use_container_width=True):
                     with st.spinner("Calculating..."):
-                        result = analyze_bazi(calc_date, calc_hour, calc_gender.lower())
-                        st.session_state.bazi_result = result
+                        # Only the sections shown on this page; the BaZi page
+                        # runs the full analysis itself
+                        result = cached_analyze_bazi(
+                            calc_date, calc_hour, calc_gender.lower(),
+                            sections=PROFILE_SECTIONS
+                        )
                         st.session_state.bazi_birth_info = {
                             'date': calc_date.isoformat(),
                             'hour': calc_hour,
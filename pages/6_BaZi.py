@@ -55,7 +55,6 @@ try:
         get_dominant_profile_joey_yap,
         get_luck_direction,
         pillars_to_dict,
-        analyze_bazi,
         ELEMENT_COLORS,
         PROFILE_NAMES,
         TEN_GODS_CN,
@@ -65,11 +64,19 @@ try:
         FIVE_STRUCTURES_INFO,
         HIDDEN_STEM_ROLES,
     )
+    from core.chart_cache import cached_analyze_bazi
     IMPORT_SUCCESS = True
 except ImportError as e:
     IMPORT_SUCCESS = False
     IMPORT_ERROR = str(e)
 
+# Chart rarity atlas (needs numpy)
+try:
+    from core.bazi_atlas import chart_rarity
+    from core.bazi_calculator import NUMPY_AVAILABLE as ATLAS_AVAILABLE
+except ImportError:
+    ATLAS_AVAILABLE = False
+
 # =============================================================================
 # PAGE CONFIG
 # =============================================================================
@@ -160,6 +167,14 @@ def main():
             help="Select the hour of birth"
         )
         
+        birth_minute = st.number_input(
+            "Birth Minute",
+            min_value=0,
+            max_value=59,
+            value=0,
+            help="Used for the exact Luck Pillar start age"
+        )
+        
         gender = st.radio(
             "Gender",
             options=["Male", "Female"],
@@ -179,11 +194,12 @@ def main():
     if calculate_btn or 'bazi_result' in st.session_state:
         if calculate_btn:
             # Run analysis
-            result = analyze_bazi(birth_date, birth_hour, gender.lower())
+            result = cached_analyze_bazi(birth_date, birth_hour, gender.lower(), birth_minute=int(birth_minute))
             st.session_state.bazi_result = result
             st.session_state.bazi_birth_info = {
                 'date': birth_date,
                 'hour': birth_hour,
+                'minute': int(birth_minute),
                 'gender': gender
             }
         
@@ -430,6 +446,36 @@ def main():
             
             st.info(ug['explanation'])
         
+        # =====================================================================
+        # CHART RARITY (century atlas)
+        # =====================================================================
+        
+        if ATLAS_AVAILABLE:
+            with st.expander("🔍 How rare is this chart? (1900-2100 atlas)"):
+                rarity = chart_rarity(result)
+                
+                rc1, rc2, rc3, rc4 = st.columns(4)
+                with rc1:
+                    st.metric("Exact Four Pillars", f"{rarity['exact_matches']}×",
+                              help="Two-hour birth slots from 1900-2100 with these exact pillars")
+                with rc2:
+                    st.metric("This combination", f"{rarity['combination']['share']:.2f}%",
+                              help="Same Day Master, strength, dominant profile and structure")
+                with rc3:
+                    st.metric("Stronger than", f"{rarity['strength_percentile']:.0f}%",
+                              help="Share of all charts with an equal or weaker Day Master")
+                with rc4:
+                    st.metric(f"Gua {rarity['gua']['value']}", f"{rarity['gua']['share']:.1f}%",
+                              help="Share of the same gender with this Life Star")
+                
+                st.caption(
+                    f"{rarity['day_master']['value']} Day Master: {rarity['day_master']['share']:.1f}% | "
+                    f"{rarity['strength_category']['value']}: {rarity['strength_category']['share']:.1f}% | "
+                    f"{rarity['dominant_profile']['name']}: {rarity['dominant_profile']['share']:.1f}% | "
+                    f"{rarity['dominant_structure']['value']} structure: {rarity['dominant_structure']['share']:.1f}% "
+                    f"of {rarity['total_charts']:,} charts"
+                )
+        
         # =====================================================================
         # TEN PROFILES
         # =====================================================================
@@ -482,37 +528,31 @@ def main():
         st.markdown("---")
         st.markdown('<h3 class="section-header">📅 Annual Analysis 2026 流年分析</h3>', unsafe_allow_html=True)
         
-        # Import annual functions
+        # Annual tables are cached per (year, Day Master, profiles), so
+        # reruns and other sessions with the same chart reuse them
         try:
-            from core.bazi_calculator import (
-                calculate_annual_pillar,
-                calculate_annual_ten_gods,
-                calculate_annual_profile_influence,
-                calculate_six_aspects,
-                calculate_annual_six_aspects,
-                calculate_monthly_influence
-            )
+            from core.chart_cache import cached_annual_overview
             
             # Calculate Annual Pillar for 2026
             annual_year = 2026  # Could make this selectable
-            annual_pillar = calculate_annual_pillar(annual_year)
             day_master_stem = result['day_master']['stem']
+            annual = cached_annual_overview(
+                annual_year,
+                day_master_stem,
+                profiles['counts'],
+                profiles['percentages']
+            )
+            annual_pillar = annual['annual_pillar']
             
             # Annual Ten Gods
-            annual_gods = calculate_annual_ten_gods(day_master_stem, annual_pillar)
+            annual_gods = annual['annual_gods']
             
             # Annual Profile Influence
-            annual_profile_pcts = calculate_annual_profile_influence(
-                profiles['counts'], 
-                annual_pillar, 
-                day_master_stem
-            )
-            
-            # Six Aspects - Natal
-            natal_six_aspects = calculate_six_aspects(profiles['percentages'])
+            annual_profile_pcts = annual['annual_profile_pcts']
             
-            # Six Aspects - Annual
-            annual_six_aspects = calculate_annual_six_aspects(natal_six_aspects, annual_profile_pcts)
+            # Six Aspects - Natal and Annual
+            natal_six_aspects = annual['natal_six_aspects']
+            annual_six_aspects = annual['annual_six_aspects']
             
             # Display Annual Pillar
             col1, col2 = st.columns([1, 2])
@@ -627,7 +667,7 @@ def main():
             
             # Monthly Influence Preview
             with st.expander("📅 2026 Monthly Influence Preview"):
-                monthly = calculate_monthly_influence(annual_year, day_master_stem)
+                monthly = annual['monthly']
                 
                 cols = st.columns(6)
                 for i, month in enumerate(monthly[:6]):
@@ -1182,7 +1222,12 @@ def main():
         current_luck = result.get('current_luck', {})
         current_idx = current_luck.get('pillar_index', -1)
         
-        st.caption(f"**Direction:** {lp_data['direction']} | **Start Age:** {lp_data['start_age']} | **Current Age:** {current_luck.get('current_age', 'N/A')}")
+        start_detail = lp_data.get('start_detail', {})
+        start_text = f"{lp_data['start_age']}"
+        if start_detail:
+            start_text += f" ({start_detail['years']}y {start_detail['months']}m {start_detail['days']}d, from {start_detail['term']})"
+        
+        st.caption(f"**Direction:** {lp_data['direction']} | **Start Age:** {start_text} | **Current Age:** {current_luck.get('current_age', 'N/A')}")
         
         # Display luck pillars
         lp_cols = st.columns(len(lp_data['pillars']))
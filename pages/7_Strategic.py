@@ -12,25 +12,32 @@ import streamlit as st
 from datetime import datetime, timedelta
 import pytz
 import json
-
-# Import from core modules
+import time
 import sys
-sys.path.insert(0, '..')
+from pathlib import Path
+
+# Add parent directory to path for imports
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
 
 try:
-    from core.qmdj_engine import (
-        generate_qmdj_chart, calculate_qmdj_pillars,
-        calculate_death_emptiness, calculate_horse_star,
-        calculate_nobleman, calculate_lead_indicators,
-        PALACE_INFO, SGT
-    )
-    from core.formations import (
-        detect_formations, get_formation_score,
-        format_formation_display, FormationCategory
+    from core.chart_cache import cached_qmdj_chart
+    from core.strategic_scan import (
+        ACTIVITY_TYPES, DOOR_INSIGHTS,
+        score_directions, scan_day, scan_day_matrix, with_insights, StrategicScan,
+        SCAN_MAX_DAYS, SCAN_TOP_K, SCAN_RUNNING
     )
     IMPORTS_OK = True
-except ImportError:
+except ImportError as e:
     IMPORTS_OK = False
+    IMPORT_ERROR = str(e)
+
+try:
+    from core.history_store import get_history_store
+    HISTORY_OK = True
+except ImportError:
+    HISTORY_OK = False
 
 
 # =============================================================================
@@ -97,201 +104,6 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# =============================================================================
-# CONSTANTS & BRIEF INSIGHTS
-# =============================================================================
-
-CHINESE_HOURS = [
-    ("Zi", "子", "23:00-01:00", "Rat"),
-    ("Chou", "丑", "01:00-03:00", "Ox"),
-    ("Yin", "寅", "03:00-05:00", "Tiger"),
-    ("Mao", "卯", "05:00-07:00", "Rabbit"),
-    ("Chen", "辰", "07:00-09:00", "Dragon"),
-    ("Si", "巳", "09:00-11:00", "Snake"),
-    ("Wu", "午", "11:00-13:00", "Horse"),
-    ("Wei", "未", "13:00-15:00", "Goat"),
-    ("Shen", "申", "15:00-17:00", "Monkey"),
-    ("You", "酉", "17:00-19:00", "Rooster"),
-    ("Xu", "戌", "19:00-21:00", "Dog"),
-    ("Hai", "亥", "21:00-23:00", "Pig")
-]
-
-ACTIVITY_TYPES = {
-    "💼 Business Meeting": {"palace": 6, "doors": ["Open", "Rest"], "desc": "Authority, negotiations"},
-    "📝 Sign Contract": {"palace": 6, "doors": ["Open", "Life"], "desc": "Binding agreements"},
-    "💰 Investment": {"palace": 4, "doors": ["Life", "Open"], "desc": "Wealth growth"},
-    "💕 Dating/Romance": {"palace": 2, "doors": ["Rest", "Scenery"], "desc": "Relationships, connection"},
-    "📚 Study/Exam": {"palace": 8, "doors": ["Scenery", "Life"], "desc": "Learning, recognition"},
-    "✈️ Travel": {"palace": 1, "doors": ["Open", "Rest"], "desc": "Movement, journeys"},
-    "🏥 Medical Visit": {"palace": 3, "doors": ["Life", "Rest"], "desc": "Health matters"},
-    "🏠 Property Deal": {"palace": 8, "doors": ["Life", "Open"], "desc": "Real estate, stability"},
-    "⚖️ Legal Matter": {"palace": 6, "doors": ["Open"], "desc": "Official processes"},
-    "🎯 General Action": {"palace": 5, "doors": ["Open", "Life", "Rest"], "desc": "Any activity"}
-}
-
-# Brief door meanings (not full interpretations)
-DOOR_INSIGHTS = {
-    "Open": ("✨", "Opens opportunities, authority support"),
-    "Rest": ("💤", "Ease, networking, passive gains"),
-    "Life": ("🌱", "Growth, creation, wealth building"),
-    "Harm": ("⚔️", "Competition, conflict, breakthroughs"),
-    "Delusion": ("🌫️", "Hidden matters, strategy, secrecy"),
-    "Scenery": ("🎭", "Recognition, expression, visibility"),
-    "Death": ("💀", "Endings, stagnation - avoid new starts"),
-    "Fear": ("⚡", "Surprises, legal issues, alertness")
-}
-
-DIRECTIONS = [
-    ("N", "North", 1), ("NE", "Northeast", 8), ("E", "East", 3),
-    ("SE", "Southeast", 4), ("S", "South", 9), ("SW", "Southwest", 2),
-    ("W", "West", 7), ("NW", "Northwest", 6)
-]
-
-
-# =============================================================================
-# SCORING WITH INSIGHTS
-# =============================================================================
-
-def score_hour(hour_dt: datetime, activity: str, user_profile: dict = None) -> dict:
-    """Score an hour with brief insights explaining why."""
-    if not IMPORTS_OK:
-        import random
-        return {
-            "score": random.randint(3, 8),
-            "door": "Open", "star": "Heart", "deity": "Chief",
-            "formations": [], "insights": ["Demo mode - install core modules"],
-            "verdict": "neutral"
-        }
-    
-    try:
-        chart = generate_qmdj_chart(hour_dt)
-        activity_info = ACTIVITY_TYPES.get(activity, ACTIVITY_TYPES["🎯 General Action"])
-        target_palace = activity_info["palace"]
-        palace_data = chart.get("palaces", {}).get(str(target_palace), {})
-        
-        score = 5
-        insights = []
-        
-        # Door analysis with insight
-        door = palace_data.get("door", "")
-        door_emoji, door_meaning = DOOR_INSIGHTS.get(door, ("", ""))
-        
-        if door in activity_info["doors"]:
-            score += 2
-            insights.append(f"{door_emoji} {door} Door favors this activity")
-        elif door in ["Death", "Harm", "Fear"]:
-            score -= 2
-            insights.append(f"{door_emoji} {door} Door: {door_meaning}")
-        else:
-            insights.append(f"{door_emoji} {door} Door: {door_meaning}")
-        
-        # Formation detection with names
-        formations = detect_formations(palace_data)
-        f_score, _ = get_formation_score(formations)
-        score += f_score
-        
-        formation_names = []
-        for f in formations:
-            if f.category == FormationCategory.AUSPICIOUS:
-                formation_names.append(f"✨ {f.name_en}")
-            elif f.category == FormationCategory.INAUSPICIOUS:
-                formation_names.append(f"⚠️ {f.name_en}")
-            else:
-                formation_names.append(f"📜 {f.name_en}")
-        
-        if formation_names:
-            insights.append(f"Formations: {', '.join(formation_names[:3])}")
-        
-        # Death & Emptiness
-        if palace_data.get("death_emptiness", False):
-            score -= 2
-            insights.append("💀 Palace in Death & Emptiness - energy blocked")
-        
-        # Horse Star
-        if palace_data.get("has_horse", False):
-            if "Travel" in activity:
-                score += 1
-                insights.append("🐴 Horse Star activates - good for movement")
-            else:
-                insights.append("🐴 Horse Star present - things move fast")
-        
-        # Nobleman
-        if palace_data.get("has_nobleman", False):
-            score += 1
-            insights.append("👑 Nobleman arrives - helpful people appear")
-        
-        # BaZi alignment
-        if user_profile:
-            useful_gods = user_profile.get("useful_gods", [])
-            palace_element = palace_data.get("palace_element", "")
-            if palace_element in useful_gods:
-                score += 1
-                insights.append(f"🎴 Palace {palace_element} aligns with your BaZi")
-        
-        score = max(1, min(10, score))
-        
-        # Determine verdict
-        if score >= 7:
-            verdict = "good"
-        elif score <= 3:
-            verdict = "bad"
-        else:
-            verdict = "neutral"
-        
-        return {
-            "score": score,
-            "door": door,
-            "star": palace_data.get("star", ""),
-            "deity": palace_data.get("deity", ""),
-            "heaven_stem": palace_data.get("heaven_stem", ""),
-            "formations": [f.name_en for f in formations],
-            "formation_categories": [f.category.value for f in formations],
-            "insights": insights,
-            "verdict": verdict,
-            "palace_data": palace_data
-        }
-    except Exception as e:
-        return {"score": 5, "door": "?", "star": "?", "deity": "?", "insights": [str(e)[:50]], "verdict": "neutral"}
-
-
-def score_direction(chart: dict, direction: str, palace_num: int) -> dict:
-    """Score a direction with brief insight."""
-    if not chart:
-        return {"score": 5, "verdict": "neutral", "door": "?", "insight": "No data"}
-    
-    palace_data = chart.get("palaces", {}).get(str(palace_num), {})
-    door = palace_data.get("door", "")
-    door_emoji, door_meaning = DOOR_INSIGHTS.get(door, ("", "Unknown"))
-    
-    score = 5
-    if door in ["Open", "Life", "Rest"]:
-        score = 7
-        verdict = "good"
-    elif door in ["Death", "Harm", "Fear"]:
-        score = 3
-        verdict = "bad"
-    else:
-        verdict = "neutral"
-    
-    if palace_data.get("death_emptiness", False):
-        score -= 2
-        verdict = "bad"
-    
-    # Check for formations
-    formations = detect_formations(palace_data) if IMPORTS_OK else []
-    if formations:
-        auspicious = sum(1 for f in formations if f.category == FormationCategory.AUSPICIOUS)
-        if auspicious > 0:
-            score += 1
-    
-    return {
-        "score": max(1, min(10, score)), 
-        "verdict": verdict, 
-        "door": door,
-        "insight": f"{door_emoji} {door_meaning}"
-    }
-
-
 # =============================================================================
 # AI ANALYSIS PROMPT GENERATOR
 # =============================================================================
@@ -371,6 +183,142 @@ Reference #71 Sun Tzu's Art of War QMDJ principles where applicable."""
     return prompt
 
 
+# =============================================================================
+# HISTORY
+# =============================================================================
+
+SCAN_VERDICTS = {"good": "AUSPICIOUS", "neutral": "NEUTRAL", "bad": "INAUSPICIOUS"}
+
+
+def scan_to_readings(results: dict) -> list:
+    """One History reading per scanned hour"""
+    palace = ACTIVITY_TYPES.get(results["activity"], {}).get("palace")
+    return [
+        {
+            "date": h["hour_dt"].strftime("%Y-%m-%d"),
+            "time": h["hour_dt"].strftime("%H:%M"),
+            "palace": palace,
+            "star": h.get("star", ""),
+            "door": h.get("door", ""),
+            "deity": h.get("deity", ""),
+            "score": h["score"],
+            "verdict": SCAN_VERDICTS.get(h.get("verdict"), "NEUTRAL"),
+            "formations": h.get("formations", []),
+            "activity": results["activity"],
+            "source": "strategic",
+        }
+        for h in results["hour_results"]
+    ]
+
+
+# =============================================================================
+# RANGE SCAN
+# =============================================================================
+
+SCAN_MODES = ["Single day", "Date range"]
+
+# Seconds between progress refreshes while a range scan runs
+SCAN_POLL_SECONDS = 1.0
+
+
+def start_range_scan(date_range, activity: str, profile: dict, top_k: int):
+    """Cancel any running range scan and start a new one in the background"""
+    if len(date_range) != 2:
+        st.warning("Pick a start and an end date")
+        return
+    previous = st.session_state.get("range_scan")
+    if previous is not None and previous.running:
+        previous.cancel()
+    try:
+        st.session_state.range_scan = StrategicScan(
+            date_range[0], date_range[1], activity, profile, top_k
+        ).start()
+    except ValueError as e:
+        st.warning(str(e))
+
+
+def range_scan_panel():
+    """Progress, cancel button and the golden hours found so far"""
+    scan = st.session_state.get("range_scan")
+    if scan is None:
+        st.info(f"👈 Pick up to {SCAN_MAX_DAYS} days and an activity, then click **Scan Range**")
+        return
+    
+    snap = scan.snapshot()
+    st.markdown(
+        f"### 📊 {scan.activity}: {scan.start_date.strftime('%b %d, %Y')} - "
+        f"{scan.end_date.strftime('%b %d, %Y')}"
+    )
+    
+    label = f"{snap['days_done']}/{snap['days_total']} days • {snap['hours_scanned']} hours • {snap['elapsed']:.1f}s"
+    if scan.running:
+        col1, col2 = st.columns([4, 1])
+        col1.progress(snap["progress"], text=f"Scanning... {label}")
+        col2.button("⏹ Cancel", on_click=scan.cancel, use_container_width=True)
+    elif snap["status"] == "done":
+        st.success(f"✅ Scan complete: {label}")
+    elif snap["status"] == "cancelled":
+        st.warning(f"⏹ Scan cancelled: {label}")
+    else:
+        st.error(f"Scan failed: {snap['error']}")
+    
+    if snap["top"]:
+        st.markdown(f"**⭐ Top {len(snap['top'])} Golden Hours**")
+        st.dataframe(
+            [
+                {
+                    "Date": h["date"].strftime("%a %Y-%m-%d"),
+                    "Hour": f"{h['hour_name']} ({h['time_range']})",
+                    "Score": h["score"],
+                    "Door": h["door"],
+                    "Star": h["star"],
+                    "Deity": h["deity"],
+                    "Formations": ", ".join(h["formations"]),
+                }
+                for h in snap["top"]
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    if snap["daily"]:
+        with st.expander("📅 Best hour per day"):
+            st.dataframe(
+                [
+                    {
+                        "Date": d["date"].strftime("%a %Y-%m-%d"),
+                        "Best": f"{d['best_hour']} ({d['best_door']})",
+                        "Best Score": d["best_score"],
+                        "Average": d["average_score"],
+                        "Good Hours": d["good_hours"],
+                    }
+                    for d in snap["daily"]
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+    
+    # The polling fragment only reruns itself; rerun the page once when done
+    if not scan.running and st.session_state.get("range_scan_polling"):
+        st.session_state.range_scan_polling = False
+        st.rerun()
+
+
+def render_range_scan():
+    """Show the range scan, refreshing it in place while it runs"""
+    scan = st.session_state.get("range_scan")
+    running = scan is not None and scan.running
+    st.session_state.range_scan_polling = running
+    if not running:
+        range_scan_panel()
+    elif hasattr(st, "fragment"):
+        st.fragment(run_every=SCAN_POLL_SECONDS)(range_scan_panel)()
+    else:
+        range_scan_panel()
+        time.sleep(SCAN_POLL_SECONDS)
+        st.rerun()
+
+
 # =============================================================================
 # MAIN PAGE
 # =============================================================================
@@ -379,14 +327,22 @@ def main():
     st.title("🎯 Strategic Execution")
     st.caption("Find optimal timing • Get AI-powered deep analysis")
     
+    if not IMPORTS_OK:
+        st.error(f"Failed to import core modules: {IMPORT_ERROR}")
+        st.stop()
+    
     # Sidebar
     with st.sidebar:
         st.header("📅 Parameters")
         
-        selected_date = st.date_input(
-            "Date",
-            value=datetime.now(pytz.timezone('Asia/Singapore')).date()
-        )
+        scan_mode = st.radio("Scan", SCAN_MODES, horizontal=True)
+        today = datetime.now(pytz.timezone('Asia/Singapore')).date()
+        
+        if scan_mode == SCAN_MODES[0]:
+            selected_date = st.date_input("Date", value=today)
+        else:
+            date_range = st.date_input("Dates", value=(today, today + timedelta(days=13)))
+            top_k = st.number_input("Golden hours to keep", min_value=1, max_value=50, value=SCAN_TOP_K)
         
         activity = st.selectbox("Activity", options=list(ACTIVITY_TYPES.keys()))
         activity_desc = ACTIVITY_TYPES[activity]["desc"]
@@ -406,7 +362,16 @@ def main():
             profile = None
         
         st.divider()
-        scan_btn = st.button("🔍 Scan Day", type="primary", use_container_width=True)
+        if scan_mode == SCAN_MODES[0]:
+            scan_btn = st.button("🔍 Scan Day", type="primary", use_container_width=True)
+        else:
+            range_btn = st.button("🔍 Scan Range", type="primary", use_container_width=True)
+    
+    if scan_mode != SCAN_MODES[0]:
+        if range_btn:
+            start_range_scan(date_range, activity, profile if use_bazi else None, int(top_k))
+        render_range_scan()
+        return
     
     # Initialize session state
     if "scan_results" not in st.session_state:
@@ -414,36 +379,20 @@ def main():
     
     # Main content
     if scan_btn:
-        tz = pytz.timezone('Asia/Singapore')
-        
         # Scan hours
-        hour_results = []
-        for hour_name, hour_cn, time_range, animal in CHINESE_HOURS:
-            start_hour = int(time_range.split(":")[0])
-            if start_hour == 23:
-                hour_dt = tz.localize(datetime.combine(selected_date - timedelta(days=1), datetime.min.time().replace(hour=23)))
-            else:
-                hour_dt = tz.localize(datetime.combine(selected_date, datetime.min.time().replace(hour=start_hour)))
-            
-            result = score_hour(hour_dt, activity, profile if use_bazi else None)
-            result["hour_name"] = f"{hour_name} {hour_cn}"
-            result["time_range"] = time_range
-            result["hour_dt"] = hour_dt
-            hour_results.append(result)
-        
-        # Sort and find golden hour
+        hour_results = scan_day(selected_date, activity, profile if use_bazi else None)
+        
+        # Sort and find golden hour; only its insights are shown
         sorted_hours = sorted(hour_results, key=lambda x: x["score"], reverse=True)
-        golden = sorted_hours[0]
+        golden = with_insights(sorted_hours[0], activity, profile if use_bazi else None)
         
         # Get direction scores for golden hour
         if IMPORTS_OK:
-            chart = generate_qmdj_chart(golden["hour_dt"])
+            chart = cached_qmdj_chart(golden["hour_dt"])
         else:
             chart = None
         
-        direction_scores = {}
-        for d, name, palace in DIRECTIONS:
-            direction_scores[d] = score_direction(chart, d, palace)
+        direction_scores = score_directions(chart)
         
         # Store results
         st.session_state.scan_results = {
@@ -523,6 +472,21 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
         
+        # All activities for the same day, one pass over the hours
+        if st.toggle("📊 Compare all activities", key="compare_activities"):
+            matrix = scan_day_matrix(results['date'], None, results['profile'])
+            st.dataframe(
+                [
+                    {"Hour": hour_name, **dict(zip(matrix["activities"], scores))}
+                    for hour_name, scores in zip(matrix["hour_names"], matrix["scores"].tolist())
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption("Best hour: " + " • ".join(
+                f"{activity} {matrix['hour_names'][row]}" for activity, row in matrix["best"].items()
+            ))
+        
         st.divider()
         
         # Direction Compass
@@ -612,6 +576,10 @@ def main():
             st.code(ai_prompt, language="markdown")
             st.info("👆 Copy this prompt and paste it to Claude for deep analysis")
         
+        if HISTORY_OK and st.button("💾 Save Scan to History", use_container_width=True):
+            ids = get_history_store().add_many(scan_to_readings(results))
+            st.success(f"Saved {len(ids)} hours to History")
+        
         # Also offer JSON export
         with st.expander("📊 Export Raw Data (JSON)"):
             export_data = {